@@ -0,0 +1,168 @@
+"""
+Batch planning: many start/goal queries against one map, spread across worker processes.
+
+Every worker builds the per-layout state once, in its initializer (the `Visualiser` and its
+compiled `ObstacleSet`, the `OccupancyGrid` for planners that take one, such as `DT_RRT_Star`,
+and for multi-query planners such as `PRM`, the roadmap), then answers its share of the queries against it,
+each on a fresh `Budget`. Queries that cannot be solved are rejected beforehand, by a precheck
+on the layout's `OccupancyGrid`, and never reach a worker.
+
+USAGE:
+    `results = plan_batch(layout_maze(), [(start, goal), ...], PRM)`
+    `results[i].path`, `results[i].elapsed`
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from inspect import signature
+from os import cpu_count, getpid
+from time import perf_counter
+from typing import NamedTuple
+
+import numpy as np
+
+from layout import Layout
+from budget import Budget
+from visualiser import Visualiser
+from roadmap import PRM, DEFAULT_CACHE_DIR
+from occupancy import OccupancyGrid
+
+MULTI_QUERY_PLANNERS = (PRM,)
+"""
+Planners that are built once per worker and answer queries through `find_path(start, goal)`.
+Any other planner is built anew, for each query, on a map whose `start` and `goal` are the query's.
+"""
+
+
+class QueryResult(NamedTuple):
+    start: tuple
+    goal: tuple
+    path: list[tuple]
+    """
+    The path found, empty if there is none
+    """
+    elapsed: float
+    """
+    Wall time spent answering the query, in seconds (excluding the per-layout setup)
+    """
+    worker: int
+    """
+    Process id of the worker that answered the query (of the calling process, if the precheck rejected it)
+    """
+    reason: str | None = None
+    """
+    Why the precheck rejected the query, `None` if it did not
+    """
+
+
+# per-worker state, set by `_init_worker`
+_map_env: Visualiser | None = None
+_planner_class = None
+_planner_kwargs: dict = {}
+_planner = None
+_budget_limits: tuple = (None, None)  # `max_iterations`, `max_wall_time` of each query's `Budget`
+
+
+def plan_batch(
+    layout: dict | Layout,
+    queries,
+    planner_class=PRM,
+    max_workers: int | None = None,
+    chunksize: int | None = None,
+    precheck_resolution: float | None = 5.0,
+    clearance: float = 0.0,
+    max_iterations: int | None = None,
+    max_wall_time: float | None = 10.0,
+    **planner_kwargs,
+) -> list[QueryResult]:
+    """
+    Answers every start/goal query on `layout`
+
+    Parameters:
+    -----------
+    layout : dict | Layout
+        The map shared by all the queries
+    queries : array-like
+        `(Q, 2, 2)` start/goal pairs
+    planner_class : type
+        The planner to use, `PRM` by default
+    max_workers : int | None
+        Number of worker processes (`None`: one per CPU)
+    chunksize : int | None
+        Queries sent to a worker at a time (`None`: the queries are split evenly across the workers)
+    precheck_resolution : float | None
+        Cell size of the occupancy grid used to reject unsolvable queries, `None` for no precheck
+    clearance : float
+        How far from obstacles the start and goal must be, on the grid
+    max_iterations, max_wall_time : int | None, float | None
+        Limits of the `Budget` each query gets (for planners that take one), `None` for no limit
+    planner_kwargs
+        Passed on to the planner's constructor (except a `budget`, see `max_iterations` and `max_wall_time`)
+
+    Returns:
+    --------
+    list[QueryResult]
+        One result per query, in the order of `queries`
+    """
+    if "budget" in planner_kwargs:
+        raise ValueError("Each query gets its own budget, pass max_iterations and max_wall_time instead")
+    queries = [(tuple(start), tuple(goal)) for start, goal in np.asarray(queries, dtype=float).tolist()]
+    results: list[QueryResult | None] = [None] * len(queries)
+    if precheck_resolution is not None:
+        map_env = Visualiser(layout)
+        grid = OccupancyGrid.from_map(map_env, precheck_resolution, clearance)
+        for index, (start, goal) in enumerate(queries):
+            start_time = perf_counter()
+            reason = grid.precheck(start, goal, map_env.obstacle_set)
+            if reason is not None:
+                results[index] = QueryResult(start, goal, [], perf_counter() - start_time, getpid(), reason)
+    pending = [index for index, result in enumerate(results) if result is None]
+    if not pending:
+        return results
+
+    if planner_class is PRM and planner_kwargs.get("cache_dir", DEFAULT_CACHE_DIR) is not None:
+        # build (or load) the roadmap here, so that the workers all load it from the cache
+        # rather than each building their own
+        PRM(Visualiser(layout), **planner_kwargs)
+
+    max_workers = max_workers or cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(pending) // (4 * max_workers))
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(layout, planner_class, planner_kwargs, (max_iterations, max_wall_time)),
+    ) as executor:
+        answers = executor.map(_answer_query, [queries[index] for index in pending], chunksize=chunksize)
+        for index, result in zip(pending, answers):
+            results[index] = result
+    return results
+
+
+def _init_worker(layout, planner_class, planner_kwargs, budget_limits=(None, None)) -> None:
+    global _map_env, _planner_class, _planner_kwargs, _planner, _budget_limits
+    _map_env = Visualiser(layout)
+    _planner_class = planner_class
+    _planner_kwargs = planner_kwargs
+    _budget_limits = budget_limits
+    if "occupancy" in signature(planner_class).parameters and "occupancy" not in planner_kwargs:
+        # shared by all the worker's queries, rather than rasterised anew for each
+        _planner_kwargs = {**planner_kwargs, "occupancy": OccupancyGrid.from_map(_map_env)}
+    if planner_class in MULTI_QUERY_PLANNERS:
+        _planner = planner_class(_map_env, **planner_kwargs)
+    return
+
+
+def _answer_query(query) -> QueryResult:
+    start, goal = query
+    start_time = perf_counter()
+    if _planner is not None:
+        _, path = _planner.find_path(start, goal)
+    else:
+        # single-query planners read their query off the map
+        _map_env.start, _map_env.goal = start, goal
+        planner_kwargs = _planner_kwargs
+        if "budget" in signature(_planner_class).parameters:
+            # a fresh one for each query, as a spent budget makes every later query give up at once
+            planner_kwargs = {**planner_kwargs, "budget": Budget(*_budget_limits)}
+        _, path = _planner_class(_map_env, **planner_kwargs).find_path()
+    return QueryResult(start, goal, path, perf_counter() - start_time, getpid())
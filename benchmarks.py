@@ -0,0 +1,502 @@
+"""
+Micro-benchmarks for the planners and the structures they rely on.
+
+USAGE:
+    `python benchmarks.py`               runs every benchmark
+    `python benchmarks.py <name> ...`    runs only the named ones
+Planner trees are saved as `TreeSnapshot`s under `ARTEFACT_DIR`
+"""
+
+import itertools
+import random
+import pickle
+from pathlib import Path
+from sys import argv
+from time import perf_counter
+from timeit import repeat
+from threading import Condition
+from typing import Callable
+
+import numpy as np
+
+from vector import Vector
+from obstacle import DynamicObstacle
+import shapes
+from visualiser import Visualiser
+from map_layouts import layout_simple_cross, layout_maze, layout_super_maze, layout_serpentine
+from lazy_dt_rrt_star import Lazy_DT_RRT_Star
+from debug import DebugHook
+from tree_snapshot import TreeSnapshot
+from rrt_star import Node, RRT_Star
+from q_rrt_star import Q_RRT_Star
+from rrt import RRT
+from parallel_rrt import ParallelRRT
+from roadmap import PRM
+from budget import Budget
+from occupancy import OccupancyGrid
+from path_processing import smooth_path, path_length
+from samplers import GaussianSampler, BridgeSampler, FreeSpaceSampler
+from edge_checker import EdgeChecker, DEFAULT_PARALLEL_THRESHOLD
+from procedural_layouts import random_field, recursive_maze, urban_grid
+from layout_file import LayoutFile
+from spatial_index import NEIGHBORHOODS
+
+BENCHMARKS: dict[str, Callable[[], None]] = {}
+ARTEFACT_DIR = Path(__file__).parent / "benchmark_artefacts"
+
+
+def benchmark(func):
+    """
+    Registers a `bench_<name>` function under `<name>`
+    """
+    BENCHMARKS[func.__name__.removeprefix("bench_")] = func
+    return func
+
+
+def save_tree(name: str, nodes: list) -> Path:
+    """
+    Stores a planner's tree as a benchmark artefact
+    """
+    ARTEFACT_DIR.mkdir(exist_ok=True)
+    file = ARTEFACT_DIR / f"{name}.tree"
+    TreeSnapshot.from_nodes(nodes).save(file)
+    return file
+
+
+def per_call(stmt: Callable[[], object], number: int = 100_000) -> float:
+    """
+    Best-of-5 cost of a single call to `stmt`, in nanoseconds
+    """
+    return min(repeat(stmt, number=number, repeat=5)) / number * 1e9
+
+
+@benchmark
+def bench_vector():
+    anchor_point = Vector.from_rectangular([60.0, 210.0])
+    velocity = Vector.from_rectangular([600.0, -360.0])
+    balloon = DynamicObstacle((60, 210), (600, -360), shapes.Circle, (40,))
+
+    print(f"Vector construction          {per_call(lambda: Vector.from_rectangular([60.0, 210.0])):8.1f} ns")
+    print(f"scale (allocating)           {per_call(lambda: velocity.scale(0.01)):8.1f} ns")
+    print(f"anchor + velocity.scale(t)   {per_call(lambda: anchor_point + velocity.scale(0.01)):8.1f} ns")
+    print(f"anchor.add_scaled(velocity)  {per_call(lambda: anchor_point.add_scaled(velocity, 0.01)):8.1f} ns")
+    print(f"DynamicObstacle.move         {per_call(lambda: balloon.move(0.01)):8.1f} ns")
+
+
+@benchmark
+def bench_lazy_edges(seeds=range(5)):
+    print(f"{'mode':<10}{'seed':>6}{'edge checks':>14}{'nodes':>8}{'time (s)':>10}")
+    for lazy_edges in (False, True):
+        for seed in seeds:
+            random.seed(seed)
+            np.random.seed(seed)
+            planner = Lazy_DT_RRT_Star(Visualiser(layout_simple_cross()), lazy_edges=lazy_edges)
+            start_time = perf_counter()
+            planner.find_path()
+            elapsed = perf_counter() - start_time
+            mode = "lazy" if lazy_edges else "eager"
+            save_tree(f"lazy_edges-{mode}-{seed}", planner.nodes)
+            print(f"{mode:<10}{seed:>6}{planner.edge_checks:>14}{len(planner.nodes):>8}{elapsed:>10.2f}")
+
+
+@benchmark
+def bench_debug_hook(seeds=range(3)):
+    # idle cost per loop iteration of the previous `Condition`-based protocol vs. `DebugHook`
+    pause_condition = Condition()
+    paused = False
+
+    def condition_protocol():
+        pause_condition.acquire(blocking=True)
+        pause_condition.wait_for(lambda: not paused)
+        pause_condition.release()
+
+    debug_hook = DebugHook()
+
+    def hook_protocol():
+        if __debug__ and debug_hook is not None and debug_hook.requested:
+            debug_hook.service(None)
+
+    print(f"Condition acquire/wait_for/release  {per_call(condition_protocol):8.1f} ns per iteration")
+    print(f"DebugHook check                     {per_call(hook_protocol):8.1f} ns per iteration")
+    print(f"empty iteration                     {per_call(lambda: None):8.1f} ns per iteration")
+
+    # end to end, with the hook (and keypress daemon) on and off
+    print(f"{'debug':<8}{'seed':>6}{'nodes':>8}{'time (s)':>10}")
+    for debug in (True, False):
+        for seed in seeds:
+            random.seed(seed)
+            np.random.seed(seed)
+            planner = Lazy_DT_RRT_Star(Visualiser(layout_simple_cross()), lazy_edges=True, debug=debug)
+            start_time = perf_counter()
+            planner.find_path()
+            elapsed = perf_counter() - start_time
+            print(f"{str(debug):<8}{seed:>6}{len(planner.nodes):>8}{elapsed:>10.2f}")
+
+
+@benchmark
+def bench_tree_snapshot(n_nodes=50_000):
+    rng = np.random.default_rng(0)
+    nodes = [Node((250.0, 50.0))]
+    nodes[0].cost = 0
+    for _ in range(n_nodes - 1):
+        parent = nodes[rng.integers(len(nodes))]
+        node = Node(tuple(rng.uniform(0, 500, 2)), parent)
+        node.cost = parent.cost + 1
+        nodes.append(node)
+
+    start_time = perf_counter()
+    pickled = pickle.dumps(nodes)
+    print(f"pickle Node graph          {perf_counter() - start_time:8.4f} s  {len(pickled) / 1e6:6.2f} MB")
+    start_time = perf_counter()
+    snapshot = TreeSnapshot.from_nodes(nodes)
+    print(f"flatten to TreeSnapshot    {perf_counter() - start_time:8.4f} s")
+    start_time = perf_counter()
+    file = save_tree("tree_snapshot", nodes)
+    print(f"flatten + save             {perf_counter() - start_time:8.4f} s  {file.stat().st_size / 1e6:6.2f} MB")
+    start_time = perf_counter()
+    pickle.loads(pickled)
+    print(f"unpickle Node graph        {perf_counter() - start_time:8.4f} s")
+    start_time = perf_counter()
+    TreeSnapshot.load(file, mmap=False)
+    print(f"load snapshot              {perf_counter() - start_time:8.4f} s")
+    start_time = perf_counter()
+    TreeSnapshot.load(file)
+    print(f"memory-map snapshot        {perf_counter() - start_time:8.4f} s")
+    del snapshot
+
+
+@benchmark
+def bench_roadmap(n_queries=20):
+    print(f"{'layout':<20}{'RRT ms':>10}{'PRM ms':>10}")
+    for layout in (layout_maze, layout_super_maze):
+        env = Visualiser(layout())
+        prm = PRM(env, cache_dir=ARTEFACT_DIR / "roadmaps")  # built once, on the first run
+        rng = np.random.default_rng(0)
+        rrt_times, prm_times = [], []
+        while len(prm_times) < n_queries:
+            start, goal = (tuple(point) for point in rng.uniform((0, 0), env.size, (2, 2)).tolist())
+            if env.obstacle_set.contains_point(start) or env.obstacle_set.contains_point(goal):
+                continue
+            start_time = perf_counter()
+            prm.find_path(start, goal)
+            prm_times.append(perf_counter() - start_time)
+            if not rrt_times:  # RRT takes seconds to minutes per query
+                env.start, env.goal = start, goal
+                start_time = perf_counter()
+                RRT(env).find_path()
+                rrt_times.append(perf_counter() - start_time)
+        print(f"{layout.__name__:<20}{np.median(rrt_times) * 1e3:>10.1f}{np.median(prm_times) * 1e3:>10.1f}")
+
+
+@benchmark
+def bench_budget():
+    # the per-iteration cost of the limits, against RRT*'s iterations, which take tens of microseconds
+    unlimited = Budget()
+    limited = Budget(max_iterations=10**12, max_wall_time=10**6, max_nodes=10**12)
+    print(f"unlimited Budget.spend     {per_call(lambda: unlimited.spend(1000)):8.1f} ns")
+    print(f"limited Budget.spend       {per_call(lambda: limited.spend(1000)):8.1f} ns")
+
+
+@benchmark
+def bench_guide_path(seeds=range(3)):
+    # the DT-RRT* variants' guide path: a plain RRT (as they used to) vs. the occupancy grid's distance field
+    print(f"{'layout':<20}{'seed':>6}{'RRT s':>10}{'grid s':>10}{'RRT length':>12}{'grid length':>12}")
+    for layout, layout_seeds in ((layout_maze, seeds), (layout_super_maze, seeds[:1])):  # RRT takes minutes here
+        env = Visualiser(layout())
+        for seed in layout_seeds:
+            np.random.seed(seed)
+            start_time = perf_counter()
+            rrt = RRT(env)
+            rrt_path = rrt._trace_path(rrt.find_path()[0]) + [env.goal]
+            rrt_time = perf_counter() - start_time
+            start_time = perf_counter()
+            grid_path = OccupancyGrid.from_map(env).guide_path(env.start, env.goal)
+            grid_time = perf_counter() - start_time
+            # compared once shortcut, as the DT-RRT* variants use them
+            rrt_length = path_length(smooth_path(rrt_path, env.obstacle_set, step_size=5))
+            grid_length = path_length(smooth_path(grid_path, env.obstacle_set, step_size=5))
+            print(
+                f"{layout.__name__:<20}{seed:>6}{rrt_time:>10.3f}{grid_time:>10.3f}{rrt_length:>12.1f}{grid_length:>12.1f}"
+            )
+
+
+@benchmark
+def bench_adaptive_sampling(seeds=range(5)):
+    # fixed Gaussian spreads pointing down the distance field vs. oriented along the path and adapted on the fly
+    print(f"{'layout':<20}{'mode':<10}{'seed':>6}{'acceptance':>12}{'iterations':>12}{'sigma_r':>10}{'time (s)':>10}")
+    for layout, layout_seeds in ((layout_simple_cross, seeds), (layout_maze, seeds[:1])):  # minutes on the maze
+        for adaptive_sampling, seed in itertools.product((False, True), layout_seeds):
+            random.seed(seed)
+            np.random.seed(seed)
+            planner = Lazy_DT_RRT_Star(Visualiser(layout()), adaptive_sampling=adaptive_sampling)
+            start_time = perf_counter()
+            planner.find_path()
+            elapsed = perf_counter() - start_time
+            acceptance = planner.samples_accepted / max(planner.samples_accepted + planner.samples_rejected, 1)
+            mode = "adaptive" if adaptive_sampling else "fixed"
+            print(
+                f"{layout.__name__:<20}{mode:<10}{seed:>6}{acceptance:>12.1%}{planner.stats.iterations:>12}"
+                f"{planner.sigma_r:>10.1f}{elapsed:>10.2f}"
+            )
+
+
+@benchmark
+def bench_narrow_passages(seeds=range(3)):
+    # RRT's time to a first solution with uniform samples vs. the narrow-passage samplers
+    samplers = {"uniform": lambda env: None, "gaussian": GaussianSampler, "bridge": BridgeSampler}
+    print(f"{'layout':<20}{'sampler':<10}{'seed':>6}{'iterations':>12}{'nodes':>8}{'time (s)':>10}")
+    for layout, layout_seeds in ((layout_maze, seeds), (layout_super_maze, seeds[:1])):  # minutes each here
+        env = Visualiser(layout())
+        for (name, sampler), seed in itertools.product(samplers.items(), layout_seeds):
+            np.random.seed(seed)
+            start_time = perf_counter()
+            planner = RRT(env, sampler=sampler(env))
+            planner.find_path()
+            elapsed = perf_counter() - start_time
+            print(
+                f"{layout.__name__:<20}{name:<10}{seed:>6}{planner.stats.iterations:>12}{len(planner.nodes):>8}{elapsed:>10.2f}"
+            )
+
+
+@benchmark
+def bench_free_space(seeds=range(3)):
+    # RRT with uniform samples over the whole map vs. samples from the free space only, on a mostly blocked map
+    print(f"{'layout':<20}{'sampler':<10}{'seed':>6}{'iterations':>12}{'wasted':>8}{'time (s)':>10}")
+    for layout in (layout_serpentine, layout_maze):
+        env = Visualiser(layout())
+        grid = OccupancyGrid.from_map(env)  # once per layout
+        for free_space, seed in itertools.product((False, True), seeds):
+            np.random.seed(seed)
+            start_time = perf_counter()
+            planner = RRT(env, sampler=FreeSpaceSampler(env, grid) if free_space else None)
+            planner.find_path()
+            elapsed = perf_counter() - start_time
+            wasted = 1 - (len(planner.nodes) - 1) / planner.stats.iterations  # iterations that added no node
+            name = "free" if free_space else "uniform"
+            print(
+                f"{layout.__name__:<20}{name:<10}{seed:>6}{planner.stats.iterations:>12}{wasted:>8.0%}{elapsed:>10.2f}"
+            )
+
+
+@benchmark
+def bench_parallel_rrt(seeds=range(2), worker_counts=(1, 2, 4)):
+    # time to a first solution on the super maze, by number of worker processes (scales with the cores available)
+    env = Visualiser(layout_super_maze())
+    print(f"{'workers':<10}{'seed':>6}{'iterations':>12}{'nodes':>8}{'time (s)':>10}")
+    for n_workers, seed in itertools.product(worker_counts, seeds):
+        start_time = perf_counter()
+        planner = ParallelRRT(env, n_workers=n_workers, seed=seed)
+        planner.find_path()
+        elapsed = perf_counter() - start_time
+        print(f"{n_workers:<10}{seed:>6}{planner.stats.iterations:>12}{planner.stats.nodes:>8}{elapsed:>10.2f}")
+
+
+@benchmark
+def bench_edge_batches(n_workers=4):
+    # rewiring with a large neighbourhood: edge batches checked on the planner's thread vs. split across threads
+    print(f"{'planner':<12}{'mode':<10}{'nodes':>8}{'edges':>10}{'split':>8}{'time (s)':>10}")
+    for planner_class, max_iterations in ((RRT_Star, 4000), (Q_RRT_Star, 1500)):
+        for parallel_threshold in (None, DEFAULT_PARALLEL_THRESHOLD):
+            random.seed(0)
+            np.random.seed(0)
+            env = Visualiser(layout_simple_cross())
+            planner = planner_class(env, neighbor_radius=60, budget=Budget(max_iterations=max_iterations))
+            planner.edge_checker = EdgeChecker(env.obstacle_set, None, parallel_threshold, n_workers)
+            start_time = perf_counter()
+            planner.find_path()
+            elapsed = perf_counter() - start_time
+            checker = planner.edge_checker
+            mode = "serial" if parallel_threshold is None else "threaded"
+            print(
+                f"{planner_class.__name__:<12}{mode:<10}{len(planner.nodes):>8}{checker.edges_checked:>10}"
+                f"{checker.parallel_batches:>8}{elapsed:>10.2f}"
+            )
+
+
+@benchmark
+def bench_large_map(size=(10_000, 10_000), n_obstacles=20_000, n_points=100_000):
+    # a generated 10k x 10k map with float coordinates: collision checks, occupancy grid, sampling and planning
+    start_time = perf_counter()
+    env = Visualiser(random_field(size, n_obstacles, circle_fraction=0.5, as_layout=True))
+    obstacle_set = env.obstacle_set
+    print(f"generate {len(obstacle_set)} obstacles    {perf_counter() - start_time:8.3f} s")
+    start_time = perf_counter()
+    obstacle_set.tile_index()
+    print(f"build tile index             {perf_counter() - start_time:8.3f} s")
+
+    rng = np.random.default_rng(1)  # not the obstacles' seed, whose first draws are their positions
+    points = rng.uniform((0, 0), size, (n_points, 2))
+    point = tuple(points[0].tolist())
+    bounds, circles = obstacle_set._bounds, obstacle_set.circles
+
+    def scan_point():  # every obstacle, as `contains_point` used to
+        x, y = point
+        np.any((bounds[:, 0] <= x) & (x <= bounds[:, 2]) & (bounds[:, 1] <= y) & (y <= bounds[:, 3]))
+        np.any((circles[:, 0] - x) ** 2 + (circles[:, 1] - y) ** 2 <= circles[:, 2] ** 2)
+
+    print(f"contains_point, scan         {per_call(scan_point, 100) / 1e3:8.1f} us")
+    print(f"contains_point, tiles        {per_call(lambda: obstacle_set.contains_point(point), 10_000) / 1e3:8.1f} us")
+    start_time = perf_counter()
+    for chunk in np.array_split(points[:10_000], 100):  # a full scan of 100k points would take gigabytes
+        x, y = chunk[:, 0:1], chunk[:, 1:2]
+        np.any((bounds[:, 0] <= x) & (x <= bounds[:, 2]) & (bounds[:, 1] <= y) & (y <= bounds[:, 3]), axis=1)
+        np.any((circles[:, 0] - x) ** 2 + (circles[:, 1] - y) ** 2 <= circles[:, 2] ** 2, axis=1)
+    scan_time = (perf_counter() - start_time) / 10_000
+    start_time = perf_counter()
+    inside = obstacle_set.contains_points(points)
+    tile_time = (perf_counter() - start_time) / n_points
+    print(f"contains_points, scan        {scan_time * 1e6:8.2f} us per point")
+    print(f"contains_points, tiles       {tile_time * 1e6:8.2f} us per point  ({inside.mean():.0%} blocked)")
+
+    start_time = perf_counter()
+    grid = OccupancyGrid.from_map(env)
+    print(f"{grid}  {perf_counter() - start_time:8.3f} s  {grid.blocked.nbytes / 1e6:6.1f} MB")
+    start_time = perf_counter()
+    print(f"precheck: {grid.precheck(env.start, env.goal, obstacle_set)}  {perf_counter() - start_time:8.3f} s")
+    start_time = perf_counter()
+    field = grid.distance_field(env.goal)
+    print(f"distance field               {perf_counter() - start_time:8.3f} s  {field.nbytes / 1e6:6.1f} MB")
+    start_time = perf_counter()
+    guide_path = grid.guide_path(env.start, env.goal)
+    print(f"guide path ({len(guide_path)} points)     {perf_counter() - start_time:8.3f} s")
+
+    sampler = FreeSpaceSampler(env, grid)
+    print(f"FreeSpaceSampler.sample      {per_call(sampler.sample, 10_000) / 1e3:8.2f} us")
+
+    print(f"{'planner':<12}{'step':>6}{'iterations':>12}{'nodes':>8}{'length':>10}{'time (s)':>10}")
+    for step_size in (100, 250):
+        start_time = perf_counter()
+        planner = ParallelRRT(env, step_size=step_size, n_workers=1, seed=0)
+        final_index, path = planner.find_path()
+        elapsed = perf_counter() - start_time
+        print(
+            f"{'ParallelRRT':<12}{step_size:>6}{planner.stats.iterations:>12}{planner.stats.nodes:>8}"
+            f"{path_length(path):>10.0f}{elapsed:>10.2f}"
+        )
+
+
+@benchmark
+def bench_scaling(size=(10_000, 10_000), obstacle_counts=(10, 100, 1000, 10_000, 100_000)):
+    # generated 10k x 10k maps by number of obstacles: setup, collision checks and a first solution
+    layouts = [(f"field-{n}", lambda n=n: random_field(size, n)) for n in obstacle_counts]
+    layouts += [
+        ("maze", lambda: recursive_maze(size, cell_size=400)),  # RRT needs minutes in finer mazes
+        ("urban", lambda: urban_grid(size, block_size=200, street_width=40, n_clutter=10_000)),
+    ]
+    points = np.random.default_rng(1).uniform((0, 0), size, (100_000, 2))
+    print(
+        f"{'layout':<14}{'obstacles':>10}{'generate s':>12}{'compile s':>11}{'check us':>10}{'grid s':>8}"
+        f"{'RRT s':>8}{'nodes':>8}"
+    )
+    for name, generate in layouts:
+        start_time = perf_counter()
+        layout = generate()
+        generate_time = perf_counter() - start_time
+        start_time = perf_counter()
+        env = Visualiser(layout)
+        env.obstacle_set.contains_point(env.start)  # builds the tile index
+        compile_time = perf_counter() - start_time
+        start_time = perf_counter()
+        env.obstacle_set.contains_points(points)
+        check_time = (perf_counter() - start_time) / len(points)
+        start_time = perf_counter()
+        OccupancyGrid.from_map(env).precheck(env.start, env.goal, env.obstacle_set)
+        grid_time = perf_counter() - start_time
+        start_time = perf_counter()
+        budget = Budget(max_wall_time=120)
+        planner = ParallelRRT(env, step_size=100, n_workers=1, seed=0, budget=budget)
+        planner.find_path()
+        planner_time = perf_counter() - start_time
+        print(
+            f"{name:<14}{len(env.obstacle_set):>10}{generate_time:>12.3f}{compile_time:>11.3f}"
+            f"{check_time * 1e6:>10.2f}{grid_time:>8.2f}{planner_time:>8.2f}{planner.stats.nodes:>8}"
+        )
+
+
+@benchmark
+def bench_layout_file(size=(10_000, 10_000), n_obstacles=100_000):
+    # a 100k-obstacle map: generated in Python, parsed from JSON and compiled, or memory-mapped once compiled
+    ARTEFACT_DIR.mkdir(exist_ok=True)
+    file = ARTEFACT_DIR / "large_map.json"
+    start_time = perf_counter()
+    layout = random_field(size, n_obstacles, circle_fraction=0.3, as_layout=True)
+    env = Visualiser(layout)
+    OccupancyGrid.from_map(env)
+    env.obstacle_set.tile_index()
+    print(f"generate + build             {perf_counter() - start_time:8.3f} s")
+    LayoutFile.from_layout(layout).write(file)
+    file.with_name(file.name + ".rrtmap").unlink(missing_ok=True)
+    start_time = perf_counter()
+    LayoutFile.load_or_compile(file)
+    print(f"parse JSON + compile         {perf_counter() - start_time:8.3f} s  {file.stat().st_size / 1e6:6.1f} MB")
+    for mmap in (False, True):
+        start_time = perf_counter()
+        env = Visualiser(LayoutFile.load_or_compile(file, mmap=mmap))
+        grid = OccupancyGrid.from_map(env)  # the precompiled grid
+        elapsed = perf_counter() - start_time
+        print(f"load compiled ({'mmap' if mmap else 'read'})         {elapsed * 1e3:8.2f} ms  {grid}")
+
+
+@benchmark
+def bench_neighborhoods(checkpoints=(1000, 4000, 16_000)):
+    # neighbourhood size and time per iteration as the tree grows (towards an unreachable goal)
+    layout = dict(layout_simple_cross(), goal=(250, 250))  # inside the cross
+    print(f"{'planner':<12}{'neighbourhood':<15}{'nodes':>8}{'neighbours':>12}{'us/iteration':>14}")
+    for planner_class in (RRT_Star, Q_RRT_Star):
+        for neighborhood in NEIGHBORHOODS:
+            np.random.seed(0)
+            planner = planner_class(Visualiser(layout), neighborhood=neighborhood)
+            sizes = []
+            find_neighbors = planner.find_neighbors
+
+            def recording_find_neighbors(node, find_neighbors=find_neighbors, sizes=sizes):
+                neighbors = find_neighbors(node)
+                sizes.append(len(neighbors))
+                return neighbors
+
+            planner.find_neighbors = recording_find_neighbors
+            for n_nodes in checkpoints:
+                planner.budget = Budget(max_nodes=n_nodes)
+                del sizes[:]
+                start_time = perf_counter()
+                planner.find_path()
+                elapsed = perf_counter() - start_time
+                print(
+                    f"{planner_class.__name__:<12}{neighborhood:<15}{len(planner.nodes):>8}"
+                    f"{np.mean(sizes):>12.1f}{elapsed / planner.budget.iterations * 1e6:>14.0f}"
+                )
+
+
+@benchmark
+def bench_pruning(max_iterations=30_000, every=5000):
+    # a long anytime RRT* run on the cross map, with and without branch-and-bound pruning
+    # pruning slows the growth of the tree (and of the time per iteration) rather than stopping it:
+    # new nodes keep landing inside the bound, and every prune walks the whole tree to refresh its costs
+    class CheckpointBudget(Budget):
+        # records the tree size and the time per iteration every `every` iterations
+        def spend(self, n_nodes=0):
+            if self.iterations % every == 0:
+                checkpoints.append((self.iterations, n_nodes, perf_counter()))
+            return super().spend(n_nodes)
+
+    print(f"{'pruning':>9}  {'neighbourhood':<15}{'iterations':>12}{'nodes':>8}{'us/iteration':>14}")
+    for prune_interval, neighborhood in ((None, "fixed"), (100, "fixed"), (100, "k_nearest")):
+        np.random.seed(0)
+        checkpoints = []
+        planner = RRT_Star(
+            Visualiser(layout_simple_cross()), anytime=True, prune_interval=prune_interval, neighborhood=neighborhood
+        )
+        planner.budget = CheckpointBudget(max_iterations=max_iterations)
+        final_node, path = planner.find_path()
+        for (_, _, start_time), (iterations, n_nodes, end_time) in zip(checkpoints, checkpoints[1:]):
+            print(
+                f"{prune_interval or '-':>9}  {neighborhood:<15}{iterations:>12}{n_nodes:>8}"
+                f"{(end_time - start_time) / every * 1e6:>14.0f}"
+            )
+        print(f"path length {path_length(path):.1f}, {planner.nodes_pruned} nodes pruned")
+
+
+if __name__ == "__main__":
+    for name in argv[1:] or list(BENCHMARKS):
+        print(f"--- {name} ---")
+        BENCHMARKS[name]()
@@ -0,0 +1,123 @@
+"""
+Cooperative limits on a planner's run.
+
+A planner given a `Budget` (through its `budget` attribute) spends it once per iteration of
+its main loop, and gives up (returning `(None, [])`) as soon as it is exhausted:
+past its deadline, over its iteration or node cap, or cancelled from another thread.
+Either way, the planner's `stats` then describe how the run went (see `PlanStats`).
+"""
+
+from time import perf_counter
+from typing import NamedTuple
+
+
+class PlanStats(NamedTuple):
+    found: bool
+    """
+    Whether a path to the goal was found
+    """
+    iterations: int
+    nodes: int
+    """
+    Size of the tree when the planner stopped
+    """
+    elapsed: float
+    """
+    Wall time since the budget was created, in seconds
+    """
+    stopped_by: str | None
+    """
+    Which limit made the planner give up (see `Budget.exhausted_by`), `None` if it did not
+    """
+
+
+class Budget:
+    """
+    An iteration cap, a node cap and a wall-time deadline, all optional, and a cancellation flag.
+    The deadline starts running when the budget is created, not when the planner starts,
+    so time spent waiting for a free worker counts against it.
+    A planner without a budget runs on an unlimited one, created when `find_path` is called.
+    """
+
+    CANCELLED = "cancelled"
+    DEADLINE = "deadline"
+    MAX_ITERATIONS = "max_iterations"
+    MAX_NODES = "max_nodes"
+
+    iterations: int
+    """
+    Iterations run so far
+    """
+    exhausted_by: str | None
+    """
+    Why the budget ran out (`CANCELLED`, `DEADLINE`, `MAX_ITERATIONS` or `MAX_NODES`), `None` while it has not
+    """
+
+    def __init__(
+        self, max_iterations: int | None = None, max_wall_time: float | None = None, max_nodes: int | None = None
+    ) -> None:
+        """
+        Parameters:
+        -----------
+        max_iterations : int | None
+            Maximum number of iterations, `None` for no cap
+        max_wall_time : float | None
+            Seconds from now until the deadline, `None` for no deadline
+        max_nodes : int | None
+            Maximum size of the planner's tree, `None` for no cap
+        """
+        self.max_iterations = max_iterations
+        self.max_wall_time = max_wall_time
+        self.max_nodes = max_nodes
+        self._cancelled = False
+        self.reset()
+        return
+
+    def reset(self) -> None:
+        """
+        Refills the budget: no iterations spent, and the deadline `max_wall_time` from now.
+        For planners that run in cycles (e.g. `Dynamic_RRT_Star.replan`), each cycle on the same limits.
+        A cancelled budget stays cancelled
+        """
+        self.created_at = perf_counter()
+        self.deadline = None if self.max_wall_time is None else self.created_at + self.max_wall_time
+        self.iterations = 0
+        self.exhausted_by = None
+        return
+
+    def cancel(self) -> None:
+        """
+        Makes the planner give up at its next iteration. Safe to call from any thread
+        """
+        self._cancelled = True
+        return
+
+    def spend(self, n_nodes: int = 0) -> bool:
+        """
+        Spends one iteration
+
+        Parameters:
+        -----------
+        n_nodes : int
+            Current size of the planner's tree
+
+        Returns:
+        --------
+        bool
+            Whether the budget is exhausted, in which case the planner must stop
+        """
+        if self._cancelled:
+            self.exhausted_by = self.CANCELLED
+        elif self.max_iterations is not None and self.iterations >= self.max_iterations:
+            self.exhausted_by = self.MAX_ITERATIONS
+        elif self.max_nodes is not None and n_nodes >= self.max_nodes:
+            self.exhausted_by = self.MAX_NODES
+        elif self.deadline is not None and perf_counter() > self.deadline:
+            self.exhausted_by = self.DEADLINE
+        else:
+            self.iterations += 1
+            return False
+        return True
+
+    def stats(self, found: bool, n_nodes: int) -> PlanStats:
+        return PlanStats(found, self.iterations, n_nodes, perf_counter() - self.created_at, self.exhausted_by)
@@ -3,65 +3,158 @@ A debug kit for path planners in this project
 Lets you 'pause' the planner at any point in time and inspect its state
 """
 
-# TODO: we need an abstract planner (implementing a `find_path` method)
-# this assumes it's called `RRT`
-# from rrt import RRT
+# TODO: `planner_base.TreePlanner` could declare the `find_path` method these decorators wrap
 
 # Summary
 # ---===---
 
+# class DebugHook
+# A pause/snapshot hook, polled by the planner's loop
+# While idle, it costs the planner one attribute check per iteration
+
 # class Interjektor(Thread)
-# A generic daemon thread that pauses another thread on keypress
+# A generic daemon thread that pauses a hook's planner on keypress
 
 # @debug_planner
 # A decorator that pauses a planner on keypress, letting one inspect its state
 # TODO:
-#   - fix `matplotlib` visualiser to inspect state when paused
 #   - kill the planner on special sequences (^C, ^D)
 # USAGE:
-# N.B.: if <func> to be paused is a class's method, use `self.<func>` below
-#   - at the beginning of the function, include:
-#     `[self.]<func>.pause_condition.acquire()`
-#   - *immediately prior* to the loop that is to be pausable,
-#     signal the pauser that the loop is about to begin with:
-#     `[self.]<func>.pause_condition.notify()`
-#     `[self.]<func>.pause_condition.release()`
+#   - give the planner a `debug_hook` attribute in its constructor:
+#     `self.debug_hook = DebugHook() if debug else None`
+#     (`debug=False` removes the hook, and the keypress daemon, entirely)
+#   - before the loop that is to be pausable, read it into a local:
+#     `debug_hook = self.debug_hook`
 #   - at the beginning of the looping code, include:
-#     `self.find_path.pause_condition.acquire(blocking=True)`
-#     `self.find_path.pause_condition.wait_for(lambda: not self.find_path.paused)`
-#   - at the end of the looping code, include:
-#     `self.find_path.pause_condition.release()`
+#     `if __debug__ and debug_hook is not None and debug_hook.requested:`
+#     `    debug_hook.service(self)`
+#     N.B.: running with `python -O` compiles the check away
+# At any point, another thread can call `hook.request_snapshot()` to copy the tree out
+# without pausing the planner for longer than one shallow copy of its nodes
 
 # @proc_time
 # A simple decorator that times a function in terms of CPU time consumed
 # and prints the result to `stderr`
 
-wait_for_keypress_cmd: list[str]
-"""
-An OS-specific command that waits for a keypress (Windows/POSIX dependant)
-"""
-
 # Imports
 # ---===---
-from os import system as run_cmd
+from os import path, read
 from sys import stdin, stderr
-from time import process_time_ns
+from tempfile import TemporaryDirectory
+from time import process_time_ns, sleep
+from select import select
 from platform import system
-from threading import Thread, Condition, Event
-from subprocess import Popen, DEVNULL
+from threading import Thread, Event, Lock, current_thread
 from multiprocessing import Process  # matplotlib doesn't like being in a subthread
 
+from tree_snapshot import TreeSnapshot
+
 
 # Definitions
 # ---===---
-class Interjektor(Thread):
+class DebugHook:
     """
-    A generic daemon thread that pauses another thread on keypress
+    A pause/snapshot hook, polled by a planner's loop through `requested`.
+    Controllers (other threads) request a pause or a snapshot;
+    the planner serves the request at its next iteration, in a consistent state.
+    The request flags (and `requested`, which is derived from them) only change under a lock,
+    so that a request made while the planner is serving another one is never lost.
     """
 
-    __blocker: Popen | None
+    requested: bool
     """
-    An OS-dependent subprocess that blocks until keypress
+    Whether the planner must call `service` at its next iteration.
+    The only thing the planner reads while nothing is requested.
+    """
+
+    def __init__(self) -> None:
+        self.requested = False
+        self.__lock = Lock()  # guards the flags below and `requested`
+        self.__pause = False
+        self.__want_snapshot = False
+        self.__paused = Event()
+        self.__resumed = Event()
+        self.__snapshot_taken = Event()
+        self.__snapshot_lists: tuple[list, list, list] | None = None
+        return
+
+    @property
+    def is_paused(self) -> bool:
+        return self.__paused.is_set()
+
+    def request_pause(self, timeout: float | None = None) -> bool:
+        """
+        Blocks until the planner has paused (or `timeout` seconds have passed)
+
+        Returns:
+        --------
+        bool
+            Whether the planner is now paused
+        """
+        with self.__lock:
+            self.__resumed.clear()
+            self.__pause = True
+            self.requested = True
+        return self.__paused.wait(timeout)
+
+    def resume(self) -> None:
+        with self.__lock:
+            self.__pause = False
+            self.requested = self.__want_snapshot
+            self.__resumed.set()
+        return
+
+    def request_snapshot(self, timeout: float | None = None) -> TreeSnapshot | None:
+        """
+        Copies the planner's tree out, blocking until the planner has served the request.
+        The planner only makes shallow copies of its nodes' parents and costs,
+        the snapshot arrays are then built on the calling thread.
+
+        Returns:
+        --------
+        TreeSnapshot | None
+            The tree, or `None` if the planner did not serve the request within `timeout` seconds
+        """
+        with self.__lock:
+            self.__snapshot_taken.clear()
+            self.__want_snapshot = True
+            self.requested = True
+        if not self.__snapshot_taken.wait(timeout):
+            return None
+        nodes, parents, costs = self.__snapshot_lists
+        self.__snapshot_lists = None
+        return TreeSnapshot.from_lists(nodes, parents, costs)
+
+    def service(self, planner) -> None:
+        """
+        Serves the pending requests. Called by the planner's thread when `requested` is set.
+        """
+        with self.__lock:
+            want_snapshot, self.__want_snapshot = self.__want_snapshot, False
+            pause = self.__pause
+        if want_snapshot:
+            nodes = list(planner.nodes)
+            self.__snapshot_lists = (
+                nodes,
+                [node.parent for node in nodes],
+                [getattr(node, "cost", float("inf")) for node in nodes],
+            )
+            self.__snapshot_taken.set()
+
+        if pause:
+            self.__paused.set()
+            self.__resumed.wait()
+            self.__paused.clear()
+
+        # requests made meanwhile are still pending: `requested` stays set for them
+        with self.__lock:
+            self.requested = self.__pause or self.__want_snapshot
+        return
+
+
+class Interjektor(Thread):
+    """
+    A generic daemon thread that pauses a hook's planner on keypress
     """
 
     __must_exit: Event
@@ -77,65 +170,61 @@ class Interjektor(Thread):
 
         pass
 
-    def __init__(self, pause_condition: Condition, is_paused: bool, **kwargs):  # planner: the RRT object
+    def __init__(self, debug_hook: DebugHook, poll_interval: float = 0.1, **kwargs):
         super().__init__(daemon=True, **kwargs)
-        self.__blocker = None
         self.__must_exit = Event()
-        self.pause_condition = pause_condition
-        self.is_paused = is_paused
+        self.debug_hook = debug_hook
+        self.poll_interval = poll_interval  # How often (in seconds) the waits check whether to exit
         return
 
     def run(self):
-        # wait for the planner to start running
-        self.pause_condition.acquire(blocking=True)
-        print("DEBUG: Waiting for the planner loop to start running...", file=stderr)
-        self.pause_condition.wait()
-        self.pause_condition.release()
-
-        while not self.is_paused:
+        while True:
             try:
                 self._pause_on_keypress()
             except self._Harakiri:
                 # we were meant to die
                 return
 
+            self._inspect()
             self._resume_on_keypress()
-        return
 
     def stop(self):
+        # the thread polls this flag while it waits for a key, then restores the terminal and exits:
+        # wait for it, so that the terminal is restored before the process can exit (and kill it)
         self.__must_exit.set()
-        self.__blocker.terminate() if self.__blocker is not None else None
+        if self.is_alive() and self is not current_thread():
+            self.join()
         return
 
     # helpers:
     # --------
+    def _inspect(self):
+        """
+        What to do while the planner is paused
+        """
+        return
+
     def _pause_on_keypress(self):
         # block until user hits a key
         print("Press any key to pause...", end="", flush=True, file=stderr)
-        self.__blocker = Popen(wait_for_keypress_cmd, stdin=stdin, stdout=DEVNULL, stderr=DEVNULL)
-        self.__blocker.wait()
-        print(flush=True)
-        if self.__must_exit.is_set():
+        if not wait_for_keypress(self.__must_exit, self.poll_interval) or self.__must_exit.is_set():
+            # no keyboard to listen to (e.g. `stdin` is not a terminal), or we were stopped
             raise self._Harakiri()
-            return
+        print(flush=True, file=stderr)
 
-        # if we reach here, the keypress detector was either activated,
-        # or killed somehow (e.g. through ^C, or externally)
-        # former means the planner must be paused
-        # TODO: handle the latter specially (e.g. terminate)
         print("Pausing...", file=stderr)
-        self.is_paused = True
-        self.pause_condition.acquire(blocking=True)  # wait for consistent state
+        # wait for consistent state, unless the planner is done (it polls the hook no more) and we are stopped
+        while not self.debug_hook.request_pause(self.poll_interval):
+            if self.__must_exit.is_set():
+                self.debug_hook.resume()  # withdraw the request, so that the hook is left idle
+                raise self._Harakiri()
         return
 
     def _resume_on_keypress(self):
-        print("Press any key to resume...", end="", flush=True)
-        self.__blocker = Popen(wait_for_keypress_cmd, stdin=stdin, stdout=DEVNULL, stderr=DEVNULL)
-        self.__blocker.wait()
-        print(flush=True)
-        self.is_paused = False
-        self.pause_condition.notify()
-        self.pause_condition.release()
+        print("Press any key to resume...", end="", flush=True, file=stderr)
+        wait_for_keypress(self.__must_exit, self.poll_interval)
+        print(flush=True, file=stderr)
+        self.debug_hook.resume()
         return
 
 
@@ -147,86 +236,80 @@ class Sauron(Interjektor):
     """
 
     def __init__(self, planner, *args, **kwargs):  # planner: the RRT object
-        super().__init__(*args, **kwargs)
+        super().__init__(planner.debug_hook, *args, **kwargs)
         self.planner = planner
         return
 
-    def run(self):
-        # wait for the planner to start running
-        self.pause_condition.acquire(blocking=True)
-        print("DEBUG: Waiting for the planner loop to start running...", file=stderr)
-        self.pause_condition.wait()
-        self.pause_condition.release()
-
-        while not self.is_paused:
-            try:
-                self._pause_on_keypress()
-            except self._Harakiri:
-                # we were meant to die
-                return
-
-            # print the current state
-            goal = self.planner.map_env.goal
-            print(
-                "Current minimum distance to node: ",
-                self.planner.distance(self.planner.nearest_node(goal).position, goal),
-                file=stderr,
-            )
-
-            # draw the current state
-            sauron = Process(
-                target=self.planner.map_env.visualize_path,
-                args=(self.planner.nodes, self.planner._trace_path(self.planner.nodes[-1])),
-            )
+    def _inspect(self):
+        # print the current state
+        goal = self.planner.map_env.goal
+        print(
+            "Current minimum distance to node: ",
+            self.planner.distance(self.planner.nearest_node(goal).position, goal),
+            file=stderr,
+        )
+
+        # draw the current state
+        # the tree is handed over as a flat snapshot file, which the drawing process memory-maps,
+        # rather than by pickling the whole `Node` graph
+        with TemporaryDirectory() as snapshot_dir:
+            snapshot_file = path.join(snapshot_dir, "tree.snapshot")
+            TreeSnapshot.from_nodes(self.planner.nodes).save(snapshot_file)
+            sauron = Process(target=_visualize_snapshot, args=(self.planner.map_env, snapshot_file))
             sauron.start()
             sauron.join()
-
-            # when called from a script, matplotlib will not block
-            # workaround: use a keypress detector again
-            # ! this doesn't seem to be true, but resume on keypress is nice?
-            self._resume_on_keypress()
         return
 
 
-def pauseable(func):  # planner: RRT.find_path()
+def _visualize_snapshot(map_env, snapshot_file):
+    """
+    Draws a saved tree, with the path to its newest node. `Sauron`'s drawing process target
+    """
+    snapshot = TreeSnapshot.load(snapshot_file)
+    map_env.visualize_path(snapshot, snapshot.trace_path(len(snapshot.parents) - 1))
+    return
+
+
+def pauseable(func):
     """
-    A decorator that pauses a (properly set up) function on keypress
+    A decorator that pauses a (properly set up) function on keypress.
+    The function polls `<func>.debug_hook` (see the usage notes above)
     """
-    is_paused: bool = False
-    pause_condition = Condition()
-    # blocker: Popen | None = None
+    debug_hook = DebugHook()
 
-    def wrapper(*args, **kwargs):  # planner_self_obj: an RRT (abstract)
-        pauser_daemon = Interjektor(pause_condition, is_paused)
+    def wrapper(*args, **kwargs):
+        pauser_daemon = Interjektor(debug_hook)
         pauser_daemon.start()
-        result = func(*args, **kwargs)
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            pauser_daemon.stop()
         print(f"DEBUG: The function '{func.__name__}' has finished running.", file=stderr)
-        pauser_daemon.stop()
         return result
 
-    wrapper.paused = is_paused
-    wrapper.pause_condition = pause_condition
+    wrapper.debug_hook = debug_hook
     return wrapper
 
 
 def debug_planner(planner_func):  # planner: RRT.find_path()
     """
-    A decorator that pauses a planner on keypress, letting one inspect its state
+    A decorator that pauses a planner on keypress, letting one inspect its state.
+    Does nothing if the planner's `debug_hook` is `None`
     """
-    is_paused: bool = False
-    pause_condition = Condition()
-    # blocker: Popen | None = None
 
     def wrapper(planner_self_obj, *args, **kwargs):  # planner_self_obj: an RRT (abstract)
-        pauser_daemon = Sauron(planner_self_obj, pause_condition, is_paused)
+        if planner_self_obj.debug_hook is None:
+            return planner_func(planner_self_obj, *args, **kwargs)
+
+        pauser_daemon = Sauron(planner_self_obj)
         pauser_daemon.start()
-        result = planner_func(planner_self_obj, *args, **kwargs)
+        try:
+            result = planner_func(planner_self_obj, *args, **kwargs)
+        finally:
+            pauser_daemon.stop()  # restores the terminal, even if the planner raised
         print("DEBUG: The planner has finished running.", file=stderr)
-        pauser_daemon.stop()
         return result
 
-    wrapper.paused = is_paused
-    wrapper.pause_condition = pause_condition
     return wrapper
 
 
@@ -244,10 +327,41 @@ def proc_time(func):
     return wrapper
 
 
-# Other Definitions
-# ---===---
-# OS-specific shenanigans
-if system() == "Windows":
-    wait_for_keypress_cmd = ["cmd", "/c", "@pause"]
-else:
-    wait_for_keypress_cmd = ["/bin/bash", "-c", "read -s -n 1"]
+def wait_for_keypress(stop: Event | None = None, poll_interval: float = 0.1) -> bool:
+    """
+    Blocks until a key is pressed (or `stop` is set), without spawning a subprocess.
+    The keyboard is polled every `poll_interval` seconds rather than read with a blocking call,
+    so that the terminal's settings are always restored by the waiting thread itself.
+
+    Returns:
+    --------
+    bool
+        `False` if there is no keyboard to wait on (`stdin` is closed or not a terminal), or `stop` was set
+    """
+    if system() == "Windows":
+        import msvcrt
+
+        while not msvcrt.kbhit():
+            if stop is not None and stop.wait(poll_interval):
+                return False
+            if stop is None:
+                sleep(poll_interval)
+        msvcrt.getwch()
+        return True
+
+    if not stdin.isatty():
+        return False
+
+    import termios
+    import tty
+
+    fd = stdin.fileno()
+    old_settings = termios.tcgetattr(fd)
+    try:
+        tty.setcbreak(fd)  # unbuffered, so a single key (rather than a line) is enough
+        while not select([fd], [], [], poll_interval)[0]:
+            if stop is not None and stop.is_set():
+                return False
+        return read(fd, 1) != b""  # straight from the file descriptor, which `select` watches
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
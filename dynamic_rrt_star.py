@@ -0,0 +1,241 @@
+from time import perf_counter
+from typing import Iterable
+
+from visualiser import Visualiser
+from rrt_star import RRT_Star, Node
+from obstacle import Obstacle
+from obstacle_set import ObstacleSet
+from events import EventStream
+from budget import Budget
+from samplers import Sampler
+
+
+class Dynamic_RRT_Star(RRT_Star):
+    """
+    An RRT* that keeps its tree between planning calls, for maps whose obstacles move.
+
+    After the first `find_path`, call `replan` once per control cycle with the agent's
+    current position and the map's obstacles at their current positions
+    (e.g. `layout.static_obstacles + layout.dynamic_obstacles`, after moving the `DynamicObstacle`s).
+    The tree is re-rooted at the agent, only the subtrees whose edges are invalidated by moved
+    obstacles are pruned, and the rest of the tree is reused to reconnect to the goal.
+    Each cycle runs on a refilled `budget` (see `Budget.reset`).
+    """
+
+    def __init__(
+        self,
+        map_env: Visualiser,
+        step_size=5,
+        neighbor_radius=20,
+        events: EventStream | None = None,
+        budget: Budget | None = None,
+        sampler: Sampler | None = None,
+        neighborhood="fixed",
+        max_replan_iterations=5000,
+    ):
+        super().__init__(map_env, step_size, neighbor_radius, events, budget, sampler, neighborhood)
+        self.max_replan_iterations = max_replan_iterations
+        self.goal_node: Node | None = None
+        self.known_obstacles = set(self._obstacle_keys())
+        self.cycle_latencies: list[float] = []  # Wall time (in seconds) of each `replan` call
+
+    def find_path(self):
+        return self._grow()
+
+    def update_obstacles(self, obstacles: Iterable[Obstacle]) -> None:
+        """
+        Recompiles the map's obstacles at their current positions; `replan` then prunes what they invalidate.
+        The map's `ObstacleSet` is updated in place when it holds as many of each shape,
+        so that everything sharing it (e.g. `edge_checker`) sees the move.
+
+        Parameters:
+        -----------
+        obstacles : Iterable[Obstacle]
+            Every obstacle of the map, static and dynamic
+        """
+        obstacles = list(obstacles)
+        current = ObstacleSet.from_obstacles(obstacles)
+        obstacle_set = self.map_env.obstacle_set
+        if (
+            current.rectangles.shape == obstacle_set.rectangles.shape
+            and current.circles.shape == obstacle_set.circles.shape
+        ):
+            obstacle_set.refresh(obstacles)
+        else:
+            # obstacles appeared or disappeared
+            self.map_env.obstacle_set = current
+            self.edge_checker.obstacle_set = current
+        return
+
+    def replan(self, agent_position, obstacles: Iterable[Obstacle] | None = None):
+        """
+        Runs one replanning cycle.
+
+        Parameters:
+        -----------
+        agent_position : tuple
+            Where the agent currently is; the tree is re-rooted here
+        obstacles : Iterable[Obstacle] | None
+            Every obstacle of the map, at its current position (see `update_obstacles`),
+            `None` if the map's `ObstacleSet` has already been updated
+
+        Returns:
+        --------
+        (Node | None, list[tuple])
+            The node within `step_size` of the goal and the path to it from the agent,
+            or `(None, [])` if the goal could not be reconnected within `max_replan_iterations` (or `budget`)
+        """
+        start_time = perf_counter()
+
+        if obstacles is not None:
+            self.update_obstacles(obstacles)
+        if self.budget is not None:
+            self.budget.reset()
+        self._move_root(agent_position)
+        self._prune_invalidated_subtrees()
+        if self.goal_node is not None:
+            result = self.goal_node, self._trace_path(self.goal_node)
+            if self.events is not None:
+                self.events.emit(EventStream.PATH_IMPROVED, self.goal_node, result[1])
+        else:
+            result = self._grow(self.max_replan_iterations)
+
+        latency = perf_counter() - start_time
+        self.cycle_latencies.append(latency)
+        print(f"INFO: replanning cycle took {latency * 1e3:.3g} ms ({len(self.nodes)} nodes)")
+        return result
+
+    def _grow(self, max_iterations=None):
+        budget = self.budget if self.budget is not None else Budget()
+        iteration = 0
+        while max_iterations is None or iteration < max_iterations:
+            iteration += 1
+            if budget.spend(len(self.nodes)):
+                print(f"INFO: gave up after {budget.iterations} iterations ({budget.exhausted_by})")
+                self.stats = budget.stats(False, len(self.nodes))
+                return None, []
+            random_position = self.random_position()
+            nearest = self.nearest_node(random_position)
+            new_position = self.step_from_to(nearest.position, random_position)
+            new_node = Node(new_position, nearest)
+            new_node.cost = nearest.cost + self.distance(new_node.position, nearest.position)
+
+            # the edge from `nearest` too, it stays `new_node`'s unless a cheaper parent is found
+            if self.is_collision_free(new_node) and self.is_path_collision_free(nearest.position, new_position):
+                neighbors = self.find_neighbors(new_node)
+                self.choose_best_parent(new_node, neighbors)
+                self.rewire(new_node, neighbors)
+                self.nodes.append(new_node)
+                self.node_index.add(new_node)
+                if self.events is not None:
+                    self.events.emit(EventStream.NODE_ADDED, new_node)
+
+                if self.distance(new_node.position, self.map_env.goal) <= self.step_size:
+                    self.goal_node = new_node
+                    path = self._trace_path(new_node)
+                    if self.events is not None:
+                        self.events.emit(EventStream.PATH_IMPROVED, new_node, path)
+                    self.stats = budget.stats(True, len(self.nodes))
+                    return new_node, path
+
+        self.stats = budget.stats(False, len(self.nodes))._replace(stopped_by=Budget.MAX_ITERATIONS)
+        return None, []
+
+    def _obstacle_keys(self):
+        obstacle_set = self.map_env.obstacle_set
+        return [("rectangle", *row) for row in obstacle_set.rectangles.tolist()] + [
+            ("circle", *row) for row in obstacle_set.circles.tolist()
+        ]
+
+    def _children(self):
+        children: dict[Node, list[Node]] = {node: [] for node in self.nodes}
+        for node in self.nodes:
+            if node.parent is not None:
+                children[node.parent].append(node)
+        return children
+
+    def _move_root(self, position):
+        """
+        Re-roots the tree at `position` by reversing the parent pointers between the old
+        root and the nearest node that can see `position`. No node is discarded.
+        """
+        old_root = self.nodes[0]
+        if tuple(position) == tuple(old_root.position):
+            return
+
+        new_root = Node(tuple(position))
+        new_root.cost = 0
+
+        candidates = sorted(self.nodes, key=lambda node: self.distance(node.position, position))
+        anchor = next((node for node in candidates if self.is_path_collision_free(position, node.position)), None)
+        if anchor is None:
+            # the agent has no line of sight to the tree, start over from here
+            self.nodes = [new_root]
+            self.node_index.rebuild(self.nodes)
+            self.goal_node = None
+            return
+
+        previous_node, current_node = new_root, anchor
+        while current_node is not None:
+            next_node = current_node.parent
+            current_node.parent = previous_node
+            previous_node, current_node = current_node, next_node
+
+        self.nodes.insert(0, new_root)
+        self.node_index.add(new_root)
+        self._update_costs()
+        if self.events is not None:
+            self.events.emit(EventStream.NODE_ADDED, new_root)
+            current_node = anchor
+            while current_node is not new_root:
+                self.events.emit(EventStream.REWIRED, current_node)
+                current_node = current_node.parent
+
+    def _update_costs(self):
+        children = self._children()
+        frontier = [self.nodes[0]]
+        while frontier:
+            node = frontier.pop()
+            for child in children[node]:
+                child.cost = node.cost + self.distance(node.position, child.position)
+                frontier.append(child)
+
+    def _prune_invalidated_subtrees(self):
+        """
+        Removes every node whose edge to its parent crosses an obstacle that
+        appeared (or moved) since the last cycle, along with all its descendants.
+        """
+        current_obstacles = self._obstacle_keys()
+        moved_obstacles = [obstacle for obstacle in current_obstacles if obstacle not in self.known_obstacles]
+        self.known_obstacles = set(current_obstacles)
+        if not moved_obstacles:
+            return
+
+        moved_set = ObstacleSet(
+            rectangles=[row[1:] for row in moved_obstacles if row[0] == "rectangle"],
+            circles=[row[1:] for row in moved_obstacles if row[0] == "circle"],
+        )
+        invalid_nodes = [
+            node
+            for node in self.nodes
+            if node.parent is not None and not moved_set.is_segment_free(node.parent.position, node.position)
+        ]
+        if not invalid_nodes:
+            return
+
+        children = self._children()
+        pruned = set()
+        frontier = invalid_nodes
+        while frontier:
+            node = frontier.pop()
+            if node not in pruned:
+                pruned.add(node)
+                frontier.extend(children[node])
+
+        self.nodes = [node for node in self.nodes if node not in pruned]
+        self.node_index.discard(pruned)
+        if self.events is not None:
+            for node in pruned:
+                self.events.emit(EventStream.NODE_REMOVED, node)
+        if self.goal_node in pruned:
+            self.goal_node = None
@@ -0,0 +1,99 @@
+"""
+Batched collision checks of candidate edges, for the rewiring steps of the RRT* variants.
+
+`choose_best_parent`, `rewire` and `re_search_parent` each test a batch of independent edges.
+An `EdgeChecker` tests them in one vectorised `ObstacleSet.are_segments_free` call, and splits batches of
+at least `parallel_threshold` edges across a thread pool shared by every planner: NumPy releases the GIL
+for the bulk of the work, so the chunks run on separate cores. Smaller batches stay on the calling thread,
+where dispatching them would cost more than it saves.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from os import cpu_count
+from threading import Lock
+
+import numpy as np
+
+from obstacle_set import ObstacleSet
+
+DEFAULT_PARALLEL_THRESHOLD = 256
+"""
+Smallest batch of edges worth splitting across threads
+"""
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = Lock()
+
+
+def shared_executor() -> ThreadPoolExecutor:
+    """
+    The thread pool of every `EdgeChecker`, one thread per CPU, created on first use
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(cpu_count() or 1, thread_name_prefix="edge-checks")
+    return _executor
+
+
+class EdgeChecker:
+    def __init__(
+        self,
+        obstacle_set: ObstacleSet,
+        step_size: float | None = None,
+        parallel_threshold: int | None = DEFAULT_PARALLEL_THRESHOLD,
+        max_workers: int | None = None,
+    ) -> None:
+        """
+        Parameters:
+        -----------
+        obstacle_set : ObstacleSet
+            The obstacles the edges are checked against
+        step_size : float | None
+            Resolution of the checks, as in `ObstacleSet.is_segment_free` (`None`: exact)
+        parallel_threshold : int | None
+            Smallest batch split across threads, `None` to never split (as on a single CPU)
+        max_workers : int | None
+            Number of chunks a batch is split into (`None`: one per CPU)
+        """
+        self.obstacle_set = obstacle_set
+        self.step_size = step_size
+        self.max_workers = max_workers or cpu_count() or 1
+        self.parallel_threshold = parallel_threshold if self.max_workers > 1 else None
+        self.edges_checked = 0  # Edges checked so far
+        self.parallel_batches = 0  # Batches split across threads so far
+        return
+
+    def __str__(self) -> str:
+        return f"EdgeChecker({self.edges_checked} edges checked, {self.parallel_batches} batches split)"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    def are_free(self, starts, ends) -> np.ndarray:
+        """
+        Whether each segment from `starts[i]` to `ends[i]` is collision-free
+
+        Parameters:
+        -----------
+        starts, ends : array-like
+            `(K, 2)` arrays (or lists of `K` points) of segment end points
+
+        Returns:
+        --------
+        np.ndarray
+            `(K,)` boolean array, `True` where the segment is collision-free
+        """
+        starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+        self.edges_checked += len(starts)
+        if self.parallel_threshold is None or len(starts) < self.parallel_threshold:
+            return self.obstacle_set.are_segments_free(starts, ends, self.step_size)
+
+        self.parallel_batches += 1
+        chunks = np.array_split(np.arange(len(starts)), self.max_workers)
+        futures = [
+            shared_executor().submit(self.obstacle_set.are_segments_free, starts[chunk], ends[chunk], self.step_size)
+            for chunk in chunks
+        ]
+        return np.concatenate([future.result() for future in futures])
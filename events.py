@@ -0,0 +1,98 @@
+"""
+A bounded stream of incremental planner events, for watching a planner while it runs.
+
+A planner given an `EventStream` (through its `events` attribute) emits an event
+whenever it adds, rewires or prunes a node, or improves its path to the goal.
+A consumer (e.g. `visualiser.LiveVisualiser`) drains the stream from another thread
+and applies the events as deltas, instead of redrawing the whole tree.
+"""
+
+from collections import deque
+from itertools import count
+from typing import Iterator, NamedTuple
+
+
+class PlannerEvent(NamedTuple):
+    kind: str
+    """
+    One of `EventStream.NODE_ADDED`, `.REWIRED`, `.NODE_REMOVED` or `.PATH_IMPROVED`
+    """
+    node_id: int
+    """
+    A stable identifier of the node concerned (see `EventStream.node_id`)
+    """
+    position: tuple
+    parent_position: tuple | None
+    """
+    Position of the node's (new) parent, `None` for the root
+    """
+    cost: float
+    path: list[tuple] | None = None
+    """
+    The improved path, for `PATH_IMPROVED` events only
+    """
+
+
+class EventStream:
+    """
+    A bounded, thread-safe FIFO of `PlannerEvent`s.
+    When full, the oldest events are dropped, so a slow consumer never slows the planner down;
+    a consumer that sees `dropped` go up must resynchronise from the planner's tree.
+    """
+
+    NODE_ADDED = "node_added"
+    REWIRED = "rewired"
+    NODE_REMOVED = "node_removed"
+    PATH_IMPROVED = "path_improved"
+
+    dropped: int
+    """
+    Number of events discarded because the stream was full
+    """
+
+    def __init__(self, max_events: int = 100_000) -> None:
+        # `deque.append` and `deque.popleft` are atomic, no lock needed
+        self._events: deque[PlannerEvent] = deque(maxlen=max_events)
+        self.dropped = 0
+        self._ids = count()
+        return
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def node_id(self, node) -> int:
+        """
+        The identifier of `node` in this stream's events, assigned on first use and never reused
+        (unlike `id()`, which a node freed by pruning hands down to a later one)
+        """
+        node_id = getattr(node, "event_id", None)
+        if node_id is None:
+            node_id = node.event_id = next(self._ids)
+        return node_id
+
+    def emit(self, kind: str, node, path: list[tuple] | None = None) -> None:
+        """
+        Records an event about `node` (any planner's `Node`), at its current parent and cost
+        """
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+        parent = node.parent
+        self._events.append(
+            PlannerEvent(
+                kind,
+                self.node_id(node),
+                tuple(node.position),
+                None if parent is None else tuple(parent.position),
+                getattr(node, "cost", float("inf")),
+                path,
+            )
+        )
+        return
+
+    def drain(self, max_events: int | None = None) -> Iterator[PlannerEvent]:
+        """
+        Yields (and removes) the pending events, oldest first
+        """
+        n_events = len(self._events) if max_events is None else min(max_events, len(self._events))
+        for _ in range(n_events):
+            yield self._events.popleft()
@@ -0,0 +1,177 @@
+"""
+The sampling shared by `DT_RRT_Star` and `Lazy_DT_RRT_Star`: a guide path down the occupancy grid's
+distance-to-goal field (or from a plain `RRT`), shortcut, then sampled around with a Gaussian spread.
+"""
+
+import math
+
+import numpy as np
+import random
+from visualiser import Visualiser
+from rrt import RRT
+from debug import DebugHook
+from path_processing import smooth_path
+from events import EventStream
+from budget import Budget
+from occupancy import OccupancyGrid
+from planner_base import IndexedTreePlanner, Node
+
+
+class GuidedTreePlanner(IndexedTreePlanner):
+    def __init__(
+        self,
+        map_env: Visualiser,
+        step_size,
+        neighbor_radius,
+        events: EventStream | None = None,
+        budget: Budget | None = None,
+        occupancy: OccupancyGrid | None = None,
+        adaptive_sampling=True,
+        debug=False,
+        neighborhood="fixed",
+    ):
+        super().__init__(map_env, step_size, neighbor_radius, events, budget, neighborhood=neighborhood)
+
+        # The guide path (and the direction of the samples around it) follows the map's
+        # distance-to-goal field, see `_guide_path`
+        self.occupancy = occupancy  # Grid of the map (built by `find_path` if not given, share it between queries)
+        self.downhill: np.ndarray | None = None  # Per-cell direction towards the goal, from `occupancy`
+        self.debug_hook = DebugHook() if debug else None  # Pause/snapshot hook, see `debug.debug_planner`
+
+        self.sigma_r = 20  # Standard deviation for the radial distance
+        self.mu_r = 2  # Mean radial distance
+        self.sigma_theta = np.pi / 6  # Standard deviation for the angle in radians
+        self.mu_theta = np.pi / 2  # Mean angle (e.g., pointing upwards)
+
+        # With `adaptive_sampling`, samples are oriented along the local tangent of the guide path
+        # (rather than down the distance field), and `sigma_r` tracks how often they land in free space
+        self.adaptive_sampling = adaptive_sampling
+        self.target_acceptance = 0.9  # Fraction of samples in free space that `sigma_r` is steered towards
+        self.sigma_r_bounds = (step_size, self.sigma_r)  # Range `sigma_r` may adapt within (it only ever narrows)
+        self.samples_accepted = 0  # Samples whose new node passed `is_collision_free`
+        self.samples_rejected = 0  # Samples whose new node was in an obstacle
+
+    def sample_around(self, nodes):
+        new_nodes = []
+        index = random.randrange(len(nodes))
+        random_node = nodes[index]
+        mu_theta = self._sampling_direction(nodes, index)
+        for _ in range(1000):
+            r = np.random.normal(self.mu_r, self.sigma_r)
+            theta = np.random.normal(mu_theta, self.sigma_theta)
+
+            # Convert polar coordinates (r, theta) to Cartesian coordinates (dx, dy)
+            dx = r * np.cos(theta)
+            dy = r * np.sin(theta)
+
+            # Create a new position by adding the offset to the current position
+            new_position = (random_node[0] + dx, random_node[1] + dy)
+
+            # Create a new node with the new position and add it to the list
+            new_nodes.append(new_position)
+
+        return (random_node, new_nodes)
+
+    def random_gaussian_point(self, nodes):
+        index = random.randrange(len(nodes))
+        random_node = nodes[index]
+        r = np.random.normal(self.mu_r, self.sigma_r)
+        theta = np.random.normal(self._sampling_direction(nodes, index), self.sigma_theta)
+
+        # Convert polar coordinates (r, theta) to Cartesian coordinates (dx, dy)
+        dx = r * np.cos(theta)
+        dy = r * np.sin(theta)
+
+        # Create a new position by adding the offset to the current position
+        gaussian_point = (random_node[0] + dx, random_node[1] + dy)
+
+        return gaussian_point
+
+    def _shortcut_path(self, path: list[tuple]):
+        """
+        Shortcuts an existing path from the start point to the goal
+        (see `path_processing.smooth_path`), validating candidate shortcuts in batches.
+
+        N.B.:Additionally, it adds intermediate nodes to the path to aid in
+        Gaussian sampling later on.
+
+        Parameters:
+        -----------
+        path : list[tuple]
+            Path from the start to the goal, e.g. from `_guide_path`
+
+        Returns:
+        --------
+        (Node, list[tuple])
+            A tuple containing the goal node (parents set along the shortcut path)
+            and the optimised path from the start to the goal
+        """
+        shortcut_path = smooth_path(path, self.map_env.obstacle_set, self.step_size, densify_to_step=True)
+        return self._nodes_from_path(shortcut_path), shortcut_path
+
+    def _guide_path(self, budget: Budget):
+        """
+        A path from the start to the goal down the map's distance-to-goal field,
+        or through a plain RRT if the grid is too coarse to find one
+
+        Returns:
+        --------
+        list[tuple]
+            The path, empty if the RRT fallback ran out of `budget`
+        """
+        if self.occupancy is None:
+            self.occupancy = OccupancyGrid.from_map(self.map_env)
+        guide_path = self.occupancy.guide_path(self.map_env.start, self.map_env.goal)
+        if guide_path:
+            self.downhill = self.occupancy.downhill(self.map_env.goal)
+            print("INFO: found guide path on the occupancy grid")
+            return guide_path
+
+        # e.g. the passages are narrower than a cell
+        print("INFO: no guide path on the occupancy grid, falling back to RRT")
+        self.downhill = None
+        rrt = RRT(self.map_env, budget=budget)  # the guide path comes out of the same budget
+        last_node, _ = rrt.find_path()
+        if last_node is None:
+            return []
+        return rrt._trace_path(last_node) + [self.map_env.goal]
+
+    def _sampling_direction(self, path, index):
+        """
+        Mean angle of the samples around `path[index]`: along the path's local tangent with
+        `adaptive_sampling`, otherwise towards the goal along the distance field where known,
+        and `mu_theta` failing either
+        """
+        if self.adaptive_sampling:
+            previous, following = path[max(index - 1, 0)], path[min(index + 1, len(path) - 1)]
+            if previous != following:
+                return math.atan2(following[1] - previous[1], following[0] - previous[0])
+        elif self.downhill is not None:
+            cell = self.occupancy.cell(path[index])
+            if cell is not None and not np.isnan(self.downhill[cell]):
+                return self.downhill[cell]
+        return self.mu_theta
+
+    def _adapt_spread(self, accepted: bool):
+        """
+        Records whether a sample was accepted and, with `adaptive_sampling`, nudges `sigma_r`
+        (multiplicatively, Robbins-Monro style): narrower (e.g. in corridors) while samples land in obstacles
+        more often than `1 - target_acceptance`, back towards its initial value while they do not
+        """
+        if accepted:
+            self.samples_accepted += 1
+        else:
+            self.samples_rejected += 1
+        if self.adaptive_sampling:
+            low, high = self.sigma_r_bounds
+            self.sigma_r = min(max(self.sigma_r * math.exp(0.05 * (accepted - self.target_acceptance)), low), high)
+
+    def _nodes_from_path(self, path):
+        """
+        Chains `Node`s along `path` (with costs), returning the last one
+        """
+        node = None
+        for position in path:
+            parent, node = node, Node(position, node)
+            node.cost = 0 if parent is None else parent.cost + self.distance(parent.position, position)
+        return node
@@ -4,30 +4,31 @@ import shapes
 
 
 class Layout:
-    size: Tuple[int, int]
-    start: Tuple[int, int]
+    size: Tuple[float, float]
+    start: Tuple[float, float]
     # TODO: Change end to goal
-    end: Tuple[int, int]
+    end: Tuple[float, float]
     static_obstacles: list[StaticObstacle]
     dynamic_obstacles: list[DynamicObstacle]
 
     def __init__(
         self,
-        size: Tuple[int, int] = (500, 500),
-        start: Tuple[int, int] = (20, 20),
-        end: Tuple[int, int] = (480, 480),
+        size: Tuple[float, float] = (500, 500),
+        start: Tuple[float, float] = (20, 20),
+        end: Tuple[float, float] | None = None,
         static_obstacles: list[StaticObstacle] = [],
         dynamic_obstacles: list[DynamicObstacle] = [],
     ) -> None:
         # defaults
         self.size = size
         self.start = start
-        self.end = end
+        self.end = (size[0] - 20, size[1] - 20) if end is None else end
+        width, height = size
         self.static_obstacles = [
-            StaticObstacle((0, 0), shapes.Rectangle, (1, 500)),  # Map's Left border
-            StaticObstacle((0, 499), shapes.Rectangle, (500, 1)),  # Map's Top border
-            StaticObstacle((499, 0), shapes.Rectangle, (1, 500)),  # Map's Right border
-            StaticObstacle((0, 0), shapes.Rectangle, (500, 1)),  # Map's Bottom border
+            StaticObstacle((0, 0), shapes.Rectangle, (1, height)),  # Map's Left border
+            StaticObstacle((0, height - 1), shapes.Rectangle, (width, 1)),  # Map's Top border
+            StaticObstacle((width - 1, 0), shapes.Rectangle, (1, height)),  # Map's Right border
+            StaticObstacle((0, 0), shapes.Rectangle, (width, 1)),  # Map's Bottom border
             *static_obstacles,
         ]
         self.dynamic_obstacles = dynamic_obstacles
@@ -0,0 +1,383 @@
+"""
+Layouts stored on disk, so that adding a map does not mean editing `map_layouts.py`.
+
+Layouts are authored as JSON (or YAML, if PyYAML is installed):
+    {
+        "name": "maze",
+        "size": [500, 500],
+        "start": [250, 50],
+        "goal": [50, 450],
+        "rectangles": [[x, y, width, height], ...],
+        "circles": [[centre x, centre y, radius], ...],
+        "dynamic": [{"shape": "circle", "anchor": [x, y], "dimensions": [radius], "velocity": [vx, vy]}, ...]
+    }
+Every key but `size` is optional.
+
+Parsing a large map and building its acceleration structures (the obstacle set's tile index
+and an occupancy grid) takes seconds, so they are compiled once into a flat binary file,
+which can be memory-mapped back in milliseconds:
+    - header: `HEADER`, with the counts and shapes of the sections below
+    - rectangles: N x 4 `float64`, circles: M x 3 `float64`
+    - dynamic obstacles: K x 7 `float64`, `(shape, x, y, width or radius, height or 0, vx, vy)`,
+      `shape` being the index in `SHAPES`
+    - tile index (if any): `indptr` (T + 1 `int64`), `ids` (`int64`), see `ObstacleSet.tile_index`
+    - occupancy grid (if any): nx x ny `bool`
+All little-endian, with every section 8-byte aligned.
+`LayoutFile.load_or_compile` keeps that file next to the authored one, and recompiles it when the latter changes.
+
+USAGE:
+    `env = Visualiser(LayoutFile.load_or_compile("layouts/maze.json"))`
+    `python layout_file.py <layout file> ...` compiles layout files ahead of time
+"""
+
+import json
+from os import PathLike
+from pathlib import Path
+from sys import argv
+
+import numpy as np
+
+from layout import Layout
+from obstacle import DynamicObstacle, StaticObstacle
+from obstacle_set import ObstacleSet
+from occupancy import OccupancyGrid
+import shapes
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+MAGIC = b"RRT-MAPS"
+FORMAT_VERSION = 1
+HEADER = np.dtype(
+    [
+        ("magic", "S8"),
+        ("version", "<u4"),
+        ("padding", "<u4"),
+        ("name", "S32"),
+        ("size", "<f8", (2,)),
+        ("start", "<f8", (2,)),
+        ("goal", "<f8", (2,)),
+        ("source_mtime", "<i8"),  # modification time (ns) and size of the authored file, `-1` if none
+        ("source_size", "<i8"),
+        ("n_rectangles", "<u8"),
+        ("n_circles", "<u8"),
+        ("n_dynamic", "<u8"),
+        ("tile_origin", "<f8", (2,)),
+        ("tile_size", "<f8"),  # `0` if there is no tile index
+        ("tile_shape", "<i8", (2,)),
+        ("n_tile_ids", "<u8"),
+        ("grid_resolution", "<f8"),  # `0` if there is no occupancy grid
+        ("grid_shape", "<u8", (2,)),
+    ]
+)
+SHAPES = ("rectangle", "circle")
+COMPILED_SUFFIX = ".rrtmap"
+LAYOUT_DIR = Path(__file__).parent / "layouts"
+
+
+class LayoutFile:
+    """
+    A static layout as arrays, with its (optional) precompiled acceleration structures.
+    Planners take it through `Visualiser(layout_file)`, or `to_layout()` for the class-based `Layout`.
+    """
+
+    obstacle_set: ObstacleSet
+    """
+    The static obstacles, with their tile index if it was compiled
+    """
+    dynamic: np.ndarray
+    """
+    `(K, 7)` array of moving obstacles, `(shape, x, y, width or radius, height or 0, vx, vy)`
+    """
+    occupancy: OccupancyGrid | None
+    """
+    The occupancy grid of the static obstacles, if it was compiled (reused by `OccupancyGrid.from_map`)
+    """
+
+    def __init__(
+        self,
+        size,
+        start=(10, 10),
+        goal=None,
+        rectangles=None,
+        circles=None,
+        dynamic=None,
+        name: str = "",
+        tiles: tuple | None = None,
+        occupancy: OccupancyGrid | None = None,
+    ) -> None:
+        self.name = name
+        self.size = tuple(float(length) for length in size)
+        self.start = tuple(float(x) for x in start)
+        self.goal = (self.size[0] - 20, self.size[1] - 20) if goal is None else tuple(float(x) for x in goal)
+        self.obstacle_set = ObstacleSet(rectangles, circles, tiles)
+        self.dynamic = np.zeros((0, 7)) if dynamic is None else np.asarray(dynamic, dtype=float).reshape(-1, 7)
+        self.occupancy = occupancy
+        return
+
+    def __str__(self) -> str:
+        size = f"{self.size[0]:g}x{self.size[1]:g}"
+        return f"LayoutFile({self.name!r}, {size}, {self.obstacle_set}, {len(self.dynamic)} dynamic)"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    @classmethod
+    def from_layout(cls, layout: dict | Layout, name: str | None = None) -> "LayoutFile":
+        """
+        Converts a `layout_*()` dict or a `Layout`
+        """
+        if isinstance(layout, Layout):
+            dynamic = [
+                [SHAPES.index(type(obstacle.shape).__name__.lower()), *obstacle.anchor_point.components]
+                + [*obstacle.shape.get_attrs(), 0.0][:2]
+                + list(obstacle.velocity.components)
+                for obstacle in layout.dynamic_obstacles
+            ]
+            static_set = ObstacleSet.from_obstacles(layout.static_obstacles)
+            return cls(
+                layout.size,
+                layout.start,
+                layout.end,
+                static_set.rectangles,
+                static_set.circles,
+                dynamic,
+                name=name or type(layout).__name__,
+            )
+        return cls(
+            layout["size"],
+            layout.get("start", (10, 10)),
+            layout.get("goal"),
+            ObstacleSet.from_layout(layout).rectangles,
+            name=name or layout.get("name", ""),
+        )
+
+    def to_layout(self) -> Layout:
+        """
+        The same obstacles as a `Layout` of `Obstacle` objects (without the borders `Layout` adds), e.g. to animate
+        """
+        layout = Layout(self.size, self.start, self.goal)
+        layout.static_obstacles = [
+            StaticObstacle((x, y), shapes.Rectangle, (width, height))
+            for x, y, width, height in self.obstacle_set.rectangles.tolist()
+        ] + [StaticObstacle((x, y), shapes.Circle, (radius,)) for x, y, radius in self.obstacle_set.circles.tolist()]
+        layout.dynamic_obstacles = []
+        for shape, x, y, width, height, vx, vy in self.dynamic.tolist():
+            if SHAPES[int(shape)] == "circle":
+                layout.dynamic_obstacles.append(DynamicObstacle((x, y), (vx, vy), shapes.Circle, (width,)))
+            else:
+                layout.dynamic_obstacles.append(DynamicObstacle((x, y), (vx, vy), shapes.Rectangle, (width, height)))
+        return layout
+
+    def compile(self, grid_resolution: float | None = 5.0) -> "LayoutFile":
+        """
+        Builds the tile index and, unless `grid_resolution` is `None`, the occupancy grid, if they are missing
+        """
+        if len(self.obstacle_set):
+            self.obstacle_set.tile_index()
+        if grid_resolution is not None and self.occupancy is None:
+            self.occupancy = OccupancyGrid.from_obstacle_set(self.obstacle_set, self.size, grid_resolution)
+        return self
+
+    # authored files:
+    # ---------------
+    @classmethod
+    def read(cls, file: str | PathLike) -> "LayoutFile":
+        """
+        Parses an authored JSON or YAML layout (see the module docstring)
+        """
+        with open(file) as f:
+            data = _yaml().safe_load(f) if _is_yaml(file) else json.load(f)
+        dynamic = [
+            [SHAPES.index(obstacle["shape"]), *obstacle["anchor"], *obstacle["dimensions"]]
+            + [0.0] * (2 - len(obstacle["dimensions"]))
+            + list(obstacle["velocity"])
+            for obstacle in data.get("dynamic", [])
+        ]
+        return cls(
+            data["size"],
+            data.get("start", (10, 10)),
+            data.get("goal"),
+            data.get("rectangles"),
+            data.get("circles"),
+            dynamic,
+            name=data.get("name", Path(file).stem),
+        )
+
+    def write(self, file: str | PathLike) -> None:
+        """
+        Writes the layout as JSON or YAML (by `file`'s suffix), for editing
+        """
+        data = {
+            "name": self.name,
+            "size": list(self.size),
+            "start": list(self.start),
+            "goal": list(self.goal),
+            "rectangles": self.obstacle_set.rectangles.tolist(),
+            "circles": self.obstacle_set.circles.tolist(),
+            "dynamic": [
+                {
+                    "shape": SHAPES[int(shape)],
+                    "anchor": [x, y],
+                    "dimensions": [width] if SHAPES[int(shape)] == "circle" else [width, height],
+                    "velocity": [vx, vy],
+                }
+                for shape, x, y, width, height, vx, vy in self.dynamic.tolist()
+            ],
+        }
+        with open(file, "w") as f:
+            if _is_yaml(file):
+                _yaml().safe_dump(data, f, default_flow_style=None, sort_keys=False)
+            else:
+                # one obstacle per line, so that large layouts stay readable
+                f.write("{\n")
+                f.write(",\n".join(_json_item(key, value) for key, value in data.items()))
+                f.write("\n}\n")
+        return
+
+    # compiled files:
+    # ---------------
+    def save(self, file: str | PathLike, source: str | PathLike | None = None) -> None:
+        """
+        Writes the layout, its tile index and its occupancy grid (if it has one) in the compiled binary format
+        (see the module docstring), recording the modification time and size of `source`, the authored file
+        """
+        stat = Path(source).stat() if source is not None else None
+        header = np.zeros(1, dtype=HEADER)
+        header["magic"], header["version"] = MAGIC, FORMAT_VERSION
+        header["name"] = self.name.encode()[:32]
+        header["size"], header["start"], header["goal"] = self.size, self.start, self.goal
+        header["source_mtime"] = stat.st_mtime_ns if stat is not None else -1
+        header["source_size"] = stat.st_size if stat is not None else -1
+        header["n_rectangles"], header["n_circles"] = len(self.obstacle_set.rectangles), len(self.obstacle_set.circles)
+        header["n_dynamic"] = len(self.dynamic)
+        sections = [self.obstacle_set.rectangles, self.obstacle_set.circles, self.dynamic]
+        if len(self.obstacle_set):
+            origin, tile_size, shape, indptr, ids = self.obstacle_set.tile_index()
+            header["tile_origin"], header["tile_size"], header["tile_shape"] = origin, tile_size, shape
+            header["n_tile_ids"] = len(ids)
+            sections += [np.asarray(indptr, dtype="<i8"), np.asarray(ids, dtype="<i8")]
+        if self.occupancy is not None:
+            header["grid_resolution"], header["grid_shape"] = self.occupancy.resolution, self.occupancy.blocked.shape
+            sections.append(self.occupancy.blocked)
+
+        with open(file, "wb") as f:
+            f.write(header.tobytes())
+            for section in sections:
+                data = np.ascontiguousarray(section, dtype=section.dtype.newbyteorder("<")).tobytes()
+                f.write(data + bytes(-len(data) % 8))
+        return
+
+    @classmethod
+    def load(cls, file: str | PathLike, mmap: bool = True) -> "LayoutFile":
+        """
+        Reads a layout written by `save`
+
+        Parameters:
+        -----------
+        file : str | PathLike
+            Where the layout was saved
+        mmap : bool
+            If set, the arrays are read-only memory maps of the file (loading is O(1)),
+            otherwise they are read into memory
+
+        Returns:
+        --------
+        LayoutFile
+            The saved layout, with its acceleration structures
+        """
+        header = cls._read_header(file)
+        sections = [
+            ("<f8", (int(header["n_rectangles"]), 4)),
+            ("<f8", (int(header["n_circles"]), 3)),
+            ("<f8", (int(header["n_dynamic"]), 7)),
+        ]
+        tile_shape = tuple(int(n) for n in header["tile_shape"])
+        if header["tile_size"]:
+            sections += [("<i8", (tile_shape[0] * tile_shape[1] + 1,)), ("<i8", (int(header["n_tile_ids"]),))]
+        if header["grid_resolution"]:
+            sections.append(("|b1", tuple(int(n) for n in header["grid_shape"])))
+
+        offset = HEADER.itemsize
+        arrays = []
+        for dtype, shape in sections:
+            count = int(np.prod(shape))
+            if mmap and count:
+                arrays.append(np.memmap(file, dtype=dtype, mode="r", offset=offset, shape=shape))
+            else:
+                arrays.append(np.fromfile(file, dtype=dtype, count=count, offset=offset).reshape(shape))
+            offset += count * np.dtype(dtype).itemsize
+            offset += -offset % 8
+        rectangles, circles, dynamic = arrays[:3]
+        tiles = None
+        if header["tile_size"]:
+            tiles = (header["tile_origin"].copy(), float(header["tile_size"]), np.array(tile_shape), *arrays[3:5])
+        occupancy = OccupancyGrid(arrays[-1], float(header["grid_resolution"])) if header["grid_resolution"] else None
+        return cls(
+            header["size"],
+            header["start"],
+            header["goal"],
+            rectangles,
+            circles,
+            dynamic,
+            name=header["name"].decode(),
+            tiles=tiles,
+            occupancy=occupancy,
+        )
+
+    @classmethod
+    def load_or_compile(
+        cls, file: str | PathLike, grid_resolution: float | None = 5.0, mmap: bool = True
+    ) -> "LayoutFile":
+        """
+        Loads an authored layout through its compiled file (`<file>.rrtmap`), compiling it first if it is
+        missing or older than the authored file. A compiled file can also be loaded directly.
+        `grid_resolution` is that of the occupancy grid to precompile, `None` for none.
+        """
+        file = Path(file)
+        if file.suffix == COMPILED_SUFFIX:
+            return cls.load(file, mmap)
+        compiled = file.with_name(file.name + COMPILED_SUFFIX)
+        if compiled.exists():
+            header = cls._read_header(compiled)
+            stat = file.stat()
+            has_grid = bool(header["grid_resolution"]) or grid_resolution is None
+            if (header["source_mtime"], header["source_size"]) == (stat.st_mtime_ns, stat.st_size) and has_grid:
+                return cls.load(compiled, mmap)
+
+        layout_file = cls.read(file).compile(grid_resolution)
+        layout_file.save(compiled, source=file)
+        return layout_file
+
+    @staticmethod
+    def _read_header(file: str | PathLike) -> np.void:
+        header = np.fromfile(file, dtype=HEADER, count=1)
+        if len(header) != 1 or header["magic"][0] != MAGIC:
+            raise ValueError(f"Not a compiled layout: {file}")
+        if header["version"][0] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled layout version {header['version'][0]}: {file}")
+        return header[0]
+
+
+def _is_yaml(file: str | PathLike) -> bool:
+    return Path(file).suffix in (".yaml", ".yml")
+
+
+def _yaml():
+    if yaml is None:
+        raise ImportError("YAML layouts need PyYAML (`pip install pyyaml`), or use JSON")
+    return yaml
+
+
+def _json_item(key: str, value) -> str:
+    if isinstance(value, list) and value and isinstance(value[0], (list, dict)):
+        items = ",\n".join(f"    {json.dumps(item)}" for item in value)
+        return f'  "{key}": [\n{items}\n  ]'
+    return f'  "{key}": {json.dumps(value)}'
+
+
+if __name__ == "__main__":
+    for path in argv[1:]:
+        print(LayoutFile.load_or_compile(path))
@@ -1,21 +1,35 @@
-from visualiser import Visualiser
+from visualiser import Visualiser, LiveVisualiser
 from map_layouts import layout_simple_cross, layout_maze, layout_urban
 from rrt import RRT
 from rrt_star import RRT_Star
 from dt_rrt_star import DT_RRT_Star
 from q_rrt_star import Q_RRT_Star
 from lazy_dt_rrt_star import Lazy_DT_RRT_Star
+from dynamic_rrt_star import Dynamic_RRT_Star
+from roadmap import PRM
+from parallel_rrt import ParallelRRT
+from layout_file import LayoutFile, LAYOUT_DIR
+from budget import Budget
 
 if __name__ == "__main__":
     env = Visualiser(layout=layout_maze())
+    # env = Visualiser(layout=LayoutFile.load_or_compile(LAYOUT_DIR / "maze.json"))  # or any other layout file
     # env.preview_layout()
 
     # Choose the RRT Variant to use
     # variant = RRT(env)
     # variant = RRT_Star(env)
+    # variant = RRT_Star(env, neighborhood="k_nearest")  # or "shrinking", see `spatial_index`
+    # variant = RRT_Star(env, anytime=True, budget=Budget(max_wall_time=10))  # improves (and prunes) until then
     # variant = Q_RRT_Star(env)
     # variant = DT_RRT_Star(env)
     variant = Lazy_DT_RRT_Star(env)
+    # variant = Dynamic_RRT_Star(env)  # then call `variant.replan(agent_position, obstacles)` every control cycle
+    # variant = PRM(env)  # the layout's roadmap is cached on disk, `variant.find_path(start, goal)` per query
+    # variant = ParallelRRT(env)  # one tree, grown by a worker process per CPU
 
     final_node, path = variant.find_path()
     env.visualize_path(variant.nodes, path)
+
+    # Or, watch the planner grow its tree as it runs
+    # LiveVisualiser(variant)
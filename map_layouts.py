@@ -4,6 +4,7 @@
 from obstacle import DynamicObstacle, StaticObstacle
 from layout import Layout
 import shapes
+from procedural_layouts import urban_grid
 
 ## LAYOUTS
 
@@ -329,3 +330,26 @@ def layout_alley():
         ],
     }
     return layout
+
+
+# The Serpentine - a single corridor, 20 wide, winding back and forth through an otherwise solid map
+# Testing sampling when most of the map is blocked (about 80% of it)
+def layout_serpentine():
+    # the corridor's straights run along y = 40..60, 140..160, ..., 440..460, joined alternately at either end
+    obstacles = [((0, 0), (500, 40)), ((0, 460), (500, 40)), ((0, 40), (40, 420)), ((460, 40), (40, 420))]
+    for k in range(4):
+        obstacles.append(((40, 100 * k + 60), (400, 80)) if k % 2 == 0 else ((60, 100 * k + 60), (400, 80)))
+    layout = {
+        "size": (500, 500),
+        "start": (50, 50),
+        "goal": (450, 450),
+        "name": "serpentine",
+        "obstacles": obstacles,
+    }
+    return layout
+
+
+# The Urban - city blocks split into lots, with clutter in the streets (generated, see `procedural_layouts.py`)
+# Testing navigation through a grid of streets
+def layout_urban():
+    return urban_grid((500, 500), block_size=100, street_width=20, n_clutter=40, seed=0)
@@ -149,7 +149,7 @@ class DynamicObstacle(Obstacle):
         Updates the anchor_point of the obstacle by time `t`
         with its inherent velocity
         """
-        self.anchor_point += self.velocity.scale(t)
+        self.anchor_point.add_scaled(self.velocity, t)
 
     def ricochet(self, other_obstacle: Obstacle) -> None:
         """
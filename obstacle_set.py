@@ -0,0 +1,374 @@
+"""
+A compiled, array-backed set of obstacles shared by every collision check and visualiser.
+
+Bridges the two obstacle formats used in this project:
+    - the legacy `layout_*()` dicts, whose obstacles are `((x, y), (width, height))` tuples
+    - the class-based `Layout`, built from `StaticObstacle`s and `DynamicObstacle`s
+Either is flattened into contiguous NumPy arrays of rectangles and circles,
+so that collision checks are a handful of vectorised comparisons.
+The obstacles are also bucketed by tile, so that on large maps (thousands of obstacles)
+a point is only compared against the few obstacles around it.
+"""
+
+from hashlib import sha256
+from typing import Iterable
+
+import numpy as np
+
+from layout import Layout
+from obstacle import Obstacle
+from shapes import Circle, Rectangle
+
+
+class ObstacleSet:
+    INDEX_THRESHOLD = 64
+    """
+    Above this many obstacles, batches of points go through the tile index rather than being compared against
+    every obstacle (single points always go through it, as it saves NumPy's per-call overhead too)
+    """
+
+    rectangles: np.ndarray
+    """
+    `(N, 4)` array of `(x, y, width, height)`, anchored at the bottom-left corner
+    """
+    circles: np.ndarray
+    """
+    `(M, 3)` array of `(centre x, centre y, radius)`
+    """
+
+    def __init__(self, rectangles=None, circles=None, tiles: tuple | None = None) -> None:
+        """
+        `tiles` is a `tile_index()` already built for the same obstacles (e.g. loaded from a layout file),
+        so that it is not rebuilt
+        """
+        self.rectangles = np.zeros((0, 4)) if rectangles is None else np.asarray(rectangles, dtype=float).reshape(-1, 4)
+        self.circles = np.zeros((0, 3)) if circles is None else np.asarray(circles, dtype=float).reshape(-1, 3)
+        self._update_bounds()
+        self._tiles = tiles
+        return
+
+    def __len__(self) -> int:
+        return len(self.rectangles) + len(self.circles)
+
+    def __str__(self) -> str:
+        return f"ObstacleSet({len(self.rectangles)} rectangles, {len(self.circles)} circles)"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    @classmethod
+    def from_tuples(cls, obstacles: Iterable) -> "ObstacleSet":
+        """
+        Compiles legacy `((x, y), (width, height))` rectangle tuples
+        """
+        return cls(rectangles=[(*anchor_point, *size) for anchor_point, size in obstacles])
+
+    @classmethod
+    def from_obstacles(cls, obstacles: Iterable[Obstacle]) -> "ObstacleSet":
+        """
+        Compiles `Obstacle` objects (static or dynamic), at their current positions
+        """
+        rectangles, circles = cls._split_obstacles(obstacles)
+        return cls(rectangles, circles)
+
+    @classmethod
+    def from_layout(cls, layout: dict | Layout) -> "ObstacleSet":
+        """
+        Compiles the obstacles of either a `layout_*()` dict or a `Layout`
+        """
+        if isinstance(layout, Layout):
+            return cls.from_obstacles(layout.static_obstacles + layout.dynamic_obstacles)
+        return cls.from_tuples(layout.get("obstacles", []))
+
+    def refresh(self, obstacles: Iterable[Obstacle]) -> None:
+        """
+        Overwrites the arrays in place with the current positions of `obstacles`,
+        which must be the same obstacles (in the same order) this set was compiled from
+        """
+        rectangles, circles = self._split_obstacles(obstacles)
+        self.rectangles[:] = np.asarray(rectangles, dtype=float).reshape(-1, 4)
+        self.circles[:] = np.asarray(circles, dtype=float).reshape(-1, 3)
+        self._update_bounds()
+        return
+
+    def fingerprint(self) -> str:
+        """
+        A hash of the obstacles' geometry, stable across runs, to key caches of derived structures
+        """
+        digest = sha256()
+        for array in (self.rectangles, self.circles):
+            digest.update(str(array.shape).encode())
+            digest.update(np.ascontiguousarray(array, dtype="<f8").tobytes())
+        return digest.hexdigest()[:16]
+
+    def as_tuples(self) -> list[tuple]:
+        """
+        The rectangles in the legacy `((x, y), (width, height))` format
+        """
+        return [((x, y), (width, height)) for x, y, width, height in self.rectangles.tolist()]
+
+    def contains_point(self, point) -> bool:
+        """
+        Whether `point` lies inside (or on the edge of) any obstacle
+        """
+        if not len(self):
+            return False
+        return self._contains_point_indexed(float(point[0]), float(point[1]))
+
+    def contains_points(self, points) -> np.ndarray:
+        """
+        Vectorised `contains_point` over a `(K, 2)` array of points
+
+        Returns:
+        --------
+        np.ndarray
+            `(K,)` boolean array, `True` where the point is inside an obstacle
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if len(self) > self.INDEX_THRESHOLD:
+            return self._contains_points_indexed(points)
+        x, y = points[:, 0:1], points[:, 1:2]
+        bounds = self._bounds
+        inside = np.any((bounds[:, 0] <= x) & (x <= bounds[:, 2]) & (bounds[:, 1] <= y) & (y <= bounds[:, 3]), axis=1)
+        if len(self.circles):
+            circles = self.circles
+            inside |= np.any((circles[:, 0] - x) ** 2 + (circles[:, 1] - y) ** 2 <= circles[:, 2] ** 2, axis=1)
+        return inside
+
+    def is_segment_free(self, start_pos, end_pos, step_size: float | None = None) -> bool:
+        """
+        Whether the straight segment between two points stays clear of every obstacle:
+        exactly by default, or at points at most `step_size` apart (the start point itself is not tested)
+        """
+        if step_size is None:
+            return bool(self.are_segments_free([start_pos], [end_pos])[0])
+        length = np.hypot(end_pos[0] - start_pos[0], end_pos[1] - start_pos[1])
+        steps = int(length / step_size) + 1
+        fractions = np.arange(1, steps + 1)[:, None] / steps
+        start = np.asarray(start_pos, dtype=float)
+        points = start + fractions * (np.asarray(end_pos, dtype=float) - start)
+        return not self.contains_points(points).any()
+
+    def are_segments_free(
+        self, starts, ends, step_size: float | None = None, max_batch_points: int = 1 << 16
+    ) -> np.ndarray:
+        """
+        Vectorised `is_segment_free` over a batch of segments
+
+        Parameters:
+        -----------
+        starts, ends : array-like
+            `(K, 2)` arrays of segment end points
+        step_size : float | None
+            Maximum spacing between the tested points of a segment, `None` to test the segments exactly
+            (against each obstacle's edges, so that no corner can be clipped between two tested points)
+        max_batch_points : int
+            Upper bound on the number of points (or segment/obstacle pairs) tested at once, to keep memory bounded
+
+        Returns:
+        --------
+        np.ndarray
+            `(K,)` boolean array, `True` where the segment is collision-free
+        """
+        starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+        if step_size is None:
+            return self._are_segments_free_exact(starts, ends, max_batch_points)
+        steps = (np.hypot(*(ends - starts).T) / step_size).astype(int) + 1
+        free = np.empty(len(starts), dtype=bool)
+
+        # segments are sorted by length, so each chunk pads to a similar number of steps
+        order = np.argsort(steps)
+        sorted_steps = steps[order]
+        first = 0
+        while first < len(order):
+            # a chunk holds as many segments as fit in `max_batch_points`, padded to its longest
+            fits = np.arange(1, len(order) - first + 1) * sorted_steps[first:] <= max_batch_points
+            last = first + max(1, int(fits.argmin()) if not fits.all() else len(fits))
+            chunk = order[first:last]
+            chunk_steps = steps[chunk][:, None]
+            # shorter segments repeat their end point to pad up to the longest one in the chunk
+            fractions = np.minimum(np.arange(1, chunk_steps.max() + 1), chunk_steps) / chunk_steps
+            points = starts[chunk, None, :] + fractions[:, :, None] * (ends[chunk] - starts[chunk])[:, None, :]
+            free[chunk] = ~self.contains_points(points.reshape(-1, 2)).reshape(len(chunk), -1).any(axis=1)
+            first = last
+        return free
+
+    # helpers:
+    # --------
+    def _update_bounds(self) -> None:
+        # `(x_min, y_min, x_max, y_max)` of each rectangle
+        self._bounds = np.concatenate([self.rectangles[:, :2], self.rectangles[:, :2] + self.rectangles[:, 2:]], axis=1)
+        self._tiles = None  # the tile index, rebuilt on demand after every change
+        self._tile_lists = None  # the same, as lists, for single points
+        return
+
+    def tile_index(self) -> tuple:
+        """
+        Buckets the obstacles by the square tiles their bounding boxes overlap:
+        `(origin, tile_size, shape, indptr, ids)`, where the obstacles overlapping tile `(i, j)`
+        are `ids[indptr[t]:indptr[t + 1]]` with `t = i * shape[1] + j`
+        (rectangles by their index, circles by theirs plus the number of rectangles)
+        """
+        if self._tiles is None:
+            circles = self.circles
+            boxes = np.concatenate(
+                [
+                    self._bounds,
+                    np.concatenate([circles[:, :2] - circles[:, 2:], circles[:, :2] + circles[:, 2:]], axis=1),
+                ]
+            )
+            origin = boxes[:, :2].min(axis=0)
+            extent = boxes[:, 2:].max(axis=0) - origin
+            # about one obstacle per tile, but no smaller than a typical obstacle, so that each overlaps few tiles
+            n = len(boxes)
+            tile_size = max(
+                np.sqrt(np.prod(extent) / n), extent.max() / np.sqrt(n), np.median(boxes[:, 2:] - boxes[:, :2])
+            )
+            tile_size = max(tile_size, 1e-9)
+            shape = (extent // tile_size).astype(np.int64) + 1
+            low = ((boxes[:, :2] - origin) // tile_size).astype(np.int64)
+            spans = ((boxes[:, 2:] - origin) // tile_size).astype(np.int64) - low + 1
+            counts = spans[:, 0] * spans[:, 1]
+            ids = np.repeat(np.arange(n), counts)
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            tiles = (low[ids, 0] + offsets // spans[ids, 1]) * shape[1] + low[ids, 1] + offsets % spans[ids, 1]
+            order = np.argsort(tiles, kind="stable")
+            indptr = np.searchsorted(tiles[order], np.arange(shape[0] * shape[1] + 1))
+            self._tiles = (origin, float(tile_size), shape, indptr, ids[order])
+        return self._tiles
+
+    def _contains_point_indexed(self, x, y) -> bool:
+        origin, tile_size, shape, indptr, ids = self.tile_index()
+        if self._tile_lists is None:
+            # single points are tested in plain Python, against the few obstacles of their tile
+            self._tile_lists = (
+                origin.tolist(),
+                shape.tolist(),
+                indptr.tolist(),
+                ids.tolist(),
+                self._bounds.tolist() + self.circles.tolist(),
+            )
+        (x0, y0), (nx, ny), indptr, ids, shapes = self._tile_lists
+        i, j = int((x - x0) // tile_size), int((y - y0) // tile_size)
+        if not (0 <= i < nx and 0 <= j < ny):
+            return False
+        tile = i * ny + j
+        n_rectangles = len(self.rectangles)
+        for k in ids[indptr[tile] : indptr[tile + 1]]:
+            if k < n_rectangles:
+                x_min, y_min, x_max, y_max = shapes[k]
+                if x_min <= x <= x_max and y_min <= y <= y_max:
+                    return True
+            else:
+                cx, cy, radius = shapes[k]
+                if (cx - x) ** 2 + (cy - y) ** 2 <= radius**2:
+                    return True
+        return False
+
+    def _contains_points_indexed(self, points: np.ndarray) -> np.ndarray:
+        # one (point, obstacle) pair per obstacle in each point's tile
+        origin, tile_size, shape, indptr, ids = self.tile_index()
+        cells = ((points - origin) // tile_size).astype(np.int64)
+        indices = np.flatnonzero(np.all((cells >= 0) & (cells < shape), axis=1))
+        tiles = cells[indices, 0] * shape[1] + cells[indices, 1]
+        counts = indptr[tiles + 1] - indptr[tiles]
+        pairs = np.repeat(indices, counts)
+        obstacles = ids[np.repeat(indptr[tiles] - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())]
+        x, y = points[pairs, 0], points[pairs, 1]
+
+        n_rectangles = len(self.rectangles)
+        hits = np.empty(len(pairs), dtype=bool)
+        rectangle = obstacles < n_rectangles
+        bounds = self._bounds[obstacles[rectangle]]
+        xr, yr = x[rectangle], y[rectangle]
+        hits[rectangle] = (bounds[:, 0] <= xr) & (xr <= bounds[:, 2]) & (bounds[:, 1] <= yr) & (yr <= bounds[:, 3])
+        circles = self.circles[obstacles[~rectangle] - n_rectangles]
+        xc, yc = x[~rectangle], y[~rectangle]
+        hits[~rectangle] = (circles[:, 0] - xc) ** 2 + (circles[:, 1] - yc) ** 2 <= circles[:, 2] ** 2
+
+        inside = np.zeros(len(points), dtype=bool)
+        inside[pairs[hits]] = True
+        return inside
+
+    def _are_segments_free_exact(self, starts: np.ndarray, ends: np.ndarray, max_pairs: int) -> np.ndarray:
+        # one (segment, obstacle) pair per obstacle the segment may hit: every obstacle on small sets,
+        # those of the tiles its bounding box overlaps on large ones
+        free = np.ones(len(starts), dtype=bool)
+        if not len(self) or not len(starts):
+            return free
+        n_obstacles = len(self)
+        chunk_size = max(1, max_pairs // n_obstacles) if n_obstacles <= self.INDEX_THRESHOLD else 1024
+        for first in range(0, len(starts), chunk_size):
+            chunk = np.arange(first, min(first + chunk_size, len(starts)))
+            if n_obstacles <= self.INDEX_THRESHOLD:
+                segments, obstacles = np.repeat(chunk, n_obstacles), np.tile(np.arange(n_obstacles), len(chunk))
+            else:
+                segments, obstacles = self._segment_pairs_indexed(starts, ends, chunk)
+            hits = self._segments_hit(starts[segments], ends[segments], obstacles)
+            free[segments[hits]] = False
+        return free
+
+    def _segment_pairs_indexed(self, starts: np.ndarray, ends: np.ndarray, chunk: np.ndarray) -> tuple:
+        # the segments of `chunk`, paired with the obstacles of every tile their bounding boxes overlap
+        origin, tile_size, shape, indptr, ids = self.tile_index()
+        low = ((np.minimum(starts[chunk], ends[chunk]) - origin) // tile_size).astype(np.int64)
+        high = ((np.maximum(starts[chunk], ends[chunk]) - origin) // tile_size).astype(np.int64)
+        overlaps = np.all((high >= 0) & (low < shape), axis=1)
+        low, high = np.maximum(low, 0), np.minimum(high, shape - 1)
+        spans = high - low + 1
+        counts = np.where(overlaps, spans[:, 0] * spans[:, 1], 0)
+        tile_segments = np.repeat(np.arange(len(chunk)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        rows, columns = offsets // spans[tile_segments, 1], offsets % spans[tile_segments, 1]
+        tiles = (low[tile_segments, 0] + rows) * shape[1] + low[tile_segments, 1] + columns
+        tile_counts = indptr[tiles + 1] - indptr[tiles]
+        segments = chunk[np.repeat(tile_segments, tile_counts)]
+        first_ids = np.repeat(indptr[tiles] - (np.cumsum(tile_counts) - tile_counts), tile_counts)
+        obstacles = ids[first_ids + np.arange(tile_counts.sum())]
+        return segments, obstacles
+
+    def _segments_hit(self, starts: np.ndarray, ends: np.ndarray, obstacles: np.ndarray) -> np.ndarray:
+        # whether each segment `starts[k]`-`ends[k]` touches obstacle `obstacles[k]`
+        hits = np.empty(len(obstacles), dtype=bool)
+        directions = ends - starts
+        n_rectangles = len(self.rectangles)
+
+        # rectangles: the segment's parameter range within both slabs (Liang-Barsky) is not empty
+        rectangle = obstacles < n_rectangles
+        bounds = self._bounds[obstacles[rectangle]]
+        start, direction = starts[rectangle], directions[rectangle]
+        t_low, t_high = np.zeros(len(bounds)), np.ones(len(bounds))
+        for axis in (0, 1):
+            p, d = start[:, axis], direction[:, axis]
+            low, high = bounds[:, axis], bounds[:, axis + 2]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t_a, t_b = (low - p) / d, (high - p) / d
+            # a segment parallel to the slab is either within it throughout or never
+            within = np.where((low <= p) & (p <= high), 0.0, np.inf)
+            t_low = np.maximum(t_low, np.where(d == 0, within, np.minimum(t_a, t_b)))
+            t_high = np.minimum(t_high, np.where(d == 0, 1.0, np.maximum(t_a, t_b)))
+        hits[rectangle] = t_low <= t_high
+
+        # circles: the segment's closest point to the centre is within the radius
+        circles = self.circles[obstacles[~rectangle] - n_rectangles]
+        start, direction = starts[~rectangle], directions[~rectangle]
+        squared_length = np.einsum("ij,ij->i", direction, direction)
+        along = np.einsum("ij,ij->i", circles[:, :2] - start, direction)
+        t = np.clip(np.divide(along, squared_length, out=np.zeros_like(along), where=squared_length > 0), 0, 1)
+        offsets = start + t[:, None] * direction - circles[:, :2]
+        hits[~rectangle] = np.einsum("ij,ij->i", offsets, offsets) <= circles[:, 2] ** 2
+        return hits
+
+    @staticmethod
+    def _split_obstacles(obstacles: Iterable[Obstacle]) -> tuple[list, list]:
+        rectangles, circles = [], []
+        for obstacle in obstacles:
+            x, y = obstacle.anchor_point.components[:2]
+            if isinstance(obstacle.shape, Rectangle):
+                rectangles.append((x, y, obstacle.shape.width, obstacle.shape.height))
+            elif isinstance(obstacle.shape, Circle):
+                circles.append((x, y, obstacle.shape.radius))
+            else:
+                raise ValueError(f"Unsupported obstacle shape: {obstacle.shape.__class__.__name__}")
+        return rectangles, circles
@@ -0,0 +1,352 @@
+"""
+A coarse occupancy grid of a map, for answering questions about the whole free space at once:
+is the goal reachable at all, and how far is every cell from it.
+
+The obstacles are rasterised at `resolution` (a cell is blocked if its centre lies within
+`clearance` of an obstacle), so the answers are only as good as the grid: passages narrower
+than a cell may be closed off. The grid is meant for quick heuristics (e.g. the guide paths of
+the DT-RRT* variants), not as a planner. `precheck` is the exception: it only rejects a query
+when the grid proves that there is no path (see there), so it never turns away a solvable one.
+Cells are indexed `[i, j]`, `i` along x and `j` along y, like the positions they cover.
+
+Memory is bounded on large maps: a grid never has more than `MAX_CELLS` cells (coarser cells are used
+if the requested resolution would exceed it), and its per-cell arrays use 1- or 4-byte types.
+"""
+
+import numpy as np
+
+from obstacle_set import ObstacleSet
+
+NEIGHBOURS_4 = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)])
+NEIGHBOURS_8 = np.concatenate([NEIGHBOURS_4, [(1, 1), (1, -1), (-1, 1), (-1, -1)]])
+MAX_CELLS = 4_000_000
+"""
+Most cells in a grid, e.g. a 10000 x 10000 map at a resolution of 5
+"""
+
+
+def capped_resolution(size, resolution: float) -> float:
+    """
+    `resolution`, or the finest coarser one that keeps a grid over a map of `size` within `MAX_CELLS` cells
+    """
+    if size[0] * size[1] / resolution**2 > MAX_CELLS:
+        return float(np.sqrt(size[0] * size[1] / MAX_CELLS))
+    return resolution
+
+
+class OccupancyGrid:
+    blocked: np.ndarray
+    """
+    `(nx, ny)` boolean array, `True` where the cell's centre is within `clearance` of an obstacle
+    """
+
+    def __init__(self, blocked: np.ndarray, resolution: float, clearance: float = 0.0) -> None:
+        self.blocked = np.asarray(blocked, dtype=bool)
+        self.resolution = resolution
+        self.clearance = clearance  # How far the obstacles were inflated by
+        self._labels: np.ndarray | None = None  # connected components of the free cells, computed on demand
+        self._open_labels: np.ndarray | None = None  # those of the cells not inside an obstacle, for `precheck`
+        self._fields: dict[tuple, np.ndarray] = {}  # distance fields, by goal cell
+        self._downhill: dict[tuple, np.ndarray] = {}  # directions of steepest descent, by goal cell
+        self._free_cells: np.ndarray | None = None  # cells worth sampling in, computed on demand
+        return
+
+    def __str__(self) -> str:
+        nx, ny = self.blocked.shape
+        return f"OccupancyGrid({nx}x{ny} cells of {self.resolution}, {self.blocked.mean():.0%} blocked)"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    @classmethod
+    def from_obstacle_set(
+        cls, obstacle_set: ObstacleSet, size, resolution: float = 5.0, clearance: float = 0.0
+    ) -> "OccupancyGrid":
+        """
+        Rasterises `obstacle_set` over a map of `size`, with obstacles inflated by `clearance`,
+        at `resolution` or, if that would make more than `MAX_CELLS` cells, the finest resolution that does not
+        """
+        coarser = capped_resolution(size, resolution)
+        if coarser != resolution:
+            print(f"INFO: occupancy grid coarsened from a resolution of {resolution} to {coarser:.3g}")
+            resolution = coarser
+        nx, ny = int(np.ceil(size[0] / resolution)), int(np.ceil(size[1] / resolution))
+        xs = (np.arange(nx) + 0.5) * resolution
+        ys = (np.arange(ny) + 0.5) * resolution
+        blocked = np.zeros((nx, ny), dtype=bool)
+
+        # each obstacle only touches the cells of its (inflated) bounding box
+        def cells(low, high, centres):
+            return slice(np.searchsorted(centres, low - clearance), np.searchsorted(centres, high + clearance, "right"))
+
+        for x, y, width, height in obstacle_set.rectangles.tolist():
+            i, j = cells(x, x + width, xs), cells(y, y + height, ys)
+            dx = np.maximum(np.maximum(x - xs[i], xs[i] - (x + width)), 0)[:, None]
+            dy = np.maximum(np.maximum(y - ys[j], ys[j] - (y + height)), 0)[None, :]
+            blocked[i, j] |= dx**2 + dy**2 <= clearance**2
+        for x, y, radius in obstacle_set.circles.tolist():
+            i, j = cells(x - radius, x + radius, xs), cells(y - radius, y + radius, ys)
+            blocked[i, j] |= (xs[i, None] - x) ** 2 + (ys[None, j] - y) ** 2 <= (radius + clearance) ** 2
+        return cls(blocked, resolution, clearance)
+
+    @classmethod
+    def from_map(cls, map_env, resolution: float = 5.0, clearance: float = 0.0) -> "OccupancyGrid":
+        """
+        Rasterises the obstacles of a `Visualiser`, or returns the grid precompiled with its layout file
+        (see `layout_file.py`) if that has the same resolution and no clearance
+        """
+        grid = getattr(map_env, "occupancy", None)
+        if grid is not None and clearance == 0 and grid.resolution == capped_resolution(map_env.size, resolution):
+            return grid
+        return cls.from_obstacle_set(map_env.obstacle_set, map_env.size, resolution, clearance)
+
+    def cell(self, point) -> tuple[int, int] | None:
+        """
+        The cell containing `point`, `None` if it is outside the map
+        """
+        i, j = int(point[0] // self.resolution), int(point[1] // self.resolution)
+        nx, ny = self.blocked.shape
+        if not (0 <= i < nx and 0 <= j < ny):
+            return None
+        return i, j
+
+    def precheck(self, start, goal, obstacle_set: ObstacleSet | None = None) -> str | None:
+        """
+        Checks whether a path from `start` to `goal` can exist at all. Conservative: a query is only
+        rejected if it certainly has no solution, never because of the grid's coarseness.
+
+        The start and goal are checked against the exact obstacles (inflated by `clearance`). Connectivity
+        is checked on the cells that are not entirely inside an (inflated) obstacle: any free path only
+        crosses such cells, from one to an adjacent one (8-connected), so if the start's and the goal's
+        are not connected through them, neither are the start and goal. Unlike `labels`, a blocked
+        cell (whose centre is in an obstacle) still counts, its edges may be free.
+
+        Parameters:
+        -----------
+        start, goal : tuple
+            The query
+        obstacle_set : ObstacleSet | None
+            The obstacles the grid was built from, without which only the map's bounds can be checked
+
+        Returns:
+        --------
+        str | None
+            Why there is no path, or `None` if there may be one
+        """
+        cells = {}
+        for name, point in (("start", start), ("goal", goal)):
+            cells[name] = self.cell(point)
+            if cells[name] is None:
+                return f"{name} is outside the map"
+            if obstacle_set is not None and obstacle_set.contains_point(point):
+                return f"{name} is inside an obstacle"
+            if obstacle_set is not None and self.clearance > 0 and _within(obstacle_set, point, self.clearance):
+                return f"{name} is too close to an obstacle"
+        if obstacle_set is None:
+            return None
+
+        labels = self.open_labels(obstacle_set)
+        if labels[cells["start"]] != labels[cells["goal"]]:
+            return "start and goal are not connected"
+        return None
+
+    def open_labels(self, obstacle_set: ObstacleSet) -> np.ndarray:
+        """
+        `(nx, ny)` int array labelling the 8-connected components of the cells that are not entirely inside
+        one of the obstacles of `obstacle_set` (inflated by `clearance`), `0` for those that are.
+        Computed once, for `precheck`
+        """
+        if self._open_labels is None:
+            self._open_labels = _label_components(~self._inside(obstacle_set), diagonal=True)
+        return self._open_labels
+
+    def _inside(self, obstacle_set: ObstacleSet) -> np.ndarray:
+        # the cells entirely inside one of the inflated obstacles: those whose four corners are, as the
+        # inflated shapes are convex
+        nx, ny = self.blocked.shape
+        resolution, clearance = self.resolution, self.clearance
+        xs, ys = np.arange(nx + 1) * resolution, np.arange(ny + 1) * resolution  # cell corners
+        corners = np.zeros((nx + 1, ny + 1), dtype=bool)  # corners inside the obstacle at hand
+        inside = np.zeros((nx, ny), dtype=bool)
+
+        def cells(low, high, edges):
+            return slice(np.searchsorted(edges, low - clearance), np.searchsorted(edges, high + clearance, "right"))
+
+        def mark(i, j, corners_in):
+            # cells of the corners `[i, j]` (a window of `corners`) all four of whose corners are in the obstacle
+            corners[i, j] = corners_in
+            all_in = corners[i, j][:-1, :-1] & corners[i, j][1:, :-1] & corners[i, j][:-1, 1:] & corners[i, j][1:, 1:]
+            inside[i.start : i.stop - 1, j.start : j.stop - 1] |= all_in
+            corners[i, j] = False
+
+        for x, y, width, height in obstacle_set.rectangles.tolist():
+            i, j = cells(x, x + width, xs), cells(y, y + height, ys)
+            dx = np.maximum(np.maximum(x - xs[i], xs[i] - (x + width)), 0)[:, None]
+            dy = np.maximum(np.maximum(y - ys[j], ys[j] - (y + height)), 0)[None, :]
+            mark(i, j, dx**2 + dy**2 <= clearance**2)
+        for x, y, radius in obstacle_set.circles.tolist():
+            i, j = cells(x - radius, x + radius, xs), cells(y - radius, y + radius, ys)
+            mark(i, j, (xs[i, None] - x) ** 2 + (ys[None, j] - y) ** 2 <= (radius + clearance) ** 2)
+        return inside
+
+    def labels(self) -> np.ndarray:
+        """
+        `(nx, ny)` int array labelling the 4-connected components of the free cells (from 1, in the order of
+        their first cell), `0` for blocked cells
+        """
+        if self._labels is None:
+            self._labels = _label_components(~self.blocked)
+        return self._labels
+
+    def free_cells(self, obstacle_set: ObstacleSet) -> np.ndarray:
+        """
+        `(K, 2)` int array of the cells that may contain free space: those not entirely inside one of the
+        obstacles of `obstacle_set` (as for `precheck`), so also the blocked cells of passages narrower
+        than a cell, whose centres are all in obstacles. Computed once, for `samplers.FreeSpaceSampler`
+        """
+        if self._free_cells is None:
+            self._free_cells = np.argwhere(self.open_labels(obstacle_set) > 0).astype(np.int32)
+        return self._free_cells
+
+    def distance_field(self, goal) -> np.ndarray:
+        """
+        Distance from every cell to the cell of `goal`, through free cells (4-connected),
+        in map units; `inf` where the goal cannot be reached. Cached by goal cell.
+        """
+        goal_cell = self.cell(goal)
+        if goal_cell is None:
+            raise ValueError(f"Goal {goal} is outside the map")
+        if goal_cell not in self._fields:
+            steps = self.wavefront(goal_cell)
+            field = steps.astype(np.float32) * np.float32(self.resolution)
+            field[steps < 0] = np.inf
+            self._fields[goal_cell] = field
+        return self._fields[goal_cell]
+
+    def downhill(self, goal) -> np.ndarray:
+        """
+        Direction (angle in radians) of steepest descent of `distance_field(goal)` from every cell,
+        towards its lowest of 8 neighbours; `nan` at the goal and where the goal cannot be reached.
+        Cached by goal cell.
+        """
+        goal_cell = self.cell(goal)
+        if goal_cell not in self._downhill:
+            field = self.distance_field(goal)
+            nx, ny = field.shape
+            padded = np.pad(field, 1, constant_values=np.inf)
+            # the steepest slope so far and its neighbour, one neighbour at a time to keep memory down
+            steepest_slope = np.full(field.shape, np.inf, dtype=np.float32)
+            steepest = np.zeros(field.shape, dtype=np.int8)
+            with np.errstate(invalid="ignore"):
+                for k, (di, dj) in enumerate(NEIGHBOURS_8):
+                    slope = (padded[1 + di : 1 + di + nx, 1 + dj : 1 + dj + ny] - field) / np.float32(np.hypot(di, dj))
+                    steeper = slope < steepest_slope  # `nan` (from `inf - inf`) never is
+                    steepest_slope[steeper] = slope[steeper]
+                    steepest[steeper] = k
+            descends = (steepest_slope < 0) & np.isfinite(field)
+            angles = np.arctan2(NEIGHBOURS_8[:, 1], NEIGHBOURS_8[:, 0]).astype(np.float32)[steepest]
+            self._downhill[goal_cell] = np.where(descends, angles, np.float32(np.nan))
+        return self._downhill[goal_cell]
+
+    def guide_path(self, start, goal) -> list[tuple]:
+        """
+        A path from `start` to `goal` through the centres of free cells, following
+        `distance_field(goal)` downhill (4-connected, so it never cuts an obstacle's corner)
+
+        Returns:
+        --------
+        list[tuple]
+            The path, empty if the goal cannot be reached from `start` on the grid
+        """
+        field = self.distance_field(goal)
+        cell = self.cell(start)
+        if cell is None or not np.isfinite(field[cell]):
+            return []
+
+        nx, ny = field.shape
+        path = [tuple(start)]
+        while field[cell] > 0:
+            i, j = cell
+            cell = min(
+                ((i + di, j + dj) for di, dj in NEIGHBOURS_4.tolist() if 0 <= i + di < nx and 0 <= j + dj < ny),
+                key=lambda neighbour: field[neighbour],
+            )
+            path.append(((cell[0] + 0.5) * self.resolution, (cell[1] + 0.5) * self.resolution))
+        path.append(tuple(goal))
+        return path
+
+    def wavefront(self, source: tuple[int, int]) -> np.ndarray:
+        """
+        Breadth-first wavefront from the `source` cell over the free cells (4-connected),
+        one vectorised step per ring
+
+        Returns:
+        --------
+        np.ndarray
+            `(nx, ny)` int array of steps from `source`, `-1` where it cannot be reached
+        """
+        nx, ny = self.blocked.shape
+        free = ~self.blocked.ravel()
+        steps = np.full(nx * ny, -1, dtype=np.int32)
+        frontier = np.array([source[0] * ny + source[1]])
+        if not free[frontier[0]]:
+            return steps.reshape(nx, ny)
+
+        steps[frontier] = 0
+        step = 0
+        while len(frontier):
+            step += 1
+            i, j = np.divmod(frontier, ny)
+            neighbours = np.concatenate(
+                [frontier[i > 0] - ny, frontier[i < nx - 1] + ny, frontier[j > 0] - 1, frontier[j < ny - 1] + 1]
+            )
+            frontier = np.unique(neighbours[free[neighbours] & (steps[neighbours] < 0)])
+            steps[frontier] = step
+        return steps.reshape(nx, ny)
+
+
+def _label_components(free: np.ndarray, diagonal: bool = False) -> np.ndarray:
+    """
+    `free.shape` int array labelling the connected components of the `True` cells of `free` (from 1, in the
+    order of their first cell, 4-connected or, with `diagonal`, 8-connected), `0` elsewhere
+    """
+    # union-find over the edges between adjacent free cells, vectorised: every round hooks the root
+    # of each edge's larger end onto the smaller root, then compresses the paths, until no edge
+    # spans two trees. A component's root ends up being its first cell.
+    index = np.arange(free.size, dtype=np.int32).reshape(free.shape)
+    across_x = free[:-1, :] & free[1:, :]
+    across_y = free[:, :-1] & free[:, 1:]
+    low = [index[:-1, :][across_x], index[:, :-1][across_y]]
+    high = [index[1:, :][across_x], index[:, 1:][across_y]]
+    if diagonal:
+        across_up = free[:-1, :-1] & free[1:, 1:]
+        across_down = free[:-1, 1:] & free[1:, :-1]
+        low += [index[:-1, :-1][across_up], index[:-1, 1:][across_down]]
+        high += [index[1:, 1:][across_up], index[1:, :-1][across_down]]
+    low, high = np.concatenate(low), np.concatenate(high)
+    roots = index.ravel().copy()
+    while len(low):
+        low_roots, high_roots = roots[low], roots[high]
+        spanning = low_roots != high_roots
+        low, high = low[spanning], high[spanning]
+        low_roots, high_roots = low_roots[spanning], high_roots[spanning]
+        np.minimum.at(roots, np.maximum(low_roots, high_roots), np.minimum(low_roots, high_roots))
+        while True:
+            compressed = roots[roots]
+            if np.array_equal(compressed, roots):
+                break
+            roots = compressed
+    labels = np.zeros(free.size, dtype=np.int32)
+    labels[free.ravel()] = np.unique(roots[free.ravel()], return_inverse=True)[1] + 1
+    return labels.reshape(free.shape)
+
+
+def _within(obstacle_set: ObstacleSet, point, clearance: float) -> bool:
+    # whether `point` is within `clearance` of any obstacle, exactly
+    x, y = float(point[0]), float(point[1])
+    rectangles, circles = obstacle_set.rectangles, obstacle_set.circles
+    dx = np.maximum(np.maximum(rectangles[:, 0] - x, x - (rectangles[:, 0] + rectangles[:, 2])), 0)
+    dy = np.maximum(np.maximum(rectangles[:, 1] - y, y - (rectangles[:, 1] + rectangles[:, 3])), 0)
+    if np.any(dx**2 + dy**2 <= clearance**2):
+        return True
+    return bool(np.any(np.hypot(circles[:, 0] - x, circles[:, 1] - y) <= circles[:, 2] + clearance))
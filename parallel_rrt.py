@@ -0,0 +1,298 @@
+"""
+Parallel RRT: several worker processes grow one tree together, to answer a single hard query sooner.
+
+The tree lives in `multiprocessing.shared_memory`. Each worker owns a region of the shared node arrays
+(positions, and parents as indices into the whole tree), appends the nodes it adds there and publishes
+how many it has. Every `sync_interval` iterations, a worker merges the nodes the others published since
+its last sync into its own copy of the tree's positions, so that it extends the whole tree (new nodes
+hang off their nearest node, whoever added it) rather than a tree of its own. The first worker to get
+within `step_size` of the goal records its node, and all the workers stop.
+
+Throughput grows with the number of cores; the price is that each worker only sees the others' nodes
+up to `sync_interval` iterations late.
+
+USAGE:
+    `planner = ParallelRRT(env, n_workers=8)`
+    `final_index, path = planner.find_path()`
+"""
+
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+from os import cpu_count
+from time import sleep
+
+import numpy as np
+
+from visualiser import Visualiser
+from obstacle_set import ObstacleSet
+from budget import Budget, PlanStats
+from tree_snapshot import TreeSnapshot
+
+
+class SharedTree:
+    """
+    The node arrays of a tree grown by `n_workers` processes, in one shared memory block.
+    Worker `w` owns `positions[w]` and `parents[w]`, and node `i` of its region is node `w * capacity + i`
+    of the tree. Only worker `w` writes to its region, and it writes a node before publishing it in `counts[w]`.
+    """
+
+    positions: np.ndarray
+    """
+    `(n_workers, capacity, 2)` float array of node positions
+    """
+    parents: np.ndarray
+    """
+    `(n_workers, capacity)` int array of parent indices in the whole tree, `-1` for the root
+    """
+    counts: np.ndarray
+    """
+    `(n_workers,)` int array of the nodes published by each worker
+    """
+    iterations: np.ndarray
+    """
+    `(n_workers,)` int array of the iterations run by each worker
+    """
+    control: np.ndarray
+    """
+    `[found, stop]`: the index of the node that reached the goal, plus one (`0` until then),
+    and whether the workers must stop
+    """
+
+    FOUND = 0
+    STOP = 1
+
+    def __init__(self, n_workers: int, capacity: int, name: str | None = None) -> None:
+        """
+        Creates the shared block, or with a `name`, attaches to an existing one
+        """
+        self.n_workers = n_workers
+        self.capacity = capacity
+        shapes = {
+            "positions": ((n_workers, capacity, 2), np.float64),
+            "parents": ((n_workers, capacity), np.int64),
+            "counts": ((n_workers,), np.int64),
+            "iterations": ((n_workers,), np.int64),
+            "control": ((2,), np.int64),
+        }
+        size = sum(int(np.prod(shape)) * np.dtype(dtype).itemsize for shape, dtype in shapes.values())
+        self.shared_memory = SharedMemory(name, create=name is None, size=size)
+        offset = 0
+        for field, (shape, dtype) in shapes.items():
+            array = np.ndarray(shape, dtype, buffer=self.shared_memory.buf, offset=offset)
+            if name is None:
+                array[...] = 0
+            setattr(self, field, array)
+            offset += array.nbytes
+        return
+
+    @property
+    def name(self) -> str:
+        return self.shared_memory.name
+
+    def snapshot(self) -> TreeSnapshot:
+        """
+        A compact copy of the tree, with the workers' regions one after the other
+        """
+        counts = self.counts.copy()
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        positions = np.concatenate([self.positions[w, :count] for w, count in enumerate(counts)])
+        parents = np.concatenate([self.parents[w, :count] for w, count in enumerate(counts)])
+        parents = np.where(parents < 0, -1, offsets[parents // self.capacity] + parents % self.capacity)
+        return TreeSnapshot(positions, parents, np.full(len(positions), np.inf))
+
+    def compact_index(self, index: int) -> int:
+        """
+        Where node `index` of the tree is in its `snapshot`
+        """
+        worker, i = divmod(index, self.capacity)
+        return int(self.counts[:worker].sum()) + i
+
+    def close(self) -> None:
+        """
+        Detaches from the shared block (the arrays must not be used afterwards)
+        """
+        self.positions = self.parents = self.counts = self.iterations = self.control = None
+        self.shared_memory.close()
+        return
+
+
+class ParallelRRT:
+    """
+    RRT with the tree grown by `n_workers` processes at once (see the module docstring)
+    """
+
+    def __init__(
+        self,
+        map_env: Visualiser,
+        step_size=10,
+        n_workers: int | None = None,
+        capacity=100_000,
+        sync_interval=64,
+        budget: Budget | None = None,
+        seed: int | None = None,
+    ):
+        """
+        Parameters:
+        -----------
+        map_env : Visualiser
+            The map, with the query's start and goal
+        step_size : float
+            Maximum distance to extend the tree in each iteration
+        n_workers : int | None
+            Number of worker processes (`None`: one per CPU)
+        capacity : int
+            Maximum number of nodes per worker
+        sync_interval : int
+            Iterations between two merges of the other workers' nodes
+        budget : Budget | None
+            Optional limits on `find_path`, checked by the calling process as the workers run
+        seed : int | None
+            Seed of the workers' generators, `None` to seed them from `np.random` (so `np.random.seed` applies)
+        """
+        self.map_env = map_env
+        self.step_size = step_size
+        self.n_workers = n_workers or cpu_count() or 1
+        self.capacity = capacity
+        self.sync_interval = sync_interval
+        self.budget = budget
+        self.seed = seed
+        self.poll_interval = 0.005  # Seconds between two checks of the workers' progress
+        # The tree of the last run
+        self.nodes = TreeSnapshot(np.array([map_env.start], dtype=float), np.array([-1]), np.array([0.0]))
+        self.stats: PlanStats | None = None  # How the last `find_path` went
+
+    def find_path(self):
+        """
+        Grows the tree until a node gets within `step_size` of the goal
+
+        Returns:
+        --------
+        (int | None, list[tuple])
+            The index of that node in `self.nodes` (the tree) and the path to it,
+            or `(None, [])` if the budget ran out (or the workers filled their regions) first
+        """
+        budget = self.budget if self.budget is not None else Budget()
+        seed = np.random.randint(2**31) if self.seed is None else self.seed
+        seeds = np.random.SeedSequence(seed).spawn(self.n_workers)
+        tree = SharedTree(self.n_workers, self.capacity)
+        tree.positions[0, 0] = self.map_env.start
+        tree.parents[0, 0] = -1
+        tree.counts[0] = 1
+        workers = [
+            multiprocessing.Process(
+                target=_grow,
+                args=(tree.name, self.n_workers, self.capacity, worker, seeds[worker]),
+                kwargs=dict(
+                    obstacle_set=self.map_env.obstacle_set,
+                    size=self.map_env.size,
+                    goal=self.map_env.goal,
+                    step_size=self.step_size,
+                    sync_interval=self.sync_interval,
+                ),
+                daemon=True,
+            )
+            for worker in range(self.n_workers)
+        ]
+        try:
+            for process in workers:
+                process.start()
+            while not tree.control[SharedTree.FOUND] and any(process.is_alive() for process in workers):
+                budget.iterations = int(tree.iterations.sum())  # the workers' iterations, spent in bulk
+                if budget.spend(int(tree.counts.sum())):
+                    print(f"INFO: gave up after {budget.iterations} iterations ({budget.exhausted_by})")
+                    break
+                sleep(self.poll_interval)
+        finally:
+            tree.control[SharedTree.STOP] = 1
+            for process in workers:
+                process.join(timeout=1.0)
+                if process.is_alive():
+                    process.terminate()
+            found = int(tree.control[SharedTree.FOUND]) - 1
+            budget.iterations = int(tree.iterations.sum())
+            self.nodes = tree.snapshot()
+            final_index = tree.compact_index(found) if found >= 0 else None
+            tree.close()
+            tree.shared_memory.unlink()
+
+        self.stats = budget.stats(final_index is not None, len(self.nodes.positions))
+        if final_index is None:
+            return None, []
+        print(f"INFO: Goal reached after {budget.iterations} iterations across {self.n_workers} workers")
+        return final_index, self.nodes.trace_path(final_index)
+
+
+def _grow(
+    name,
+    n_workers,
+    capacity,
+    worker,
+    seed,
+    obstacle_set: ObstacleSet,
+    size,
+    goal,
+    step_size,
+    sync_interval,
+):
+    # runs in worker process `worker`, until the tree reaches the goal or `STOP` is set
+    tree = SharedTree(n_workers, capacity, name)
+    try:
+        rng = np.random.default_rng(seed)
+        goal = np.asarray(goal, dtype=float)
+        positions, parents = tree.positions[worker], tree.parents[worker]
+        # this worker's copy of the tree: the positions of every node it knows of, and their indices
+        known = np.empty((1024, 2))
+        known_indices = np.empty(1024, dtype=np.int64)
+        n_known = 0
+        merged = np.zeros(n_workers, dtype=np.int64)  # nodes of each region already in `known`
+
+        def remember(new_positions, indices):
+            nonlocal known, known_indices, n_known
+            end = n_known + len(indices)
+            if end > len(known):
+                grown = max(end, 2 * len(known))
+                known = np.resize(known, (grown, 2))
+                known_indices = np.resize(known_indices, grown)
+            known[n_known:end] = new_positions
+            known_indices[n_known:end] = indices
+            n_known = end
+
+        iteration = 0
+        while not tree.control[SharedTree.STOP]:
+            if iteration % sync_interval == 0:
+                for other, count in enumerate(tree.counts.tolist()):
+                    if count > merged[other]:
+                        remember(
+                            tree.positions[other, merged[other] : count],
+                            other * capacity + np.arange(merged[other], count),
+                        )
+                        merged[other] = count
+                samples = rng.uniform((0, 0), size, (sync_interval, 2))
+            sample = samples[iteration % sync_interval]
+            iteration += 1
+            tree.iterations[worker] = iteration
+
+            nearest = int(np.argmin(((known[:n_known] - sample) ** 2).sum(axis=1)))
+            nearest_position = known[nearest]
+            offset = sample - nearest_position
+            distance = np.hypot(*offset)
+            new_position = sample if distance < step_size else nearest_position + offset * (step_size / distance)
+            if not obstacle_set.is_segment_free(nearest_position, new_position):
+                continue
+
+            count = int(tree.counts[worker])
+            if count == capacity:
+                break
+            positions[count] = new_position
+            parents[count] = known_indices[nearest]
+            tree.counts[worker] = count + 1  # published only once written
+            remember(new_position[None], [worker * capacity + count])
+            merged[worker] = count + 1
+
+            if np.hypot(*(new_position - goal)) <= step_size:
+                if not tree.control[SharedTree.FOUND]:
+                    tree.control[SharedTree.FOUND] = worker * capacity + count + 1
+                tree.control[SharedTree.STOP] = 1
+    finally:
+        tree.close()
+    return
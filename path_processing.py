@@ -0,0 +1,133 @@
+"""
+Post-processing for planned paths, independent of the planner that produced them.
+
+A path is a list of `(x, y)` positions from the start to the goal, as returned by
+every planner's `find_path`. Candidate shortcuts are validated in batches through
+`ObstacleSet.are_segments_free`, rather than one edge at a time, and exactly (against the obstacles'
+edges), so that a shortcut never clips a corner. Shortcutting never adds a blocked segment, but it
+cannot repair one already in the path: segments of the input that are themselves blocked are kept.
+"""
+
+import numpy as np
+
+from obstacle_set import ObstacleSet
+
+
+def path_length(path: list[tuple]) -> float:
+    """
+    Total Euclidean length of a path
+    """
+    if len(path) < 2:
+        return 0.0
+    return float(np.hypot(*np.diff(np.asarray(path, dtype=float), axis=0).T).sum())
+
+
+def shortcut_greedy(path: list[tuple], obstacle_set: ObstacleSet) -> list[tuple]:
+    """
+    Greedy shortcutting: from each kept point, jump straight to the furthest later
+    point that is visible from it. Each jump validates all its candidates in one batch,
+    so this costs one batched check per point of the *shortened* path.
+    """
+    if len(path) < 3:
+        return list(path)
+
+    points = np.asarray(path, dtype=float)
+    shortcut = [path[0]]
+    current = 0
+    while current < len(path) - 1:
+        candidates = np.arange(current + 1, len(path))
+        origins = np.repeat(points[current : current + 1], len(candidates), 0)
+        free = np.flatnonzero(obstacle_set.are_segments_free(origins, points[candidates]))
+        # the next point if none is visible, along a blocked segment of the input
+        current = int(candidates[free[-1]]) if len(free) else current + 1
+        shortcut.append(path[current])
+    return shortcut
+
+
+def shortcut_random(
+    path: list[tuple],
+    obstacle_set: ObstacleSet,
+    rounds: int = 20,
+    batch_size: int = 64,
+    rng: np.random.Generator | None = None,
+) -> list[tuple]:
+    """
+    Randomised shortcutting: each round draws `batch_size` random pairs of points,
+    validates all of them in one batch, and splices in the visible shortcut that
+    saves the most length.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    path = list(path)
+
+    for _ in range(rounds):
+        if len(path) < 3:
+            break
+        points = np.asarray(path, dtype=float)
+        first = rng.integers(0, len(path) - 2, batch_size)
+        last = first + 2 + (rng.random(batch_size) * (len(path) - first - 2)).astype(int)
+
+        # length saved by going straight from `first` to `last`
+        cumulative = np.concatenate([[0.0], np.cumsum(np.hypot(*np.diff(points, axis=0).T))])
+        savings = cumulative[last] - cumulative[first] - np.hypot(*(points[last] - points[first]).T)
+        free = obstacle_set.are_segments_free(points[first], points[last])
+        if not free.any():
+            continue
+
+        best = np.flatnonzero(free)[np.argmax(savings[free])]
+        path = path[: first[best] + 1] + path[last[best] :]
+    return path
+
+
+def densify(path: list[tuple], step_size: float) -> list[tuple]:
+    """
+    Inserts intermediate points so that consecutive points are at most `step_size` apart
+    """
+    if len(path) < 2:
+        return list(path)
+
+    points = np.asarray(path, dtype=float)
+    steps = np.maximum(1, np.ceil(np.hypot(*np.diff(points, axis=0).T) / step_size).astype(int))
+    # every segment contributes its start point plus `steps - 1` intermediate ones
+    segment = np.repeat(np.arange(len(steps)), steps)
+    fraction = (np.arange(len(segment)) - np.repeat(np.cumsum(steps) - steps, steps)) / steps[segment]
+    dense = points[segment] + fraction[:, None] * (points[segment + 1] - points[segment])
+    return [tuple(point) for point in dense.tolist()] + [path[-1]]
+
+
+def smooth_path(
+    path: list[tuple],
+    obstacle_set: ObstacleSet,
+    step_size: float,
+    method: str = "greedy",
+    densify_to_step: bool = False,
+    **kwargs,
+) -> list[tuple]:
+    """
+    Shortcuts a path, then optionally densifies it back to `step_size` spacing
+
+    Parameters:
+    -----------
+    path : list[tuple]
+        Any planner's output path
+    obstacle_set : ObstacleSet
+        The obstacles to keep clear of, usually `map_env.obstacle_set`
+    step_size : float
+        Spacing of the densified path
+    method : str
+        `"greedy"` or `"random"` shortcutting (the latter takes `shortcut_random`'s keyword arguments)
+    densify_to_step : bool
+        Whether to insert intermediate points every `step_size`
+
+    Returns:
+    --------
+    list[tuple]
+        The post-processed path, with the same start and end points
+    """
+    if method == "greedy":
+        path = shortcut_greedy(path, obstacle_set)
+    elif method == "random":
+        path = shortcut_random(path, obstacle_set, **kwargs)
+    else:
+        raise ValueError(f"Unknown shortcutting method: {method}")
+
+    return densify(path, step_size) if densify_to_step else path
@@ -0,0 +1,197 @@
+"""
+What the tree planners of this project have in common, so that each planner module only holds its own algorithm.
+
+    - `TreePlanner`: a tree rooted at the map's start, with the options every planner takes
+      (a progress `EventStream`, a `Budget`, a `Sampler`) and the basic steps (steering, collision checks)
+    - `IndexedTreePlanner`: adds the spatial index of the nodes (see `spatial_index`) and the batched
+      edge checks (see `edge_checker`) of the RRT* variants, and RRT*'s choice of parent
+    - `AnytimeTreePlanner`: adds the anytime mode and the branch-and-bound pruning of `RRT_Star` and `Q_RRT_Star`
+The planners guided by the occupancy grid's distance field share `guided_planner.GuidedTreePlanner`.
+"""
+
+import math
+
+import numpy as np
+from visualiser import Visualiser
+from events import EventStream
+from budget import Budget, PlanStats
+from samplers import Sampler
+from edge_checker import EdgeChecker
+from spatial_index import NodeIndex
+
+PRUNE_TOLERANCE = 1e-9
+"""
+Margin over the best path's cost within which `prune` keeps nodes, so that round-off in the costs
+never removes the nodes of the best path itself
+"""
+
+
+class Node:
+    def __init__(self, position, parent=None):
+        self.position = position  # Node Position (x coordinate, y coordinate)
+        self.parent = parent  # Reference to the parent node
+        self.cost = float("inf")  # Cost to reach this node
+
+
+class TreePlanner:
+    def __init__(
+        self,
+        map_env: Visualiser,
+        step_size,
+        events: EventStream | None = None,
+        budget: Budget | None = None,
+        sampler: Sampler | None = None,
+    ):
+        self.map_env = map_env
+        self.step_size = step_size  # Maximum distance to extend the tree in each iteration
+        self.nodes = [Node(map_env.start)]
+        self.nodes[0].cost = 0  # Cost to reach the start node is 0
+        self.events = events  # Optional stream of progress events, for live visualisation
+        self.budget = budget  # Optional limits on `find_path`, which returns `(None, [])` once they are hit
+        self.sampler = sampler  # Optional source of the random positions, e.g. a narrow-passage `Sampler`
+        self.stats: PlanStats | None = None  # How the last `find_path` went
+
+    def distance(self, a, b):
+        return np.sqrt((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2)
+
+    def is_collision_free(self, node):
+        return not self.map_env.obstacle_set.contains_point(node.position)
+
+    def random_position(self):
+        # from the sampler if there is one, uniformly over the map otherwise
+        if self.sampler is not None:
+            return self.sampler.sample()
+        return np.random.uniform(0, self.map_env.size[0]), np.random.uniform(0, self.map_env.size[1])
+
+    def step_from_to(self, n1, n2):
+        if self.distance(n1, n2) < self.step_size:
+            return n2
+        else:
+            # Theta is the angle between the two points according to the x-axis
+            theta = np.arctan2(n2[1] - n1[1], n2[0] - n1[0])
+            return n1[0] + self.step_size * np.cos(theta), n1[1] + self.step_size * np.sin(theta)
+
+    def _trace_path(self, final_node):
+        # Future Scope: use a deque to store the nodes in the path
+        path = []
+        current_node = final_node
+        while current_node is not None:
+            path.append(current_node.position)
+            current_node = current_node.parent
+        path.reverse()  # Reverse the path to start from the beginning
+        return path
+
+
+class IndexedTreePlanner(TreePlanner):
+    def __init__(
+        self,
+        map_env: Visualiser,
+        step_size,
+        neighbor_radius,
+        events: EventStream | None = None,
+        budget: Budget | None = None,
+        sampler: Sampler | None = None,
+        neighborhood="fixed",
+    ):
+        super().__init__(map_env, step_size, events, budget, sampler)
+        self.neighbor_radius = neighbor_radius
+        # Grid of the nodes for `nearest_node` and `find_neighbors`, whose neighbourhoods are "fixed" (within
+        # `neighbor_radius`), "shrinking" (RRT*'s radius) or "k_nearest" (RRT*-k), see `spatial_index`
+        self.node_index = NodeIndex(map_env.size, neighborhood, neighbor_radius, self.nodes)
+        self.edge_checker = EdgeChecker(map_env.obstacle_set)  # Batches (and threads) exact edge checks
+
+    def nearest_node(self, position):
+        return self.node_index.nearest(position)
+
+    def find_neighbors(self, new_node):
+        return self.node_index.neighbors(new_node.position)
+
+    def is_path_collision_free(self, start_pos, end_pos):
+        return self.map_env.obstacle_set.is_segment_free(start_pos, end_pos)
+
+    def are_paths_collision_free(self, start_positions, end_positions) -> list[bool]:
+        # a batch of independent edges, see `edge_checker`
+        return self.edge_checker.are_free(start_positions, end_positions)
+
+    def choose_best_parent(self, new_node, neighbors):
+        # only the edges from neighbours that would lower the cost are checked, in one batch
+        costs = [neighbor.cost + self.distance(neighbor.position, new_node.position) for neighbor in neighbors]
+        candidates = [i for i, cost in enumerate(costs) if cost < new_node.cost]
+        free = self.are_paths_collision_free(
+            [neighbors[i].position for i in candidates], [new_node.position] * len(candidates)
+        )
+        best = min((i for i, is_free in zip(candidates, free) if is_free), key=costs.__getitem__, default=None)
+        if best is not None:
+            new_node.parent = neighbors[best]
+            new_node.cost = costs[best]
+
+
+class AnytimeTreePlanner(IndexedTreePlanner):
+    def __init__(
+        self,
+        map_env: Visualiser,
+        step_size,
+        neighbor_radius,
+        events: EventStream | None = None,
+        budget: Budget | None = None,
+        sampler: Sampler | None = None,
+        neighborhood="fixed",
+        anytime=False,
+        prune_interval=100,
+    ):
+        super().__init__(map_env, step_size, neighbor_radius, events, budget, sampler, neighborhood)
+        # With `anytime`, `find_path` keeps improving its path until the budget runs out (so it needs one), and
+        # every `prune_interval` iterations (`None` for never) drops the nodes that cannot improve it, see `prune`
+        self.anytime = anytime
+        self.prune_interval = prune_interval
+        self.nodes_pruned = 0  # Nodes dropped by `prune` so far
+
+    def prune(self, best_node):
+        """
+        Branch and bound: removes the nodes whose cost plus straight-line distance to the goal exceeds
+        the cost of the path through `best_node`, which therefore cannot lead to a shorter one.
+
+        The costs are refreshed first, as rewiring leaves those below the rewired nodes stale (too high).
+        A node is then never cheaper by that measure than its parent, so whole subtrees are removed.
+        The nodes on the best path itself are within round-off of the bound, which leaves them a small margin.
+
+        N.B.: Only the cells of the removed nodes are re-indexed, but refreshing the costs still walks
+        the whole tree, once per `prune_interval` iterations. The tree also keeps growing inside the bound
+        (the region it leaves shrinks as the path improves), so the time per iteration still rises, only slower.
+        """
+        children = {}
+        for node in self.nodes:
+            if node.parent is not None:
+                children.setdefault(node.parent, []).append(node)
+        ordered = [self.nodes[0]]
+        for node in ordered:  # parents first
+            for child in children.get(node, ()):
+                child.cost = node.cost + math.dist(node.position, child.position)
+                ordered.append(child)
+
+        goal = self.map_env.goal
+        bound = best_node.cost + math.dist(best_node.position, goal) + PRUNE_TOLERANCE
+        pruned = set()
+        for node in ordered:
+            if node.parent in pruned or node.cost + math.dist(node.position, goal) > bound:
+                pruned.add(node)
+        if not pruned:
+            return
+        self.nodes = [node for node in self.nodes if node not in pruned]
+        self.node_index.discard(pruned)
+        self.nodes_pruned += len(pruned)
+        if self.events is not None:
+            for node in pruned:
+                self.events.emit(EventStream.NODE_REMOVED, node)
+
+    def _is_bounded_out(self, new_node, best_node):
+        # a new node that `prune` would remove right away is not worth adding
+        return (
+            best_node is not None
+            and self.prune_interval is not None
+            and self._solution_cost(new_node) > self._solution_cost(best_node) + PRUNE_TOLERANCE
+        )
+
+    def _solution_cost(self, node):
+        # cost of the path to the goal through `node`, from its end the goal is within a step
+        return node.cost + self.distance(node.position, self.map_env.goal)
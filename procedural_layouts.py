@@ -0,0 +1,284 @@
+"""
+Seeded procedural layouts, for stress tests and scaling benchmarks.
+
+The hand-written maps of `map_layouts.py` have a few dozen obstacles at most. The generators here
+build maps of any size, from a handful to hundreds of thousands of obstacles:
+    - `random_field`:   scattered rectangles (and circles), at a given count and coverage
+    - `recursive_maze`: a perfect maze, by recursive division of a grid of cells
+    - `urban_grid`:     blocks of buildings separated by streets, with clutter in the streets
+    - `balloon_swarm`:  moving circles, like `LayoutBalloons`
+Each is deterministic given its `seed`, and keeps its start and goal clear. They return a `layout_*()`-style dict,
+or a `Layout` with `as_layout=True`. Dicts only hold rectangles, so circles (and moving obstacles) need a `Layout`.
+
+USAGE:
+    `env = Visualiser(random_field((10_000, 10_000), n_obstacles=20_000, seed=1))`
+"""
+
+import numpy as np
+
+from obstacle import DynamicObstacle, StaticObstacle
+from layout import Layout
+import shapes
+
+
+def random_field(
+    size=(1000, 1000),
+    n_obstacles: int = 200,
+    density: float = 0.2,
+    circle_fraction: float = 0.0,
+    seed: int = 0,
+    as_layout: bool = False,
+) -> dict | Layout:
+    """
+    Obstacles scattered uniformly over the map
+
+    Parameters:
+    -----------
+    size : tuple
+        Width and height of the map
+    n_obstacles : int
+        Number of obstacles
+    density : float
+        Fraction of the map the obstacles would cover if they did not overlap, which sets their mean size
+    circle_fraction : float
+        Fraction of the obstacles that are circles rather than rectangles (needs `as_layout`)
+    seed : int
+        Seed of the generator
+    as_layout : bool
+        Whether to return a `Layout` rather than a dict
+    """
+    rng = np.random.default_rng(seed)
+    start, goal = _corners(size)
+    side = np.sqrt(density * size[0] * size[1] / n_obstacles)  # the mean side of an obstacle
+    n_circles = int(round(n_obstacles * circle_fraction))
+
+    # drawn in batches, as those too close to the start or goal are dropped
+    rectangles, circles = np.empty((0, 4)), np.empty((0, 3))
+    while len(rectangles) < n_obstacles - n_circles:
+        dimensions = rng.uniform(0.5 * side, 1.5 * side, (n_obstacles, 2))
+        anchors = rng.uniform((0, 0), size, (n_obstacles, 2)) - dimensions / 2
+        batch = np.concatenate([anchors, dimensions], axis=1)
+        rectangles = np.concatenate([rectangles, batch[_clear_of(batch, (start, goal), side)]])
+    while len(circles) < n_circles:
+        radii = rng.uniform(0.5, 1.5, (n_obstacles, 1)) * side / np.sqrt(np.pi)
+        batch = np.concatenate([rng.uniform((0, 0), size, (n_obstacles, 2)), radii], axis=1)
+        circles = np.concatenate([circles, batch[_clear_of(batch, (start, goal), side)]])
+    return _emit(
+        f"field-{n_obstacles}-{seed}",
+        size,
+        start,
+        goal,
+        rectangles[: n_obstacles - n_circles],
+        circles[:n_circles],
+        as_layout=as_layout,
+    )
+
+
+def recursive_maze(
+    size=(1000, 1000),
+    cell_size: float = 50,
+    wall_thickness: float | None = None,
+    seed: int = 0,
+    as_layout: bool = False,
+) -> dict | Layout:
+    """
+    A perfect maze (exactly one way between any two cells), from the start cell in one corner
+    to the goal cell in the opposite one.
+    Each chamber is split by a wall with a one-cell gap, across its longer side, until chambers are a cell wide.
+    A map of `n` cells has about `2 n` wall segments.
+
+    Parameters:
+    -----------
+    size : tuple
+        Width and height of the map
+    cell_size : float
+        Width of the corridors, between the centre lines of the walls
+    wall_thickness : float | None
+        Thickness of the walls (`None`: a tenth of `cell_size`), which sets the maze's density
+    seed : int
+        Seed of the generator
+    as_layout : bool
+        Whether to return a `Layout` rather than a dict
+    """
+    rng = np.random.default_rng(seed)
+    thickness = cell_size / 10 if wall_thickness is None else wall_thickness
+    nx, ny = int(size[0] // cell_size), int(size[1] // cell_size)
+    walls = []  # `(x, y, length, horizontal)`, in cells
+
+    chambers = [(0, 0, nx, ny)]
+    while chambers:
+        x, y, width, height = chambers.pop()
+        if width < 2 or height < 2:
+            continue
+        if width == height:
+            horizontal = bool(rng.integers(2))
+        else:
+            horizontal = height > width
+        if horizontal:
+            wall, gap = int(rng.integers(y + 1, y + height)), int(rng.integers(x, x + width))
+            walls += [(x, wall, gap - x, True), (gap + 1, wall, x + width - gap - 1, True)]
+            chambers += [(x, y, width, wall - y), (x, wall, width, y + height - wall)]
+        else:
+            wall, gap = int(rng.integers(x + 1, x + width)), int(rng.integers(y, y + height))
+            walls += [(wall, y, gap - y, False), (wall, gap + 1, y + height - gap - 1, False)]
+            chambers += [(x, y, wall - x, height), (wall, y, x + width - wall, height)]
+
+    walls = np.array([wall for wall in walls if wall[2] > 0], dtype=float).reshape(-1, 4)
+    horizontal = walls[:, 3].astype(bool)
+    rectangles = np.empty((len(walls), 4))
+    # each wall runs along a cell boundary, and covers the joints at its ends
+    rectangles[:, 0] = walls[:, 0] * cell_size - thickness / 2
+    rectangles[:, 1] = walls[:, 1] * cell_size - thickness / 2
+    rectangles[:, 2] = np.where(horizontal, walls[:, 2] * cell_size, 0) + thickness
+    rectangles[:, 3] = np.where(horizontal, 0, walls[:, 2] * cell_size) + thickness
+    start = (cell_size / 2, cell_size / 2)
+    goal = ((nx - 0.5) * cell_size, (ny - 0.5) * cell_size)
+    return _emit(f"maze-{nx}x{ny}-{seed}", size, start, goal, rectangles, as_layout=as_layout)
+
+
+def urban_grid(
+    size=(1000, 1000),
+    block_size: float = 100,
+    street_width: float = 20,
+    density: float = 0.6,
+    n_clutter: int = 0,
+    seed: int = 0,
+    as_layout: bool = False,
+) -> dict | Layout:
+    """
+    City blocks separated by streets. Each block is split into up to 3 x 3 lots, each with one building,
+    and the streets are cluttered with small obstacles (parked cars, kiosks) that never close them off.
+    The start and goal are at opposite street corners.
+
+    Parameters:
+    -----------
+    size : tuple
+        Width and height of the map
+    block_size : float
+        Width of a block, between the streets around it
+    street_width : float
+        Width of the streets
+    density : float
+        Fraction of each lot its building covers, on average
+    n_clutter : int
+        Number of obstacles in the streets
+    seed : int
+        Seed of the generator
+    as_layout : bool
+        Whether to return a `Layout` rather than a dict
+    """
+    rng = np.random.default_rng(seed)
+    pitch = block_size + street_width
+    nx, ny = int((size[0] - street_width) // pitch), int((size[1] - street_width) // pitch)
+    rectangles = []
+    for i in range(nx):
+        for j in range(ny):
+            block_x, block_y = street_width + i * pitch, street_width + j * pitch
+            lots_x, lots_y = rng.integers(1, 4, 2)
+            lot_width, lot_height = block_size / lots_x, block_size / lots_y
+            # a building covers about `density` of its lot, at a random place in it
+            fills = np.clip(np.sqrt(density) * rng.uniform(0.8, 1.2, (lots_x * lots_y, 2)), 0.1, 1.0)
+            widths, heights = fills[:, 0] * lot_width, fills[:, 1] * lot_height
+            lots = np.indices((lots_x, lots_y)).reshape(2, -1).T
+            xs = block_x + lots[:, 0] * lot_width + rng.random(len(lots)) * (lot_width - widths)
+            ys = block_y + lots[:, 1] * lot_height + rng.random(len(lots)) * (lot_height - heights)
+            rectangles.append(np.stack([xs, ys, widths, heights], axis=1))
+    rectangles = np.concatenate(rectangles) if rectangles else np.empty((0, 4))
+
+    start = (street_width / 2, street_width / 2)
+    goal = (nx * pitch + street_width / 2, ny * pitch + street_width / 2)
+    # clutter a quarter of a street wide, along either side of a random street
+    clutter_size = street_width / 4
+    clutter = np.empty((0, 4))
+    while len(clutter) < n_clutter:
+        along_x = rng.random(n_clutter) < 0.5
+        streets = rng.integers(0, np.where(along_x, ny + 1, nx + 1))
+        across = streets * pitch + np.where(rng.random(n_clutter) < 0.5, 0, street_width - clutter_size)
+        along = rng.uniform(0, np.where(along_x, size[0], size[1]) - clutter_size)
+        anchors = np.where(along_x[:, None], np.stack([along, across], 1), np.stack([across, along], 1))
+        batch = np.concatenate([anchors, np.full((n_clutter, 2), clutter_size)], axis=1)
+        clutter = np.concatenate([clutter, batch[_clear_of(batch, (start, goal), street_width)]])
+    rectangles = np.concatenate([rectangles, clutter[:n_clutter]])
+    return _emit(f"urban-{nx}x{ny}-{seed}", size, start, goal, rectangles, as_layout=as_layout)
+
+
+def balloon_swarm(
+    size=(1000, 1000),
+    n_balloons: int = 50,
+    density: float = 0.1,
+    speed=(100, 600),
+    seed: int = 0,
+) -> Layout:
+    """
+    Circles moving in straight lines (and bouncing off each other), which only a `Layout` can hold.
+    They start on a jittered lattice, so none overlap.
+
+    Parameters:
+    -----------
+    size : tuple
+        Width and height of the map
+    n_balloons : int
+        Number of balloons
+    density : float
+        Fraction of the map the balloons cover, which sets their mean radius
+    speed : tuple
+        Range of the balloons' speeds
+    seed : int
+        Seed of the generator
+    """
+    rng = np.random.default_rng(seed)
+    start, goal = _corners(size)
+    radius = np.sqrt(density * size[0] * size[1] / n_balloons / np.pi)
+    # lattice sites at least two of the largest balloons apart, away from the start and goal
+    pitch = max(np.sqrt(size[0] * size[1] / (2 * n_balloons)), 2.6 * radius)
+    sites = np.indices((int(size[0] // pitch), int(size[1] // pitch))).reshape(2, -1).T * pitch + pitch / 2
+    sites = sites[np.min([np.hypot(*(sites - point).T) for point in (start, goal)], axis=0) > pitch]
+    if len(sites) < n_balloons:
+        raise ValueError(f"{n_balloons} balloons covering {density:.0%} of the map do not fit on it")
+    centres = sites[rng.choice(len(sites), n_balloons, replace=False)]
+    radii = radius * rng.uniform(0.7, 1.3, n_balloons)
+    centres += rng.uniform(-1, 1, (n_balloons, 2)) * (pitch / 2 - radii)[:, None]
+    angles = rng.uniform(0, 2 * np.pi, n_balloons)
+    velocities = rng.uniform(*speed, n_balloons)[:, None] * np.stack([np.cos(angles), np.sin(angles)], axis=1)
+    balloons = [
+        DynamicObstacle(tuple(centre), tuple(velocity), shapes.Circle, (radius,))
+        for centre, velocity, radius in zip(centres.tolist(), velocities.tolist(), radii.tolist())
+    ]
+    return Layout(size, start, goal, dynamic_obstacles=balloons)
+
+
+def _corners(size) -> tuple[tuple, tuple]:
+    # a start and goal near opposite corners, like the hand-written maps'
+    margin = np.maximum(10, 0.02 * np.asarray(size, dtype=float))
+    return tuple(margin.tolist()), tuple((np.asarray(size) - margin).tolist())
+
+
+def _clear_of(obstacles: np.ndarray, points, clearance: float) -> np.ndarray:
+    # which of the `(N, 4)` rectangles or `(N, 3)` circles are at least `clearance` away from every point
+    clear = np.ones(len(obstacles), dtype=bool)
+    for x, y in points:
+        if obstacles.shape[1] == 4:
+            dx = np.maximum(np.maximum(obstacles[:, 0] - x, x - obstacles[:, 0] - obstacles[:, 2]), 0)
+            dy = np.maximum(np.maximum(obstacles[:, 1] - y, y - obstacles[:, 1] - obstacles[:, 3]), 0)
+            clear &= np.hypot(dx, dy) >= clearance
+        else:
+            clear &= np.hypot(obstacles[:, 0] - x, obstacles[:, 1] - y) - obstacles[:, 2] >= clearance
+    return clear
+
+
+def _emit(name, size, start, goal, rectangles, circles=np.empty((0, 3)), as_layout=False) -> dict | Layout:
+    if as_layout:
+        static_obstacles = [
+            StaticObstacle((x, y), shapes.Rectangle, (width, height)) for x, y, width, height in rectangles.tolist()
+        ]
+        static_obstacles += [StaticObstacle((x, y), shapes.Circle, (radius,)) for x, y, radius in circles.tolist()]
+        return Layout(size, start, goal, static_obstacles=static_obstacles)
+    if len(circles):
+        raise ValueError("Dict layouts only hold rectangles, pass `as_layout=True` for circles")
+    return {
+        "size": size,
+        "start": start,
+        "goal": goal,
+        "name": name,
+        "obstacles": [((x, y), (width, height)) for x, y, width, height in rectangles.tolist()],
+    }
@@ -0,0 +1,269 @@
+"""
+Multi-query planning on a persistent probabilistic roadmap (PRM).
+
+Building a roadmap of a layout's free space is slow, but it only depends on the layout,
+so it is done once and cached on disk, keyed by a hash of the layout (see `Roadmap.load_or_build`).
+Each query then only connects its start and goal into the roadmap and searches it.
+"""
+
+from heapq import heappush, heappop
+from os import PathLike
+from pathlib import Path
+
+import numpy as np
+
+from visualiser import Visualiser
+from obstacle_set import ObstacleSet
+from tree_snapshot import TreeSnapshot
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".roadmap_cache"
+FORMAT_VERSION = 2
+"""
+Version of the cached roadmaps, part of their cache key (version 1 checked the edges at sampled points,
+which let some clip obstacle corners, so those roadmaps are never loaded)
+"""
+
+
+class Roadmap:
+    """
+    An undirected graph over collision-free points, with collision-free straight edges (checked exactly).
+    Adjacency is stored in compressed sparse row form: the neighbours of node `i` are
+    `indices[indptr[i]:indptr[i + 1]]`, at distances `weights[indptr[i]:indptr[i + 1]]`.
+    """
+
+    positions: np.ndarray
+    indptr: np.ndarray
+    indices: np.ndarray
+    weights: np.ndarray
+
+    def __init__(self, positions, indptr, indices, weights, obstacle_set: ObstacleSet) -> None:
+        self.positions = np.asarray(positions, dtype=float)
+        self.indptr = np.asarray(indptr)
+        self.indices = np.asarray(indices)
+        self.weights = np.asarray(weights, dtype=float)
+        self.obstacle_set = obstacle_set
+        # plain lists are much faster than arrays to index one element at a time during the search
+        self._neighbors = [
+            list(zip(self.indices[start:end].tolist(), self.weights[start:end].tolist()))
+            for start, end in zip(self.indptr[:-1].tolist(), self.indptr[1:].tolist())
+        ]
+        return
+
+    def __str__(self) -> str:
+        return f"Roadmap({len(self.positions)} nodes, {len(self.indices) // 2} edges)"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    @classmethod
+    def build(
+        cls,
+        map_env: Visualiser,
+        n_samples: int = 3000,
+        k: int = 10,
+        seed: int = 0,
+        max_draws_per_sample: int = 100,
+    ) -> "Roadmap":
+        """
+        Samples `n_samples` free points and connects each to its `k` nearest neighbours
+        wherever the straight edge is free. All edges are validated in one batch.
+
+        Sampling gives up after `n_samples * max_draws_per_sample` draws, so on a (nearly) blocked map
+        the roadmap has fewer nodes than asked for. Raises `ValueError` if it has fewer than two
+        """
+        rng = np.random.default_rng(seed)
+        obstacle_set = map_env.obstacle_set
+
+        # rejection sampling, in bulk
+        positions = np.zeros((0, 2))
+        draws_left = n_samples * max_draws_per_sample
+        while len(positions) < n_samples and draws_left > 0:
+            n_draws = min(2 * (n_samples - len(positions)), draws_left)
+            candidates = rng.uniform((0, 0), map_env.size, (n_draws, 2))
+            positions = np.concatenate([positions, candidates[~obstacle_set.contains_points(candidates)]])
+            draws_left -= n_draws
+        positions = positions[:n_samples]
+        if len(positions) < 2:
+            raise ValueError(f"Found {len(positions)} free points in {n_samples * max_draws_per_sample} draws")
+        if len(positions) < n_samples:
+            print(f"INFO: only found {len(positions)} of {n_samples} free points, the roadmap is partial")
+            n_samples = len(positions)
+
+        # k nearest neighbours, a block of rows at a time to bound memory
+        k = min(k, n_samples - 1)
+        sources, targets = [], []
+        for first in range(0, n_samples, 512):
+            block = positions[first : first + 512]
+            distances = np.hypot(*(block[:, None, :] - positions[None, :, :]).transpose(2, 0, 1))
+            distances[np.arange(len(block)), np.arange(first, first + len(block))] = np.inf
+            nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            sources.append(np.repeat(np.arange(first, first + len(block)), k))
+            targets.append(nearest.ravel())
+        edges = np.unique(np.sort(np.stack([np.concatenate(sources), np.concatenate(targets)], axis=1), axis=1), axis=0)
+
+        edges = edges[obstacle_set.are_segments_free(positions[edges[:, 0]], positions[edges[:, 1]])]
+        return cls._from_edges(positions, edges, obstacle_set)
+
+    @classmethod
+    def load_or_build(
+        cls, map_env: Visualiser, cache_dir: str | PathLike = DEFAULT_CACHE_DIR, **build_kwargs
+    ) -> "Roadmap":
+        """
+        Loads the roadmap of `map_env`'s layout from `cache_dir`, building (and caching) it if needed.
+        The cache key covers the format version, the map size, the obstacles and the build parameters.
+        """
+        params = {"n_samples": 3000, "k": 10, "seed": 0, **build_kwargs}
+        key = "-".join(
+            [f"v{FORMAT_VERSION}", f"{map_env.size[0]}x{map_env.size[1]}", map_env.obstacle_set.fingerprint()]
+            + [f"{name}={value}" for name, value in sorted(params.items())]
+        )
+        file = Path(cache_dir) / f"{key}.npz"
+        if file.exists():
+            return cls.load(file, map_env.obstacle_set)
+
+        roadmap = cls.build(map_env, **params)
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        roadmap.save(file)
+        return roadmap
+
+    def save(self, file: str | PathLike) -> None:
+        np.savez(
+            file,
+            positions=self.positions,
+            indptr=self.indptr,
+            indices=self.indices,
+            weights=self.weights,
+            version=FORMAT_VERSION,
+        )
+        return
+
+    @classmethod
+    def load(cls, file: str | PathLike, obstacle_set: ObstacleSet) -> "Roadmap":
+        with np.load(file) as data:
+            version = int(data["version"]) if "version" in data else 1
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported roadmap version {version}: {file}")
+            return cls(data["positions"], data["indptr"], data["indices"], data["weights"], obstacle_set)
+
+    def query(self, start, goal, k: int = 15) -> tuple[list[tuple], TreeSnapshot]:
+        """
+        Shortest path from `start` to `goal` through the roadmap (A*)
+
+        Parameters:
+        -----------
+        start, goal : tuple
+            Query end points, connected to (up to) `k` of their nearest visible roadmap nodes
+        k : int
+            How many roadmap nodes to try to connect each end point to
+
+        Returns:
+        --------
+        (list[tuple], TreeSnapshot)
+            The path (empty if start and goal are not connected), and the search tree:
+            roadmap nodes followed by the start and the goal, with A*'s parent pointers
+        """
+        n_nodes = len(self.positions)
+        start_index, goal_index = n_nodes, n_nodes + 1
+        positions = np.concatenate([self.positions, [start, goal]]).astype(float)
+        parents = np.full(n_nodes + 2, -1)
+        costs = np.full(n_nodes + 2, np.inf)
+
+        # extra edges for this query only
+        start_edges = self._connect(positions[start_index], k)
+        goal_edges = dict(self._connect(positions[goal_index], k))
+        if self.obstacle_set.is_segment_free(start, goal):
+            start_edges.append((goal_index, float(np.hypot(goal[0] - start[0], goal[1] - start[1]))))
+
+        goal_x, goal_y = float(goal[0]), float(goal[1])
+        xs, ys = positions[:, 0].tolist(), positions[:, 1].tolist()
+        best = {start_index: 0.0}
+        costs_list = [np.inf] * (n_nodes + 2)
+        parents_list = [-1] * (n_nodes + 2)
+        closed = set()
+        frontier = [(np.hypot(xs[start_index] - goal_x, ys[start_index] - goal_y), start_index)]
+        while frontier:
+            _, node = heappop(frontier)
+            if node in closed:
+                continue
+            closed.add(node)
+            costs_list[node] = best[node]
+            if node == goal_index:
+                break
+
+            neighbors = start_edges if node == start_index else self._neighbors[node]
+            if node in goal_edges:
+                neighbors = neighbors + [(goal_index, goal_edges[node])]
+            for neighbor, weight in neighbors:
+                cost = best[node] + weight
+                if neighbor not in closed and cost < best.get(neighbor, np.inf):
+                    best[neighbor] = cost
+                    parents_list[neighbor] = node
+                    heappush(frontier, (cost + np.hypot(xs[neighbor] - goal_x, ys[neighbor] - goal_y), neighbor))
+
+        parents[:] = parents_list
+        costs[:] = costs_list
+        search_tree = TreeSnapshot(positions, parents, costs)
+        path = search_tree.trace_path(goal_index) if goal_index in closed else []
+        return path, search_tree
+
+    # helpers:
+    # --------
+    def _connect(self, position, k: int) -> list[tuple[int, float]]:
+        # the `k` nearest roadmap nodes that `position` can see, with their distances
+        distances = np.hypot(*(self.positions - position).T)
+        nearest = np.argsort(distances)[:k]
+        visible = nearest[
+            self.obstacle_set.are_segments_free(np.repeat(position[None, :], len(nearest), 0), self.positions[nearest])
+        ]
+        return list(zip(visible.tolist(), distances[visible].tolist()))
+
+    @classmethod
+    def _from_edges(cls, positions, edges, obstacle_set) -> "Roadmap":
+        # symmetric CSR adjacency from a list of undirected `(i, j)` edges
+        both_ways = np.concatenate([edges, edges[:, ::-1]])
+        both_ways = both_ways[np.lexsort((both_ways[:, 1], both_ways[:, 0]))]
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(both_ways[:, 0], minlength=len(positions)))])
+        weights = np.hypot(*(positions[both_ways[:, 0]] - positions[both_ways[:, 1]]).T)
+        return cls(positions, indptr, both_ways[:, 1], weights, obstacle_set)
+
+
+class PRM:
+    """
+    A multi-query planner: the roadmap of `map_env`'s layout is built once (or loaded
+    from the on-disk cache), and every `find_path` call only searches it.
+    """
+
+    def __init__(self, map_env: Visualiser, cache_dir: str | PathLike | None = DEFAULT_CACHE_DIR, **roadmap_kwargs):
+        """
+        Parameters:
+        -----------
+        map_env : Visualiser
+            The map (its start and goal are the default query)
+        cache_dir : str | PathLike | None
+            Where roadmaps are cached, `None` to always build a fresh one
+        roadmap_kwargs
+            Passed on to `Roadmap.build` (`n_samples`, `k`, `seed`, `max_draws_per_sample`)
+        """
+        self.map_env = map_env
+        if cache_dir is None:
+            self.roadmap = Roadmap.build(map_env, **roadmap_kwargs)
+        else:
+            self.roadmap = Roadmap.load_or_build(map_env, cache_dir, **roadmap_kwargs)
+        self.nodes = TreeSnapshot.from_nodes([])  # The search tree of the last query
+
+    def find_path(self, start=None, goal=None):
+        """
+        Answers one query (by default, from `map_env.start` to `map_env.goal`)
+
+        Returns:
+        --------
+        (int | None, list[tuple])
+            The index of the goal in `self.nodes` (the search tree) and the path,
+            or `(None, [])` if start and goal are not connected through the roadmap
+        """
+        start = self.map_env.start if start is None else start
+        goal = self.map_env.goal if goal is None else goal
+        path, self.nodes = self.roadmap.query(start, goal)
+        if not path:
+            return None, []
+        return len(self.nodes.parents) - 1, path
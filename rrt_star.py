@@ -1,99 +1,83 @@
-import numpy as np
 from visualiser import Visualiser
-
-
-class Node:
-    def __init__(self, position, parent=None):
-        self.position = position  # Node Position (x coordinate, y coordinate)
-        self.parent = parent  # Reference to the parent node
-        self.cost = float("inf")  # Cost to reach this node
-
-
-class RRT_Star:
-    def __init__(self, map_env: Visualiser, step_size=5, neighbor_radius=20):
-        self.map_env = map_env
-        self.step_size = step_size
-        self.neighbor_radius = neighbor_radius
-        self.nodes = [Node(map_env.start)]
-        self.nodes[0].cost = 0
-
-    def distance(self, a, b):
-        return np.sqrt((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2)
-
-    def is_collision_free(self, node):
-        for obstacle, size in self.map_env.obstacles:
-            if (
-                obstacle[0] <= node.position[0] <= obstacle[0] + size[0]
-                and obstacle[1] <= node.position[1] <= obstacle[1] + size[1]
-            ):
-                return False
-        return True
-
-    def is_path_collision_free(self, start_pos, end_pos):
-        steps = int(self.distance(start_pos, end_pos) / self.step_size) + 1
-        dx = (end_pos[0] - start_pos[0]) / steps
-        dy = (end_pos[1] - start_pos[1]) / steps
-
-        for step in range(1, steps + 1):
-            intermediate_point = (start_pos[0] + dx * step, start_pos[1] + dy * step)
-            for obstacle, size in self.map_env.obstacles:
-                # Check if intermediate_point is inside the current obstacle
-                if (
-                    obstacle[0] <= intermediate_point[0] <= obstacle[0] + size[0]
-                    and obstacle[1] <= intermediate_point[1] <= obstacle[1] + size[1]
-                ):
-                    return False  # Path is not collision-free
-        return True  # Path is collision-free
-
-    def nearest_node(self, position):
-        return min(self.nodes, key=lambda node: self.distance(node.position, position))
-
-    def step_from_to(self, n1, n2):
-        if self.distance(n1, n2) < self.step_size:
-            return n2
-        else:
-            theta = np.arctan2(n2[1] - n1[1], n2[0] - n1[0])
-            return n1[0] + self.step_size * np.cos(theta), n1[1] + self.step_size * np.sin(theta)
-
-    def find_neighbors(self, new_node):
-        return [node for node in self.nodes if self.distance(node.position, new_node.position) < self.neighbor_radius]
-
-    def choose_best_parent(self, new_node, neighbors):
-        for neighbor in neighbors:
-            potential_cost = neighbor.cost + self.distance(neighbor.position, new_node.position)
-            if self.is_path_collision_free(neighbor.position, new_node.position) and potential_cost < new_node.cost:
-                new_node.parent = neighbor
-                new_node.cost = potential_cost
+from events import EventStream
+from budget import Budget
+from samplers import Sampler
+from planner_base import AnytimeTreePlanner, Node
+
+
+class RRT_Star(AnytimeTreePlanner):
+    def __init__(
+        self,
+        map_env: Visualiser,
+        step_size=5,
+        neighbor_radius=20,
+        events: EventStream | None = None,
+        budget: Budget | None = None,
+        sampler: Sampler | None = None,
+        neighborhood="fixed",
+        anytime=False,
+        prune_interval=100,
+    ):
+        super().__init__(
+            map_env, step_size, neighbor_radius, events, budget, sampler, neighborhood, anytime, prune_interval
+        )
 
     def rewire(self, new_node, neighbors):
-        for neighbor in neighbors:
-            potential_cost = new_node.cost + self.distance(new_node.position, neighbor.position)
-            if self.is_path_collision_free(neighbor.position, new_node.position) and potential_cost < neighbor.cost:
+        # the rewirings are independent of each other, so their edges are checked in one batch
+        costs = [new_node.cost + self.distance(new_node.position, neighbor.position) for neighbor in neighbors]
+        candidates = [i for i, cost in enumerate(costs) if cost < neighbors[i].cost]
+        free = self.are_paths_collision_free(
+            [neighbors[i].position for i in candidates], [new_node.position] * len(candidates)
+        )
+        for i, is_free in zip(candidates, free):
+            if is_free:
+                neighbor = neighbors[i]
                 neighbor.parent = new_node
-                neighbor.cost = potential_cost
+                neighbor.cost = costs[i]
+                if self.events is not None:
+                    self.events.emit(EventStream.REWIRED, neighbor)
 
     def find_path(self):
+        if self.anytime and self.budget is None:
+            raise ValueError("An anytime find_path needs a budget to stop at")
+        budget = self.budget if self.budget is not None else Budget()
+        best_node = None  # The node near the goal with the cheapest path so far
         while True:
-            random_position = (np.random.randint(0, self.map_env.size[0]), np.random.randint(0, self.map_env.size[1]))
+            if budget.spend(len(self.nodes)):
+                if best_node is not None:
+                    self.stats = budget.stats(True, len(self.nodes))
+                    return best_node, self._trace_path(best_node)
+                print(f"INFO: gave up after {budget.iterations} iterations ({budget.exhausted_by})")
+                self.stats = budget.stats(False, len(self.nodes))
+                return None, []
+            prune_due = self.prune_interval is not None and budget.iterations % self.prune_interval == 0
+            if best_node is not None and prune_due:
+                self.prune(best_node)
+            random_position = self.random_position()
             nearest = self.nearest_node(random_position)
             new_position = self.step_from_to(nearest.position, random_position)
             new_node = Node(new_position, nearest)
             new_node.cost = nearest.cost + self.distance(new_node.position, nearest.position)
 
-            if self.is_collision_free(new_node):
+            # the edge from `nearest` too, it stays `new_node`'s unless a cheaper parent is found
+            if self.is_collision_free(new_node) and self.is_path_collision_free(nearest.position, new_position):
                 neighbors = self.find_neighbors(new_node)
                 self.choose_best_parent(new_node, neighbors)
+                if self._is_bounded_out(new_node, best_node):
+                    continue
                 self.rewire(new_node, neighbors)
                 self.nodes.append(new_node)
+                self.node_index.add(new_node)
+                if self.events is not None:
+                    self.events.emit(EventStream.NODE_ADDED, new_node)
 
-                if self.distance(new_node.position, self.map_env.goal) <= self.step_size:
-                    return new_node, self._trace_path(new_node)
-
-    def _trace_path(self, final_node):
-        path = []
-        current_node = final_node
-        while current_node is not None:
-            path.append(current_node.position)
-            current_node = current_node.parent
-        path.reverse()
-        return path
+                if self.distance(new_node.position, self.map_env.goal) <= self.step_size and (
+                    best_node is None or self._solution_cost(new_node) < self._solution_cost(best_node)
+                ):
+                    best_node = new_node
+                    path = self._trace_path(new_node)
+                    if self.events is not None:
+                        self.events.emit(EventStream.PATH_IMPROVED, new_node, path)
+                    if not self.anytime:
+                        self.stats = budget.stats(True, len(self.nodes))
+                        return new_node, path
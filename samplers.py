@@ -0,0 +1,179 @@
+"""
+Samplers of the random positions the planners grow their trees towards, in place of uniform sampling over the map.
+
+Uniform samples rarely land in the corridors of maps such as `layout_maze`, and the tree only gets through
+their openings by chance. The samplers here bias the samples towards obstacle boundaries and narrow passages:
+each draws thousands of candidates at a time, filters them in bulk through the map's `ObstacleSet`
+(`contains_points`), and hands the survivors out one by one. A fraction of the samples stays uniform,
+so that the planners still explore the open space (and remain probabilistically complete).
+Points outside the map count as blocked, as if the map were walled in.
+
+`FreeSpaceSampler` instead samples the free space uniformly, without drawing candidates from the blocked space
+at all, for maps that are mostly blocked.
+
+USAGE:
+    `planner = RRT(env, sampler=BridgeSampler(env))`
+    `position = sampler.sample()`
+"""
+
+import numpy as np
+
+from visualiser import Visualiser
+from occupancy import OccupancyGrid
+
+
+class Sampler:
+    """
+    Uniform samples over the map, drawn in batches.
+    The biased samplers override `_candidates`, the batch of biased samples to hand out
+    """
+
+    def __init__(self, map_env: Visualiser, uniform_fraction: float = 0.0, batch_size=4096, seed=None) -> None:
+        """
+        Parameters:
+        -----------
+        map_env : Visualiser
+            The map, whose compiled obstacles the candidates are checked against
+        uniform_fraction : float
+            Fraction of the samples drawn uniformly over the map rather than from `_candidates`
+        batch_size : int
+            Candidates drawn (and checked) at a time
+        seed : int | None
+            Seed of the sampler's generator, `None` to seed it from `np.random` (so `np.random.seed` applies)
+        """
+        self.size = map_env.size
+        self.obstacle_set = map_env.obstacle_set
+        self.uniform_fraction = uniform_fraction
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(np.random.randint(2**31) if seed is None else seed)
+        self.candidates_drawn = 0  # Candidates drawn so far, kept or not
+        self._uniform: list = []  # uniform samples not handed out yet
+        self._biased: list = []  # biased samples not handed out yet
+        return
+
+    def __str__(self) -> str:
+        return f"{type(self).__name__}({self.uniform_fraction:.0%} uniform)"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    def sample(self) -> tuple[float, float]:
+        """
+        The next random position (which may be inside an obstacle if it was drawn uniformly)
+        """
+        if self.rng.random() >= self.uniform_fraction:
+            if not self._biased:
+                self._biased = self._candidates().tolist()
+            if self._biased:
+                return tuple(self._biased.pop())
+        # uniform, by choice or because a whole batch of candidates was filtered out
+        if not self._uniform:
+            self._uniform = self._uniform_points(self.batch_size).tolist()
+        return tuple(self._uniform.pop())
+
+    # helpers:
+    # --------
+    def _candidates(self) -> np.ndarray:
+        return self._uniform_points(self.batch_size)
+
+    def _uniform_points(self, n: int) -> np.ndarray:
+        self.candidates_drawn += n
+        return self.rng.uniform((0, 0), self.size, (n, 2))
+
+    def _blocked(self, points: np.ndarray) -> np.ndarray:
+        # inside an obstacle or outside the map
+        outside = np.any((points < 0) | (points > self.size), axis=1)
+        return outside | self.obstacle_set.contains_points(points)
+
+
+class GaussianSampler(Sampler):
+    """
+    Obstacle-boundary sampling: pairs of points a Gaussian distance apart, one of them blocked and the other free,
+    yield the free one. The samples hug the obstacles, within about `sigma` of their edges.
+    """
+
+    def __init__(self, map_env: Visualiser, sigma=10.0, uniform_fraction: float = 0.3, batch_size=4096, seed=None):
+        """
+        Parameters:
+        -----------
+        sigma : float
+            Standard deviation of the distance between the points of a pair, on each axis
+        (see `Sampler` for the others)
+        """
+        super().__init__(map_env, uniform_fraction, batch_size, seed)
+        self.sigma = sigma
+
+    def _candidates(self) -> np.ndarray:
+        first = self._uniform_points(self.batch_size)
+        second = first + self.rng.normal(0, self.sigma, first.shape)
+        first_blocked, second_blocked = self._blocked(first), self._blocked(second)
+        return np.concatenate([first[~first_blocked & second_blocked], second[first_blocked & ~second_blocked]])
+
+
+class BridgeSampler(Sampler):
+    """
+    The bridge test: pairs of points a Gaussian distance apart, both blocked, yield their midpoint if it is free.
+    The samples fall in the gaps between obstacles narrower than about `bridge_length`,
+    which is where uniform samples are scarcest.
+    """
+
+    def __init__(
+        self, map_env: Visualiser, bridge_length=50.0, uniform_fraction: float = 0.3, batch_size=4096, seed=None
+    ):
+        """
+        Parameters:
+        -----------
+        bridge_length : float
+            Standard deviation of the distance between the ends of a bridge, on each axis
+        (see `Sampler` for the others)
+        """
+        super().__init__(map_env, uniform_fraction, batch_size, seed)
+        self.bridge_length = bridge_length
+
+    def _candidates(self) -> np.ndarray:
+        first = self._uniform_points(self.batch_size)
+        first = first[self._blocked(first)]
+        second = first + self.rng.normal(0, self.bridge_length, first.shape)
+        bridges = self._blocked(second)
+        middle = (first[bridges] + second[bridges]) / 2
+        return middle[~self._blocked(middle)]
+
+
+class FreeSpaceSampler(Sampler):
+    """
+    Uniform samples from the free space only. On mostly blocked maps, the candidates are drawn uniformly from
+    the grid's `free_cells` (a list built once per grid, so each draw is O(1)), then checked against the exact
+    obstacles in bulk, which only rejects the few that fall on the blocked edges of cells. On mostly free maps,
+    where that list would cover most of the grid, they are drawn over the whole map instead, and about
+    half of them or more are kept.
+    The grid is not updated as obstacles move, so this sampler is meant for static maps.
+    """
+
+    def __init__(
+        self,
+        map_env: Visualiser,
+        grid: OccupancyGrid | None = None,
+        uniform_fraction: float = 0.0,
+        batch_size=4096,
+        seed=None,
+    ):
+        """
+        Parameters:
+        -----------
+        grid : OccupancyGrid | None
+            The map rasterised without clearance, shared by all the samplers of a layout
+            (`None`: rasterised here, at the default resolution)
+        (see `Sampler` for the others)
+        """
+        super().__init__(map_env, uniform_fraction, batch_size, seed)
+        self.grid = OccupancyGrid.from_map(map_env) if grid is None else grid
+        self.cells = self.grid.free_cells(map_env.obstacle_set) if self.grid.blocked.mean() > 0.5 else None
+
+    def _candidates(self) -> np.ndarray:
+        if self.cells is None:
+            points = self._uniform_points(self.batch_size)
+            return points[~self._blocked(points)]
+        self.candidates_drawn += self.batch_size
+        cells = self.cells[self.rng.integers(len(self.cells), size=self.batch_size)]
+        points = (cells + self.rng.random((self.batch_size, 2))) * self.grid.resolution
+        return points[~self._blocked(points)]
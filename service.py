@@ -0,0 +1,351 @@
+"""
+An asyncio planning service: planners run in a thread pool, off the event loop,
+each under a `Budget` (deadline and iteration cap) that is also used to cancel it.
+
+Requests that cannot be solved (start or goal inside an obstacle, or not connected) are
+rejected up front by a precheck on the layout's `OccupancyGrid`, without running a planner.
+Planners that take an `OccupancyGrid` of their own (such as `DT_RRT_Star`) share one per layout.
+Layouts requested by name are compiled on first use, in the thread pool too.
+A request whose budget runs out still gets an answer: the path to the tree node
+closest to the goal (status `PARTIAL`), or a `FAILED` status if the tree never left the start.
+
+USAGE:
+    `service = PlanningService(RRT_Star, max_wall_time=5)`
+    `response = await service.plan("maze", start, goal)`
+Or, as a stand-in server for load testing (one JSON request per line, or per POST to /plan):
+    `python service.py --stdio`
+    `python service.py --port 8000`
+Requests look like `{"id": 1, "layout": "maze", "start": [250, 50], "goal": [50, 450], "max_wall_time": 2}`,
+where `layout` names one of `map_layouts.layout_<name>`; `id`, `max_wall_time` and `max_iterations` are optional.
+"""
+
+import asyncio
+import json
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from copy import copy
+from inspect import signature
+from time import perf_counter
+from typing import NamedTuple
+
+import numpy as np
+
+import map_layouts
+from layout import Layout
+from visualiser import Visualiser
+from budget import Budget
+from occupancy import OccupancyGrid
+from tree_snapshot import TreeSnapshot
+from rrt import RRT
+from rrt_star import RRT_Star
+from q_rrt_star import Q_RRT_Star
+from dt_rrt_star import DT_RRT_Star
+from lazy_dt_rrt_star import Lazy_DT_RRT_Star
+
+PLANNERS = {
+    "rrt": RRT,
+    "rrt_star": RRT_Star,
+    "q_rrt_star": Q_RRT_Star,
+    "dt_rrt_star": DT_RRT_Star,
+    "lazy_dt_rrt_star": Lazy_DT_RRT_Star,
+}
+
+
+class PlanResponse(NamedTuple):
+    OK = "ok"
+    PARTIAL = "partial"
+    FAILED = "failed"
+
+    status: str
+    """
+    `OK` (the path reaches the goal), `PARTIAL` (the path ends at the tree node closest to the goal)
+    or `FAILED` (no path)
+    """
+    path: list[tuple]
+    elapsed: float
+    """
+    Wall time from the request to the response, in seconds
+    """
+    iterations: int
+    """
+    Planner iterations run
+    """
+    reason: str | None = None
+    """
+    Why the planner stopped short of the goal (see `Budget.exhausted_by`), or what went wrong
+    """
+
+
+class PlanningService:
+    """
+    Answers planning requests concurrently, one planner per request, on a shared pool of threads.
+    Cancelling the task awaiting `plan` stops its planner at its next iteration.
+    """
+
+    def __init__(
+        self,
+        planner_class=RRT_Star,
+        max_workers: int | None = None,
+        max_wall_time: float | None = 10.0,
+        max_iterations: int | None = None,
+        precheck_resolution: float | None = 5.0,
+        clearance: float = 0.0,
+        **planner_kwargs,
+    ):
+        """
+        Parameters:
+        -----------
+        planner_class : type
+            Any of the planners taking a `budget`
+        max_workers : int | None
+            Size of the thread pool (`None`: `ThreadPoolExecutor`'s default)
+        max_wall_time : float | None
+            Default deadline of a request, in seconds
+        max_iterations : int | None
+            Default iteration cap of a request
+        precheck_resolution : float | None
+            Cell size of the occupancy grids used to reject unsolvable requests, `None` for no precheck
+        clearance : float
+            How far from obstacles the start and goal must be (and how far the grid inflates them)
+        planner_kwargs
+            Passed on to the planner's constructor
+        """
+        self.planner_class = planner_class
+        self.max_wall_time = max_wall_time
+        self.max_iterations = max_iterations
+        self.planner_kwargs = planner_kwargs
+        self.precheck_resolution = precheck_resolution
+        self.clearance = clearance
+        if "debug" in signature(planner_class).parameters:
+            # no keypress debugger in a service
+            self.planner_kwargs.setdefault("debug", False)
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="planner")
+        self._maps: dict[str, Visualiser] = {}
+        self._grids: dict[str, OccupancyGrid] = {}  # for the precheck
+        self._occupancy: dict[str, OccupancyGrid] = {}  # for planners that take an `occupancy` grid
+        self._takes_occupancy = "occupancy" in signature(planner_class).parameters and "occupancy" not in planner_kwargs
+        self._loading: dict[str, asyncio.Future] = {}  # layouts being compiled, by name
+        self._budgets: set[Budget] = set()  # of the requests in flight
+
+    def add_layout(self, name: str, layout: dict | Layout) -> None:
+        """
+        Registers `layout` under `name`, compiling its obstacles (and occupancy grids) once for all its requests.
+        Blocks while it does, so `plan` calls it on the thread pool for the layouts it compiles itself
+        """
+        map_env = Visualiser(layout)
+        if self.precheck_resolution is not None:
+            grid = OccupancyGrid.from_map(map_env, self.precheck_resolution, self.clearance)
+            grid.open_labels(map_env.obstacle_set)  # computed now, rather than by the first request
+            self._grids[name] = grid
+        if self._takes_occupancy:
+            self._occupancy[name] = OccupancyGrid.from_map(map_env)
+        self._maps[name] = map_env  # last, the layout is ready once it is registered
+        return
+
+    async def plan(
+        self,
+        layout_name: str,
+        start,
+        goal,
+        max_wall_time: float | None = None,
+        max_iterations: int | None = None,
+    ) -> PlanResponse:
+        """
+        Plans from `start` to `goal` on the layout named `layout_name`
+        (registered with `add_layout`, or else one of `map_layouts.layout_<name>`)
+
+        Parameters:
+        -----------
+        max_wall_time, max_iterations : float | None, int | None
+            This request's budget, the service's defaults if `None`
+
+        Returns:
+        --------
+        PlanResponse
+            The result, `PARTIAL` or `FAILED` if the budget ran out first
+        """
+        start_time = perf_counter()
+        budget = Budget(
+            self.max_iterations if max_iterations is None else max_iterations,
+            self.max_wall_time if max_wall_time is None else max_wall_time,
+        )
+        try:
+            map_env = copy(await self._map(layout_name))  # shares the compiled obstacles
+            map_env.start, map_env.goal = tuple(start), tuple(goal)
+        except ValueError as error:
+            return PlanResponse(PlanResponse.FAILED, [], perf_counter() - start_time, 0, str(error))
+        if layout_name in self._grids:
+            reason = self._grids[layout_name].precheck(map_env.start, map_env.goal, map_env.obstacle_set)
+            if reason is not None:
+                return PlanResponse(PlanResponse.FAILED, [], perf_counter() - start_time, 0, reason)
+
+        loop = asyncio.get_running_loop()
+        self._budgets.add(budget)
+        try:
+            status, path = await loop.run_in_executor(
+                self._executor, self._run, map_env, budget, self._occupancy.get(layout_name)
+            )
+        except asyncio.CancelledError:
+            budget.cancel()
+            raise
+        except Exception as error:
+            return PlanResponse(PlanResponse.FAILED, [], perf_counter() - start_time, budget.iterations, repr(error))
+        finally:
+            self._budgets.discard(budget)
+        return PlanResponse(status, path, perf_counter() - start_time, budget.iterations, budget.exhausted_by)
+
+    async def handle(self, request: dict) -> dict:
+        """
+        Answers a JSON request (see the module docstring) with a JSON-serialisable response
+        """
+        if not isinstance(request, dict):
+            response = PlanResponse(PlanResponse.FAILED, [], 0.0, 0, "bad request: expected a JSON object")
+            return {"id": None, **response._asdict()}
+        try:
+            response = await self.plan(
+                request["layout"],
+                request["start"],
+                request["goal"],
+                request.get("max_wall_time"),
+                request.get("max_iterations"),
+            )
+        except (KeyError, TypeError) as error:
+            response = PlanResponse(PlanResponse.FAILED, [], 0.0, 0, f"bad request: {error!r}")
+        return {"id": request.get("id"), **response._asdict()}
+
+    def close(self) -> None:
+        """
+        Cancels the running planners and shuts the thread pool down
+        """
+        for budget in list(self._budgets):
+            budget.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        return
+
+    # helpers:
+    # --------
+    async def _map(self, name: str) -> Visualiser:
+        if name not in self._maps:
+            loading = self._loading.get(name)
+            if loading is None:
+                layout_func = getattr(map_layouts, f"layout_{name}", None)
+                if layout_func is None:
+                    raise ValueError(f"Unknown layout: {name}")
+                # compiled off the event loop, once however many requests are waiting for it
+                loop = asyncio.get_running_loop()
+                loading = loop.run_in_executor(self._executor, lambda: self.add_layout(name, layout_func()))
+                self._loading[name] = loading
+                loading.add_done_callback(lambda _: self._loading.pop(name, None))
+            await asyncio.shield(loading)  # a cancelled request does not cancel the others' wait
+        return self._maps[name]
+
+    def _run(self, map_env: Visualiser, budget: Budget, occupancy: OccupancyGrid | None) -> tuple[str, list[tuple]]:
+        # runs on a worker thread
+        planner_kwargs = self.planner_kwargs if occupancy is None else {**self.planner_kwargs, "occupancy": occupancy}
+        planner = self.planner_class(map_env, budget=budget, **planner_kwargs)
+        final_node, path = planner.find_path()
+        if final_node is not None:
+            return PlanResponse.OK, [(float(x), float(y)) for x, y in path]
+
+        # best effort: the path to the tree node closest to the goal
+        tree = TreeSnapshot.from_nodes(planner.nodes)
+        closest = int(np.argmin(np.hypot(*(tree.positions - map_env.goal).T)))
+        if tree.parents[closest] < 0:
+            return PlanResponse.FAILED, []
+        return PlanResponse.PARTIAL, tree.trace_path(closest)
+
+
+async def serve_stdio(service: PlanningService) -> None:
+    """
+    Reads one JSON request per line from `stdin` and writes one JSON response per line to `stdout`,
+    as each completes (responses carry the request's `id`), until `stdin` is closed.
+    Everything else printed meanwhile goes to `stderr`
+    """
+    loop = asyncio.get_running_loop()
+    pending = set()
+    responses = sys.stdout
+
+    async def answer(line: str):
+        try:
+            response = await service.handle(json.loads(line))
+        except json.JSONDecodeError as error:
+            response = {"id": None, "status": PlanResponse.FAILED, "reason": f"bad request: {error}"}
+        print(json.dumps(response), file=responses, flush=True)
+
+    with redirect_stdout(sys.stderr):  # keeps the planners' logs out of the responses
+        while line := await loop.run_in_executor(None, sys.stdin.readline):
+            if line.strip():
+                task = asyncio.create_task(answer(line))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        await asyncio.gather(*pending)
+    return
+
+
+async def serve_http(service: PlanningService, host: str = "127.0.0.1", port: int = 8000) -> None:
+    """
+    A minimal HTTP/1.1 server: `POST /plan` with a JSON request, one request per connection.
+    A client that disconnects early cancels its planner.
+    """
+
+    async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            method, target, _ = (await reader.readline()).decode().split(" ", 2)
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode().partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            if (method, target) != ("POST", "/plan"):
+                status, response = "404 Not Found", {"status": PlanResponse.FAILED, "reason": "POST /plan only"}
+            else:
+                planning = asyncio.create_task(service.handle(json.loads(body)))
+                disconnected = asyncio.create_task(reader.read())  # returns at EOF
+                done, _ = await asyncio.wait({planning, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if planning not in done:
+                    planning.cancel()
+                    writer.close()
+                    return
+                disconnected.cancel()
+                status, response = "200 OK", planning.result()
+        except (ValueError, asyncio.IncompleteReadError) as error:
+            status, response = "400 Bad Request", {"status": PlanResponse.FAILED, "reason": f"bad request: {error}"}
+
+        payload = json.dumps(response).encode()
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+        return
+
+    server = await asyncio.start_server(handle_connection, host, port)
+    print(f"INFO: serving on http://{host}:{port}/plan")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Planning service stand-in, for load testing")
+    parser.add_argument("--planner", choices=PLANNERS, default="rrt_star")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-wall-time", type=float, default=10.0)
+    parser.add_argument("--max-iterations", type=int, default=None)
+    parser.add_argument("--stdio", action="store_true", help="serve on stdin/stdout rather than HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    service = PlanningService(PLANNERS[args.planner], args.workers, args.max_wall_time, args.max_iterations)
+    try:
+        asyncio.run(serve_stdio(service) if args.stdio else serve_http(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
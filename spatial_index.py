@@ -0,0 +1,225 @@
+"""
+A spatial index of a planner's tree, for its nearest-node and neighbourhood queries.
+
+The RRT* variants used to scan the whole tree for both queries, so each iteration cost O(n).
+`NodeIndex` buckets the nodes into a uniform grid of square cells (a dict from cell to nodes, so that
+empty space costs nothing), and a query only visits the cells around its position. The cells halve
+whenever they hold too many nodes on average, so a query visits a bounded number of nodes as the tree grows.
+
+It also sets the size of the neighbourhoods (`neighborhood`):
+    - `"fixed"`:     the nodes within a fixed `radius`, as the planners always did
+    - `"shrinking"`: the nodes within γ (log n / n)^(1/d) of RRT* (Karaman & Frazzoli, 2011),
+                     which holds O(log n) nodes on average
+    - `"k_nearest"`: the k = e log n nearest nodes of RRT*-k
+"""
+
+import math
+from heapq import nsmallest
+from operator import itemgetter
+
+NEIGHBORHOODS = ("fixed", "shrinking", "k_nearest")
+
+
+def shrinking_radius(n_nodes: int, free_area: float) -> float:
+    """
+    RRT*'s neighbourhood radius γ (log n / n)^(1/d) in 2D, with γ at the lower bound
+    2 (1 + 1/d)^(1/d) (μ(X_free) / ζ_d)^(1/d) of its asymptotic optimality (ζ_d = π, the area of the unit disc)
+    """
+    if n_nodes < 2:
+        return math.inf
+    gamma = 2 * math.sqrt(1.5) * math.sqrt(free_area / math.pi)
+    return gamma * math.sqrt(math.log(n_nodes) / n_nodes)
+
+
+def k_nearest_count(n_nodes: int) -> int:
+    """
+    RRT*-k's number of neighbours, k = e log n (at least 1)
+    """
+    return max(1, math.ceil(math.e * math.log(max(n_nodes, 1))))
+
+
+class NodeIndex:
+    """
+    The nodes of a tree (objects with a `.position`), bucketed by grid cell
+    """
+
+    def __init__(
+        self, size, neighborhood: str = "fixed", radius: float = 20.0, nodes=(), max_per_cell: int = 8
+    ) -> None:
+        """
+        Parameters:
+        -----------
+        size : tuple
+            Width and height of the map, whose area stands in for that of the free space in `"shrinking"`
+        neighborhood : str
+            Which nodes `neighbors` returns, one of `NEIGHBORHOODS` (see the module docstring)
+        radius : float
+            Radius of the `"fixed"` neighbourhoods, and the initial size of the cells
+        nodes : Iterable
+            Nodes to start with
+        max_per_cell : int
+            Average number of nodes per occupied cell above which the cells are halved (down to `radius / 64`)
+        """
+        if neighborhood not in NEIGHBORHOODS:
+            raise ValueError(f"Unknown neighbourhood {neighborhood!r}, expected one of {NEIGHBORHOODS}")
+        self.neighborhood = neighborhood
+        self.radius = radius
+        self.free_area = size[0] * size[1]
+        self.max_per_cell = max_per_cell
+        self.cell_size = float(radius)
+        self.min_cell_size = radius / 64  # so that nodes piling up at one position cannot halve the cells forever
+        self.rebuild(nodes)
+        return
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __str__(self) -> str:
+        cells = f"{len(self._cells)} cells of {self.cell_size:g}"
+        return f"NodeIndex({self._count} nodes in {cells}, {self.neighborhood} neighbourhoods)"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    def add(self, node) -> None:
+        x, y = float(node.position[0]), float(node.position[1])
+        key = (int(x // self.cell_size), int(y // self.cell_size))
+        cell = self._cells.get(key)
+        if cell is None:
+            self._cells[key] = [(x, y, node)]
+        else:
+            cell.append((x, y, node))
+        self._count += 1
+        if self._count > self.max_per_cell * len(self._cells) and self.cell_size > self.min_cell_size:
+            self.cell_size /= 2
+            self.rebuild(self.nodes())
+        return
+
+    def discard(self, nodes: set) -> None:
+        """
+        Removes `nodes` from the index, only visiting the cells they are in
+        """
+        keys = set()
+        for node in nodes:
+            x, y = float(node.position[0]), float(node.position[1])
+            keys.add((int(x // self.cell_size), int(y // self.cell_size)))
+        for key in keys:
+            cell = self._cells.get(key)
+            if cell is None:
+                continue
+            kept = [entry for entry in cell if entry[2] not in nodes]
+            self._count -= len(cell) - len(kept)
+            if kept:
+                self._cells[key] = kept
+            else:
+                del self._cells[key]
+        return
+
+    def rebuild(self, nodes) -> None:
+        """
+        Re-indexes the tree from scratch, e.g. after many of its nodes moved or were removed
+        """
+        # `(x, y, node)` by cell, the coordinates as Python floats (much faster to do arithmetic on than
+        # the NumPy scalars that positions are often made of)
+        self._cells: dict[tuple[int, int], list[tuple[float, float, object]]] = {}
+        self._count = 0
+        for node in nodes:
+            x, y = float(node.position[0]), float(node.position[1])
+            self._cells.setdefault((int(x // self.cell_size), int(y // self.cell_size)), []).append((x, y, node))
+            self._count += 1
+        return
+
+    def nodes(self) -> list:
+        return [node for cell in self._cells.values() for _, _, node in cell]
+
+    def neighbors(self, position) -> list:
+        """
+        The neighbourhood of `position` in a tree of the current size (see the module docstring)
+        """
+        if self.neighborhood == "k_nearest":
+            return self.k_nearest(position, k_nearest_count(self._count))
+        if self.neighborhood == "shrinking":
+            return self.within(position, shrinking_radius(self._count, self.free_area))
+        return self.within(position, self.radius)
+
+    def within(self, position, radius: float) -> list:
+        """
+        The nodes closer than `radius` to `position`
+        """
+        return [node for _, node in self._within(position, radius)]
+
+    def nearest(self, position):
+        """
+        The node closest to `position` (`None` if there is none)
+        """
+        x, y = float(position[0]), float(position[1])
+        size = self.cell_size
+        ci, cj = int(x // size), int(y // size)
+        nearest, nearest_distance = None, math.inf  # squared distance
+        visited = 0
+        ring = 0
+        while visited < len(self._cells):
+            if ring == 0:
+                keys = [(ci, cj)]
+            else:
+                keys = [(ci + di, cj + dj) for di in (-ring, ring) for dj in range(-ring, ring + 1)]
+                keys += [(ci + di, cj + dj) for dj in (-ring, ring) for di in range(-ring + 1, ring)]
+            for key in keys:
+                cell = self._cells.get(key)
+                if cell is not None:
+                    visited += 1
+                    for node_x, node_y, node in cell:
+                        distance = (node_x - x) * (node_x - x) + (node_y - y) * (node_y - y)
+                        if distance < nearest_distance:
+                            nearest, nearest_distance = node, distance
+            # every node beyond this ring is at least `reach` away
+            reach = min(x - (ci - ring) * size, (ci + ring + 1) * size - x, y - (cj - ring) * size)
+            reach = min(reach, (cj + ring + 1) * size - y)
+            if nearest_distance <= reach * reach:
+                break
+            if (2 * ring + 1) ** 2 > self._count:
+                # the tree is sparse around `position`, scanning it all is cheaper than more empty rings
+                return min(self._within(position, math.inf), key=itemgetter(0))[1]
+            ring += 1
+        return nearest
+
+    def k_nearest(self, position, k: int) -> list:
+        """
+        The `k` nodes closest to `position`, closest first
+        """
+        if k >= self._count:
+            return [node for _, node in sorted(self._within(position, math.inf), key=itemgetter(0))]
+        # a disc expected to hold 2k nodes at the tree's average density (over the cells it occupies),
+        # doubled until it holds at least k: all the nodes within it are found, so its k closest are exact
+        covered_area = len(self._cells) * self.cell_size**2
+        radius = math.sqrt(2 * k * covered_area / (math.pi * self._count))
+        while True:
+            candidates = self._within(position, radius)
+            if len(candidates) >= k:
+                return [node for _, node in nsmallest(k, candidates, key=itemgetter(0))]
+            radius *= 2
+
+    def _within(self, position, radius: float) -> list:
+        """
+        `(squared distance, node)` of the nodes closer than `radius` to `position`
+        """
+        x, y = float(position[0]), float(position[1])
+        cells = self._cells.values()
+        if radius < math.inf:
+            size = self.cell_size
+            i_min, i_max = int((x - radius) // size), int((x + radius) // size)
+            j_min, j_max = int((y - radius) // size), int((y + radius) // size)
+            if (i_max - i_min + 1) * (j_max - j_min + 1) <= len(self._cells):  # else cheaper to go through them all
+                cells = (
+                    self._cells[i, j]
+                    for i in range(i_min, i_max + 1)
+                    for j in range(j_min, j_max + 1)
+                    if (i, j) in self._cells
+                )
+        squared_radius = radius * radius
+        return [
+            (distance, node)
+            for cell in cells
+            for node_x, node_y, node in cell
+            if (distance := (node_x - x) * (node_x - x) + (node_y - y) * (node_y - y)) < squared_radius
+        ]
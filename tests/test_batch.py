@@ -0,0 +1,37 @@
+import pytest
+
+import batch
+from budget import Budget
+from dt_rrt_star import DT_RRT_Star
+from map_layouts import layout_simple_cross
+from occupancy import OccupancyGrid
+from rrt_star import RRT_Star
+
+
+def test_worker_shares_one_grid_between_queries():
+    batch._init_worker(layout_simple_cross(), DT_RRT_Star, {"step_size": 5})
+    grid = batch._planner_kwargs["occupancy"]
+    assert isinstance(grid, OccupancyGrid)
+    assert batch._planner_kwargs["step_size"] == 5
+
+    batch._init_worker(layout_simple_cross(), RRT_Star, {})
+    assert "occupancy" not in batch._planner_kwargs
+
+
+def test_every_query_gets_a_fresh_budget():
+    batch._init_worker(layout_simple_cross(), RRT_Star, {}, (20_000, None))
+    results = [batch._answer_query(((20.0, 20.0), (480.0, 480.0))) for _ in range(3)]
+    assert all(result.path for result in results)
+
+
+def test_unsolvable_queries_stop_at_the_budget():
+    # the goal is inside the cross's vertical bar, and without the precheck only the budget stops the planner
+    (result,) = batch.plan_batch(
+        layout_simple_cross(), [((20, 20), (250, 250))], RRT_Star, 1, precheck_resolution=None, max_iterations=500
+    )
+    assert result.path == [] and result.reason is None
+
+
+def test_plan_batch_rejects_a_shared_budget():
+    with pytest.raises(ValueError):
+        batch.plan_batch(layout_simple_cross(), [((20, 20), (480, 480))], RRT_Star, budget=Budget(max_iterations=10))
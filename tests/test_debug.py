@@ -0,0 +1,67 @@
+from threading import Event, Thread
+from time import sleep
+
+import debug
+from debug import DebugHook, Interjektor
+
+
+class Node:
+    def __init__(self, position, parent=None):
+        self.position = position
+        self.parent = parent
+        self.cost = 0.0
+
+
+class Planner:
+    def __init__(self):
+        self.debug_hook = DebugHook()
+        self.nodes = [Node((0.0, 0.0))]
+
+    def run(self, stop: Event):
+        debug_hook = self.debug_hook
+        while not stop.is_set():
+            if debug_hook.requested:
+                debug_hook.service(self)
+
+
+def test_snapshot_requested_while_paused_is_served():
+    planner, stop = Planner(), Event()
+    loop = Thread(target=planner.run, args=(stop,), daemon=True)
+    loop.start()
+    try:
+        assert planner.debug_hook.request_pause(timeout=5)
+        snapshots = []
+        snapshotter = Thread(target=lambda: snapshots.append(planner.debug_hook.request_snapshot(timeout=5)))
+        snapshotter.start()
+        sleep(0.1)  # the snapshot is requested while the planner is paused
+        planner.debug_hook.resume()
+        snapshotter.join()
+        assert snapshots[0] is not None
+        assert len(snapshots[0].parents) == 1
+    finally:
+        stop.set()
+        loop.join()
+
+
+def test_interjektor_stop_joins():
+    daemon = Interjektor(DebugHook())
+    daemon.start()
+    daemon.stop()
+    assert not daemon.is_alive()
+
+
+def test_interjektor_stop_returns_when_a_pause_is_never_served(monkeypatch):
+    # a key pressed after the planner's loop last polled the hook: nothing will ever serve the pause
+    monkeypatch.setattr(debug, "wait_for_keypress", lambda stop=None, poll_interval=0.1: True)
+    hook = DebugHook()
+    daemon = Interjektor(hook, poll_interval=0.01)
+    daemon.start()
+    for _ in range(500):
+        if hook.requested:  # the pause was requested
+            break
+        sleep(0.01)
+    stopper = Thread(target=daemon.stop, daemon=True)
+    stopper.start()
+    stopper.join(5)
+    assert not stopper.is_alive() and not daemon.is_alive()
+    assert not hook.requested and not hook.is_paused
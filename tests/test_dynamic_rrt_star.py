@@ -0,0 +1,40 @@
+import random
+
+import numpy as np
+
+import shapes
+from budget import Budget
+from dynamic_rrt_star import Dynamic_RRT_Star
+from events import EventStream
+from layout import Layout
+from map_layouts import layout_simple_cross
+from obstacle import DynamicObstacle
+from visualiser import Visualiser
+
+
+def test_replan_avoids_moved_obstacle_on_a_refilled_budget():
+    random.seed(0)
+    np.random.seed(0)
+    blocker = DynamicObstacle((300, 40), (0, 1), shapes.Rectangle, (20, 20))
+    layout = Layout(size=(200, 200), start=(20, 20), end=(180, 180), dynamic_obstacles=[blocker])
+    budget = Budget(max_iterations=2000)  # about what each cycle needs, not all of them
+    planner = Dynamic_RRT_Star(Visualiser(layout), budget=budget)
+    assert planner.find_path()[0] is not None
+
+    for _ in range(2):
+        # park the obstacle across the current path, as the layout moves it
+        path = planner._trace_path(planner.goal_node)
+        x, y = path[len(path) // 2]
+        blocker.anchor_point.components[:] = [x - 10, y - 10]
+        goal_node, path = planner.replan(path[1], layout.static_obstacles + layout.dynamic_obstacles)
+
+        assert goal_node is not None, planner.stats
+        obstacle_set = planner.map_env.obstacle_set
+        assert obstacle_set.contains_point((x, y))
+        assert all(obstacle_set.is_segment_free(a, b) for a, b in zip(path, path[1:]))
+
+
+def test_positional_arguments_match_rrt_star():
+    events, budget = EventStream(), Budget()
+    planner = Dynamic_RRT_Star(Visualiser(layout_simple_cross()), 5, 20, events, budget)
+    assert (planner.events, planner.budget, planner.max_replan_iterations) == (events, budget, 5000)
@@ -0,0 +1,47 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+
+from budget import Budget
+from events import EventStream
+from map_layouts import layout_simple_cross
+from rrt_star import Node, RRT_Star
+from visualiser import LiveVisualiser, Visualiser
+
+
+def test_node_ids_are_never_reused():
+    events = EventStream()
+    seen = set()
+    for _ in range(1000):
+        node = Node((0.0, 0.0))  # freed at the next iteration, `id()` would often repeat
+        events.emit(EventStream.NODE_ADDED, node)
+        seen.add(events.node_id(node))
+    assert len(seen) == 1000
+
+
+def edges(visualiser):
+    return sorted(tuple(map(tuple, segment)) for segment in visualiser._segments[: len(visualiser._row_ids)].tolist())
+
+
+def test_live_visualiser_resyncs_after_dropped_events():
+    np.random.seed(0)
+    map_env = Visualiser(layout_simple_cross())
+    planner = RRT_Star(map_env, events=EventStream(max_events=50), budget=Budget(max_iterations=10_000), anytime=True)
+
+    # the visualiser's state, without its window and planner thread
+    visualiser = LiveVisualiser.__new__(LiveVisualiser)
+    visualiser.planner, visualiser.events, visualiser.max_events_per_frame = planner, planner.events, 20_000
+    visualiser._segments, visualiser._row_ids, visualiser._rows = np.empty((1024, 2, 2)), [], {}
+    visualiser._dropped = 0
+    visualiser.tree, visualiser.path = LineCollection([]), Line2D([], [])
+
+    planner.find_path()
+    assert planner.events.dropped > 0 and planner.nodes_pruned > 0
+    visualiser.update(0)
+
+    expected = sorted((tuple(node.position), tuple(node.parent.position)) for node in planner.nodes[1:])
+    assert edges(visualiser) == [tuple(map(tuple, edge)) for edge in expected]
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from layout_file import LayoutFile
+from map_layouts import layout_maze
+from obstacle_set import ObstacleSet
+from occupancy import OccupancyGrid
+from visualiser import Visualiser
+
+
+def assert_same_layout(saved: LayoutFile, loaded: LayoutFile):
+    assert (loaded.name, loaded.size, loaded.start, loaded.goal) == (saved.name, saved.size, saved.start, saved.goal)
+    assert np.array_equal(loaded.obstacle_set.rectangles, saved.obstacle_set.rectangles)
+    assert np.array_equal(loaded.obstacle_set.circles, saved.obstacle_set.circles)
+    assert np.array_equal(loaded.dynamic, saved.dynamic)
+
+
+def sample_layout() -> LayoutFile:
+    layout = LayoutFile.from_layout(layout_maze(), name="maze")
+    layout.obstacle_set = ObstacleSet(layout.obstacle_set.rectangles, [(100, 100, 12), (400, 50, 5)])
+    layout.dynamic = np.array([[1, 250, 250, 10, 0, 1, -1], [0, 50, 300, 20, 10, 0, 2]], dtype=float)
+    return layout
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_compiled_round_trip(tmp_path, mmap):
+    layout = sample_layout().compile(grid_resolution=5.0)
+    layout.save(tmp_path / "maze.rrtmap")
+    loaded = LayoutFile.load(tmp_path / "maze.rrtmap", mmap=mmap)
+    assert_same_layout(layout, loaded)
+    for saved, read in zip(layout.obstacle_set.tile_index(), loaded.obstacle_set.tile_index()):
+        assert np.array_equal(saved, read)
+    assert loaded.occupancy.resolution == layout.occupancy.resolution
+    assert np.array_equal(loaded.occupancy.blocked, layout.occupancy.blocked)
+
+    points = np.random.default_rng(0).uniform(0, 500, (1000, 2))
+    assert np.array_equal(loaded.obstacle_set.contains_points(points), layout.obstacle_set.contains_points(points))
+
+
+def test_precompiled_grid_is_reused(tmp_path):
+    layout = LayoutFile.from_layout(layout_maze()).compile(grid_resolution=5.0)
+    layout.save(tmp_path / "maze.rrtmap")
+    map_env = Visualiser(LayoutFile.load(tmp_path / "maze.rrtmap"))
+    assert OccupancyGrid.from_map(map_env) is map_env.occupancy
+
+
+@pytest.mark.parametrize("suffix", [".json", ".yaml"])
+def test_authored_round_trip(tmp_path, suffix):
+    if suffix == ".yaml":
+        pytest.importorskip("yaml")
+    layout = sample_layout()
+    layout.write(tmp_path / f"maze{suffix}")
+    assert_same_layout(layout, LayoutFile.read(tmp_path / f"maze{suffix}"))
+
+
+def test_load_or_compile_recompiles_when_the_source_changes(tmp_path):
+    source = tmp_path / "maze.json"
+    layout = sample_layout()
+    layout.write(source)
+    assert_same_layout(layout, LayoutFile.load_or_compile(source))
+    assert (tmp_path / "maze.json.rrtmap").exists()
+
+    layout.start = (30.0, 30.0)
+    layout.write(source)
+    assert LayoutFile.load_or_compile(source).start == (30.0, 30.0)
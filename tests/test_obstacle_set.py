@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+import shapes
+from layout import Layout
+from obstacle import DynamicObstacle, StaticObstacle
+from obstacle_set import ObstacleSet
+
+
+def random_obstacles(rng, n):
+    rectangles = np.column_stack([rng.uniform(0, 450, (n, 2)), rng.uniform(2, 50, (n, 2))])
+    circles = np.column_stack([rng.uniform(0, 500, (n, 2)), rng.uniform(2, 25, n)])
+    return rectangles, circles
+
+
+def contains_point_per_shape(rectangles, circles, point):
+    # the checks the planners made, one obstacle at a time, before `ObstacleSet`
+    x, y = point
+    for ox, oy, width, height in rectangles:
+        if ox <= x <= ox + width and oy <= y <= oy + height:
+            return True
+    for cx, cy, radius in circles:
+        if (x - cx) ** 2 + (y - cy) ** 2 <= radius**2:
+            return True
+    return False
+
+
+def segment_free_sampled(rectangles, circles, start, end, resolution=0.002):
+    n = max(2, int(np.hypot(end[0] - start[0], end[1] - start[1]) / resolution) + 1)
+    points = np.asarray(start) + np.linspace(0, 1, n)[:, None] * (np.asarray(end) - np.asarray(start))
+    return not ObstacleSet(rectangles, circles).contains_points(points).any()
+
+
+@pytest.mark.parametrize("n", [10, 200])  # below and above `INDEX_THRESHOLD`
+def test_contains_matches_per_shape_checks(n):
+    rng = np.random.default_rng(n)
+    rectangles, circles = random_obstacles(rng, n)
+    obstacle_set = ObstacleSet(rectangles, circles)
+    points = rng.uniform(-10, 510, (2000, 2))
+    expected = [contains_point_per_shape(rectangles.tolist(), circles.tolist(), point) for point in points.tolist()]
+    assert obstacle_set.contains_points(points).tolist() == expected
+    assert [obstacle_set.contains_point(point) for point in points] == expected
+
+
+@pytest.mark.parametrize("n", [10, 200])
+def test_segments_match_fine_sampling(n):
+    rng = np.random.default_rng(n)
+    rectangles, circles = random_obstacles(rng, n)
+    obstacle_set = ObstacleSet(rectangles, circles)
+    starts = rng.uniform(0, 500, (300, 2))
+    ends = starts + rng.uniform(-30, 30, (300, 2))
+    expected = [segment_free_sampled(rectangles, circles, start, end) for start, end in zip(starts, ends)]
+    assert obstacle_set.are_segments_free(starts, ends).tolist() == expected
+    assert [obstacle_set.is_segment_free(start, end) for start, end in zip(starts, ends)] == expected
+
+
+def test_segment_touching_a_corner_is_blocked():
+    # obstacles are closed, as in `contains_point`
+    obstacle_set = ObstacleSet(rectangles=[(10, 10, 10, 10)], circles=[(50, 50, 5)])
+    assert not obstacle_set.is_segment_free((0, 20), (20, 0))  # touches the corner (10, 10) only
+    assert obstacle_set.is_segment_free((0, 19.99), (19.99, 0))
+    assert not obstacle_set.is_segment_free((40, 55), (60, 55))  # tangent to the circle
+    assert obstacle_set.is_segment_free((40, 55.01), (60, 55.01))
+
+
+def test_refresh_follows_moving_obstacles():
+    movers = [
+        DynamicObstacle((100, 100), (3, -1), shapes.Rectangle, (20, 10)),
+        DynamicObstacle((300, 200), (-2, 2), shapes.Circle, (15,)),
+    ]
+    layout = Layout(static_obstacles=[StaticObstacle((50, 50), shapes.Circle, (8,))], dynamic_obstacles=movers)
+    obstacle_set = ObstacleSet.from_layout(layout)
+    assert len(obstacle_set) == 4 + 1 + 2  # the borders too
+    for mover in movers:
+        mover.move(10)
+    obstacle_set.refresh(layout.static_obstacles + layout.dynamic_obstacles)
+    moved = ObstacleSet.from_layout(layout)
+    assert np.array_equal(obstacle_set.rectangles, moved.rectangles)
+    assert np.array_equal(obstacle_set.circles, moved.circles)
+    assert obstacle_set.contains_point((135, 92)) and not obstacle_set.contains_point((105, 105))
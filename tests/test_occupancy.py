@@ -0,0 +1,95 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+from map_layouts import layout_urban
+from occupancy import OccupancyGrid
+from samplers import FreeSpaceSampler
+from visualiser import Visualiser
+
+
+def walled_in_goal():
+    # a 5-unit thick square wall around the goal
+    return {
+        "size": (200, 200),
+        "start": (10, 10),
+        "goal": (100, 100),
+        "obstacles": [((80, 80), (40, 5)), ((80, 115), (40, 5)), ((80, 80), (5, 40)), ((115, 80), (5, 40))],
+    }
+
+
+def test_precheck_accepts_start_in_blocked_cell():
+    # the cell (84, 6) is blocked, but the start has a clear line to the free cell (83, 6)
+    env = Visualiser(layout_urban())
+    grid = OccupancyGrid.from_map(env)
+    start = (420.66, 33.35)
+    assert grid.blocked[grid.cell(start)]
+    assert not env.obstacle_set.contains_point(start)
+    assert grid.precheck(start, env.goal, env.obstacle_set) is None
+
+
+def test_precheck_accepts_passage_narrower_than_a_cell():
+    layout = {
+        "size": (100, 100),
+        "start": (10, 50),
+        "goal": (90, 50),
+        "obstacles": [((42, 0), (16, 49)), ((42, 51), (16, 49))],  # a wall with a 2-unit gap
+    }
+    env = Visualiser(layout)
+    grid = OccupancyGrid.from_map(env, resolution=10)
+    assert grid.labels()[grid.cell(env.start)] != grid.labels()[grid.cell(env.goal)]
+    assert grid.precheck(env.start, env.goal, env.obstacle_set) is None
+
+
+def test_precheck_rejects():
+    env = Visualiser(walled_in_goal())
+    grid = OccupancyGrid.from_map(env)
+    assert grid.precheck(env.start, env.goal, env.obstacle_set) == "start and goal are not connected"
+    assert grid.precheck((82, 100), env.goal, env.obstacle_set) == "start is inside an obstacle"
+    assert grid.precheck(env.start, (250, 10), env.obstacle_set) == "goal is outside the map"
+    inflated = OccupancyGrid.from_map(env, clearance=3)
+    assert inflated.precheck((78, 100), (10, 10), env.obstacle_set) == "start is too close to an obstacle"
+
+
+def bfs_components(free):
+    # reference labelling: breadth-first search from each unlabelled free cell, in row-major order
+    labels = np.zeros(free.shape, dtype=int)
+    nx, ny = free.shape
+    n_labels = 0
+    for cell in zip(*np.nonzero(free)):
+        if labels[cell]:
+            continue
+        n_labels += 1
+        labels[cell] = n_labels
+        queue = deque([cell])
+        while queue:
+            i, j = queue.popleft()
+            for ni, nj in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)):
+                if 0 <= ni < nx and 0 <= nj < ny and free[ni, nj] and not labels[ni, nj]:
+                    labels[ni, nj] = n_labels
+                    queue.append((ni, nj))
+    return labels
+
+
+@pytest.mark.parametrize("density", [0.2, 0.45, 0.6])
+def test_labels_match_bfs(density):
+    blocked = np.random.default_rng(int(density * 100)).random((60, 45)) < density
+    grid = OccupancyGrid(blocked, 5.0)
+    assert np.array_equal(grid.labels(), bfs_components(~blocked))
+
+
+def test_labels_of_a_map_match_bfs():
+    grid = OccupancyGrid.from_map(Visualiser(layout_urban()))
+    assert np.array_equal(grid.labels(), bfs_components(~grid.blocked))
+
+
+def test_free_cells_cover_passages_narrower_than_a_cell():
+    # a 1.5 wide vertical passage inside cell column 20, whose centres (x = 102.5) are all in the right wall
+    map_env = Visualiser({"size": (200, 100), "obstacles": [((0, 0), (100.5, 100)), ((102, 0), (98, 100))]})
+    grid = OccupancyGrid.from_map(map_env)
+    assert grid.blocked.all()
+    assert set(map(tuple, grid.free_cells(map_env.obstacle_set).tolist())) == {(20, j) for j in range(20)}
+
+    points = np.array([FreeSpaceSampler(map_env, grid, seed=0).sample() for _ in range(100)])
+    assert ((100.5 < points[:, 0]) & (points[:, 0] < 102)).all()
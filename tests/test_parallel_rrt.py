@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+from map_layouts import layout_maze
+from parallel_rrt import ParallelRRT
+from visualiser import Visualiser
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_tree_edges_never_clip_obstacles(n_workers):
+    maze = Visualiser(layout_maze())
+    planner = ParallelRRT(maze, n_workers=n_workers, seed=0)
+    final_index, path = planner.find_path()
+    assert final_index is not None and path[0] == tuple(maze.start)
+
+    tree = planner.nodes
+    children = np.flatnonzero(tree.parents >= 0)
+    starts, ends = tree.positions[tree.parents[children]], tree.positions[children]
+    assert maze.obstacle_set.are_segments_free(starts, ends, step_size=0.05).all()
@@ -0,0 +1,102 @@
+import random
+
+import numpy as np
+import pytest
+
+from budget import Budget
+from dt_rrt_star import DT_RRT_Star
+from events import EventStream
+from lazy_dt_rrt_star import Lazy_DT_RRT_Star
+from map_layouts import layout_maze, layout_simple_cross
+from obstacle_set import ObstacleSet
+from path_processing import densify, path_length, shortcut_greedy, shortcut_random, smooth_path
+from visualiser import Visualiser
+
+CROSS = ObstacleSet.from_tuples(layout_simple_cross()["obstacles"])
+
+
+def blocked_length(path, obstacle_set, resolution=0.01) -> float:
+    # length of the path inside obstacles, sampled far finer than any planner does
+    length = 0.0
+    for start, end in zip(path, path[1:]):
+        start, end = np.asarray(start, dtype=float), np.asarray(end, dtype=float)
+        n = max(2, int(np.hypot(*(end - start)) / resolution) + 1)
+        points = start + np.linspace(0, 1, n)[:, None] * (end - start)
+        length += obstacle_set.contains_points(points).mean() * np.hypot(*(end - start))
+    return length
+
+
+def test_shortcut_does_not_clip_corner():
+    # going straight from the first to the last point clips the corner (275, 100) of the vertical bar,
+    # between points tested 5 apart
+    path = [(270, 98), (279, 98), (279, 103)]
+    assert blocked_length(path, CROSS) == 0
+    assert blocked_length(path[::2], CROSS) > 0
+    assert CROSS.is_segment_free(path[0], path[2], 5)
+    assert shortcut_greedy(path, CROSS) == path
+    assert shortcut_random(path, CROSS, rng=np.random.default_rng(0)) == path
+
+
+def test_shortcut_keeps_blocked_input_segment():
+    path = [(200, 250), (300, 250), (300, 300)]
+    assert shortcut_greedy(path, CROSS) == path
+
+
+def test_smooth_path_shortens_and_stays_free():
+    path = densify([(10, 10), (490, 10), (490, 490)], 5)
+    smoothed = smooth_path(path, CROSS, 5, densify_to_step=True)
+    assert smoothed[0] == path[0] and smoothed[-1] == path[-1]
+    assert path_length(smoothed) < path_length(path)
+    assert blocked_length(smoothed, CROSS) == 0
+
+
+def random_free_walk(rng, obstacle_set, start, n_points=60, step=25):
+    # a free path of random steps, every segment checked far finer than any planner does
+    path = [start]
+    while len(path) < n_points:
+        point = tuple((np.asarray(path[-1]) + rng.uniform(-step, step, 2)).tolist())
+        if blocked_length([path[-1], point], obstacle_set) == 0:
+            path.append(point)
+    return path
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_shortcuts_are_valid(seed):
+    rng = np.random.default_rng(seed)
+    maze = Visualiser(layout_maze())
+    path = random_free_walk(rng, maze.obstacle_set, maze.start)
+    for shortcut in (
+        shortcut_greedy(path, maze.obstacle_set),
+        shortcut_random(path, maze.obstacle_set, rng=np.random.default_rng(seed)),
+    ):
+        assert shortcut[0] == path[0] and shortcut[-1] == path[-1]
+        assert all(point in path for point in shortcut)  # a subsequence of the input
+        assert [path.index(point) for point in shortcut] == sorted(path.index(point) for point in shortcut)
+        assert path_length(shortcut) <= path_length(path)
+        assert blocked_length(shortcut, maze.obstacle_set) == 0
+
+
+@pytest.mark.parametrize("planner_class", [DT_RRT_Star, Lazy_DT_RRT_Star])
+@pytest.mark.parametrize("seed", range(3))
+def test_dt_paths_stay_free(planner_class, seed):
+    np.random.seed(seed)
+    random.seed(seed)
+    env = Visualiser(layout_simple_cross())
+    _, path = planner_class(env, debug=False).find_path()
+    assert path
+    assert blocked_length(path, env.obstacle_set) == 0
+
+
+def test_lazy_edges_path_stays_free():
+    np.random.seed(2)
+    random.seed(2)
+    env = Visualiser(layout_simple_cross())
+    _, path = Lazy_DT_RRT_Star(env, lazy_edges=True, debug=False).find_path()
+    assert path
+    assert blocked_length(path, env.obstacle_set) == 0
+
+
+def test_lazy_positional_arguments_match_dt_rrt_star():
+    events, budget = EventStream(), Budget()
+    planner = Lazy_DT_RRT_Star(Visualiser(layout_simple_cross()), 5, 20, events, budget)
+    assert (planner.events, planner.budget, planner.lazy_edges) == (events, budget, False)
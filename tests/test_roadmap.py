@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from map_layouts import layout_maze, layout_simple_cross
+from roadmap import FORMAT_VERSION, Roadmap
+from visualiser import Visualiser
+
+
+def test_build_gives_up_on_a_blocked_map():
+    map_env = Visualiser({"size": (100, 100), "obstacles": [((0, 0), (100, 100))]})
+    with pytest.raises(ValueError):
+        Roadmap.build(map_env, n_samples=200, max_draws_per_sample=5)
+
+
+def test_build_returns_a_partial_roadmap_on_a_nearly_blocked_map():
+    # free space: a 10 x 10 pocket, 1% of the map
+    obstacles = [((0, 0), (100, 45)), ((0, 55), (100, 45)), ((0, 45), (45, 10)), ((55, 45), (45, 10))]
+    map_env = Visualiser({"size": (100, 100), "obstacles": obstacles})
+    roadmap = Roadmap.build(map_env, n_samples=200, max_draws_per_sample=10)
+    assert 2 <= len(roadmap.positions) < 200
+    assert not map_env.obstacle_set.contains_points(roadmap.positions).any()
+    assert len(roadmap.indptr) == len(roadmap.positions) + 1
+
+
+def test_edges_and_query_connections_never_clip_obstacles():
+    map_env = Visualiser(layout_maze())
+    roadmap = Roadmap.build(map_env, n_samples=1500)
+    sources = np.repeat(np.arange(len(roadmap.positions)), np.diff(roadmap.indptr))
+    starts, ends = roadmap.positions[sources], roadmap.positions[roadmap.indices]
+    assert map_env.obstacle_set.are_segments_free(starts, ends, step_size=0.05).all()
+
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        start, goal = (roadmap.positions[i] for i in rng.choice(len(roadmap.positions), 2, replace=False))
+        path, _ = roadmap.query(tuple(start), tuple(goal))
+        assert map_env.obstacle_set.are_segments_free(path[:-1], path[1:], step_size=0.05).all()
+
+
+def test_roadmaps_of_another_format_are_not_loaded(tmp_path):
+    map_env = Visualiser(layout_simple_cross())
+    roadmap = Roadmap.load_or_build(map_env, tmp_path, n_samples=200)
+    (file,) = tmp_path.iterdir()
+    assert file.name.startswith(f"v{FORMAT_VERSION}-")
+    assert Roadmap.load(file, map_env.obstacle_set).indices.tolist() == roadmap.indices.tolist()
+
+    with np.load(file) as data:
+        fields = {name: data[name] for name in data.files if name != "version"}
+    old_file = tmp_path / "old.npz"
+    np.savez(old_file, step_size=5, **fields)
+    with pytest.raises(ValueError):
+        Roadmap.load(old_file, map_env.obstacle_set)
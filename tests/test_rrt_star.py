@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from budget import Budget
+from map_layouts import layout_simple_cross
+from q_rrt_star import Q_RRT_Star
+from rrt_star import RRT_Star
+from spatial_index import NodeIndex
+from visualiser import Visualiser
+
+
+class Point:
+    def __init__(self, position):
+        self.position = position
+
+
+def test_discard_matches_rebuild():
+    rng = np.random.default_rng(0)
+    nodes = [Point(tuple(position)) for position in rng.uniform(0, 500, (2000, 2)).tolist()]
+    index = NodeIndex((500, 500), nodes=nodes)
+    removed = set(nodes[::3])
+    index.discard(removed)
+    kept = [node for node in nodes if node not in removed]
+    assert len(index) == len(kept)
+    assert set(index.nodes()) == set(kept)
+    for position in rng.uniform(0, 500, (50, 2)).tolist():
+        expected = min(kept, key=lambda node: np.hypot(node.position[0] - position[0], node.position[1] - position[1]))
+        assert index.nearest(position) is expected
+
+
+@pytest.mark.parametrize("planner_class", [RRT_Star, Q_RRT_Star])
+def test_prune_keeps_best_path_and_index(planner_class):
+    np.random.seed(0)
+    planner = planner_class(Visualiser(layout_simple_cross()), anytime=True, prune_interval=50)
+    planner.budget = Budget(max_iterations=10_000)
+    best_node, path = planner.find_path()
+    assert best_node is not None
+    assert planner.nodes_pruned > 0
+
+    planner.prune(best_node)  # the best path sits right on the bound
+    tree = set(planner.nodes)
+    node = best_node
+    while node is not None:
+        assert node in tree
+        node = node.parent
+    assert len(planner.node_index) == len(planner.nodes)
+    assert set(planner.node_index.nodes()) == tree
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from dt_rrt_star import DT_RRT_Star
+from service import PlanningService, PlanResponse
+
+
+@pytest.mark.parametrize("request_", [[1, 2], 3, "maze", None])
+def test_handle_rejects_non_object_requests(request_):
+    service = PlanningService()
+    try:
+        response = asyncio.run(service.handle(request_))
+    finally:
+        service.close()
+    assert response["status"] == PlanResponse.FAILED
+    assert response["id"] is None
+    assert response["reason"].startswith("bad request")
+
+
+def handle(request, **service_kwargs):
+    service = PlanningService(max_wall_time=5, **service_kwargs)
+    try:
+        return asyncio.run(service.handle(request))
+    finally:
+        service.close()
+
+
+@pytest.mark.parametrize(
+    "request_",
+    [
+        {"id": 1, "start": [20, 20], "goal": [480, 480]},  # no layout
+        {"id": 2, "layout": "simple_cross", "goal": [480, 480]},  # no start
+        {"id": 3, "layout": "simple_cross", "start": 20, "goal": [480, 480]},  # not a point
+        {"id": 4, "layout": ["simple_cross"], "start": [20, 20], "goal": [480, 480]},  # not a name
+    ],
+)
+def test_handle_rejects_malformed_requests(request_):
+    response = handle(request_)
+    assert response["id"] == request_["id"]
+    assert response["status"] == PlanResponse.FAILED
+    assert response["reason"].startswith("bad request")
+
+
+def test_handle_rejects_unknown_layout():
+    response = handle({"id": 5, "layout": "atlantis", "start": [20, 20], "goal": [480, 480]})
+    assert (response["id"], response["status"]) == (5, PlanResponse.FAILED)
+    assert "atlantis" in response["reason"]
+
+
+def test_handle_rejects_unsolvable_request_without_planning():
+    # the goal is inside the cross's vertical bar
+    response = handle({"id": 6, "layout": "simple_cross", "start": [20, 20], "goal": [250, 250]})
+    assert (response["id"], response["status"], response["iterations"]) == (6, PlanResponse.FAILED, 0)
+    assert response["reason"] == "goal is inside an obstacle"
+
+
+def test_handle_reports_planner_errors():
+    # the planner is given an argument it does not take
+    response = handle({"id": 7, "layout": "simple_cross", "start": [20, 20], "goal": [480, 480]}, bogus=True)
+    assert (response["id"], response["status"]) == (7, PlanResponse.FAILED)
+    assert "bogus" in response["reason"]
+
+
+def test_handle_answers_a_valid_request():
+    response = handle({"id": 8, "layout": "simple_cross", "start": [20, 20], "goal": [480, 480]})
+    assert (response["id"], response["status"]) == (8, PlanResponse.OK)
+    assert response["path"][0] == (20, 20)
+
+
+def test_dt_planners_share_the_layouts_grid():
+    service = PlanningService(DT_RRT_Star, max_wall_time=30)
+    grids = []
+    run = service._run
+    service._run = lambda map_env, budget, occupancy: grids.append(occupancy) or run(map_env, budget, occupancy)
+
+    async def plan_twice():
+        return await asyncio.gather(
+            service.plan("simple_cross", (20, 20), (480, 480)), service.plan("simple_cross", (30, 400), (400, 30))
+        )
+
+    try:
+        responses = asyncio.run(plan_twice())
+    finally:
+        service.close()
+    assert [response.status for response in responses] == [PlanResponse.OK] * 2
+    assert grids[0] is not None and grids[0] is grids[1]
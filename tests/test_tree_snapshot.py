@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from rrt_star import Node
+from tree_snapshot import TreeSnapshot
+
+
+def random_tree(rng, n):
+    nodes = [Node((0.0, 0.0))]
+    nodes[0].cost = 0.0
+    for _ in range(n - 1):
+        parent = nodes[rng.integers(len(nodes))]
+        node = Node(tuple(rng.uniform(0, 500, 2).tolist()), parent)
+        node.cost = parent.cost + float(np.hypot(*np.subtract(node.position, parent.position)))
+        nodes.append(node)
+    return nodes
+
+
+def test_from_nodes_keeps_the_tree():
+    nodes = random_tree(np.random.default_rng(0), 300)
+    snapshot = TreeSnapshot.from_nodes(nodes)
+    for index in (1, 150, 299):
+        path, node = [], nodes[index]
+        while node is not None:
+            path.append(node.position)
+            node = node.parent
+        assert snapshot.trace_path(index) == path[::-1]
+    assert np.allclose(snapshot.costs, [node.cost for node in nodes])
+    assert len(snapshot.segments()) == 299
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_load_round_trip(tmp_path, mmap):
+    snapshot = TreeSnapshot.from_nodes(random_tree(np.random.default_rng(1), 500))
+    snapshot.save(tmp_path / "tree.snapshot")
+    loaded = TreeSnapshot.load(tmp_path / "tree.snapshot", mmap=mmap)
+    for saved, read in zip(snapshot, loaded):
+        assert np.array_equal(saved, read)
+    assert loaded.trace_path(499) == snapshot.trace_path(499)
+
+
+def test_load_rejects_other_files(tmp_path):
+    (tmp_path / "junk").write_bytes(b"not a tree" * 10)
+    with pytest.raises(ValueError):
+        TreeSnapshot.load(tmp_path / "junk")
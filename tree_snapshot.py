@@ -0,0 +1,125 @@
+"""
+Flat, array-backed copies of planner trees.
+
+Planners store their trees as linked `Node` objects, which are slow to copy, pickle or draw.
+A `TreeSnapshot` holds the same tree as three parallel arrays, indexed by node:
+positions, the index of each node's parent (`-1` for the root) and costs.
+
+Snapshots are saved in a flat binary format, which can be memory-mapped back:
+    - header: `MAGIC` (8 bytes), format version (`uint32`), padding (4 bytes), node count N (`uint64`)
+    - positions: N x 2 `float64`
+    - parents: N `int64`
+    - costs: N `float64`
+All little-endian, with every section 8-byte aligned.
+"""
+
+from os import PathLike
+from typing import NamedTuple
+
+import numpy as np
+
+MAGIC = b"RRT-TREE"
+FORMAT_VERSION = 1
+HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("padding", "<u4"), ("n_nodes", "<u8")])
+
+
+class TreeSnapshot(NamedTuple):
+    positions: np.ndarray
+    """
+    `(N, 2)` float array of node positions
+    """
+    parents: np.ndarray
+    """
+    `(N,)` int array of parent indices, `-1` for the root (and any node whose parent is not in the tree)
+    """
+    costs: np.ndarray
+    """
+    `(N,)` float array of costs-to-come (`inf` where unknown)
+    """
+
+    @classmethod
+    def from_nodes(cls, nodes: list) -> "TreeSnapshot":
+        """
+        Flattens any planner's `nodes` (objects with `.position`, `.parent` and optionally `.cost`)
+        """
+        return cls.from_lists(
+            list(nodes), [node.parent for node in nodes], [getattr(node, "cost", np.inf) for node in nodes]
+        )
+
+    @classmethod
+    def from_lists(cls, nodes: list, parents: list, costs: list) -> "TreeSnapshot":
+        """
+        Builds a snapshot from already copied per-node lists, so that the (slower) flattening
+        can happen away from the planner's thread (see `debug.DebugHook.request_snapshot`)
+        """
+        index = {id(node): i for i, node in enumerate(nodes)}
+        return cls(
+            np.array([node.position for node in nodes], dtype=float).reshape(-1, 2),
+            np.array([-1 if parent is None else index.get(id(parent), -1) for parent in parents], dtype=np.int64),
+            np.array(costs, dtype=float),
+        )
+
+    def segments(self) -> np.ndarray:
+        """
+        `(K, 2, 2)` array with one `(node, parent)` segment per edge of the tree
+        """
+        has_parent = self.parents >= 0
+        return np.stack([self.positions[has_parent], self.positions[self.parents[has_parent]]], axis=1)
+
+    def trace_path(self, index: int) -> list[tuple]:
+        """
+        The path from the root to the node at `index`
+        """
+        path = []
+        while index >= 0:
+            path.append(tuple(self.positions[index].tolist()))
+            index = self.parents[index]
+        path.reverse()
+        return path
+
+    def save(self, file: str | PathLike) -> None:
+        """
+        Writes the snapshot to `file` in the flat binary format (see the module docstring)
+        """
+        header = np.array([(MAGIC, FORMAT_VERSION, 0, len(self.parents))], dtype=HEADER)
+        with open(file, "wb") as f:
+            f.write(header.tobytes())
+            f.write(np.ascontiguousarray(self.positions, dtype="<f8").tobytes())
+            f.write(np.ascontiguousarray(self.parents, dtype="<i8").tobytes())
+            f.write(np.ascontiguousarray(self.costs, dtype="<f8").tobytes())
+        return
+
+    @classmethod
+    def load(cls, file: str | PathLike, mmap: bool = True) -> "TreeSnapshot":
+        """
+        Reads a snapshot written by `save`
+
+        Parameters:
+        -----------
+        file : str | PathLike
+            Where the snapshot was saved
+        mmap : bool
+            If set, the arrays are read-only memory maps of the file (loading is O(1)),
+            otherwise they are read into memory
+
+        Returns:
+        --------
+        TreeSnapshot
+            The saved tree
+        """
+        header = np.fromfile(file, dtype=HEADER, count=1)
+        if len(header) != 1 or header["magic"][0] != MAGIC:
+            raise ValueError(f"Not a tree snapshot: {file}")
+        if header["version"][0] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported tree snapshot version {header['version'][0]}: {file}")
+
+        n_nodes = int(header["n_nodes"][0])
+        offset = HEADER.itemsize
+        sections = []
+        for dtype, shape in (("<f8", (n_nodes, 2)), ("<i8", (n_nodes,)), ("<f8", (n_nodes,))):
+            if mmap and n_nodes:
+                sections.append(np.memmap(file, dtype=dtype, mode="r", offset=offset, shape=shape))
+            else:
+                sections.append(np.fromfile(file, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape))
+            offset += int(np.prod(shape)) * 8
+        return cls(*sections)
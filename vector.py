@@ -1,9 +1,16 @@
-from typing import Type, Tuple, List
+from typing import Tuple, List
 
-from numpy import cos, sin, arctan2, sqrt, pi
+from math import cos, sin, atan2, hypot, pi
 
 
 class Vector:
+    """
+    A light-weight vector with plain float maths.
+    Polar members are derived from the components on demand, never stored.
+    """
+
+    __slots__ = ("components",)
+
     components: List[float]
     """
     Components of the vector.
@@ -11,12 +18,6 @@ class Vector:
     Spatial components are at the beginning of the list.
     """
 
-    magnitude: float
-    angle: float
-    """
-    Direction of the vector in radians.
-    """
-
     def __init__(self, components: List[float] | None = None, polar: Tuple[float, float] | None = None) -> None:
         """
         Spatial components (up to 2) must be at the beginning of the list.
@@ -27,25 +28,18 @@ class Vector:
             raise ValueError("Either components or polar coordinates must be provided")
         elif components is not None:
             self.components = components
-            n_components = len(components)
-            if n_components == 1:
-                self.angle = 0
-                self.magnitude = components[0]
-                self.components[1] = 0
-            elif n_components >= 2:
-                # don't update the polar members until we need them
-                self.__update_from_components()
-                pass
         elif polar is not None:
-            self.magnitude, self.angle = polar
-            self.angle = self.angle % (2 * pi)  # pull angles back into the 0-2pi range
-            self.components = [0, 0]
-            self.__update_from_polar()
+            magnitude, angle = polar
+            angle = angle % (2 * pi)  # pull angles back into the 0-2pi range
+            if angle == 0 or angle == pi:
+                self.components = [magnitude if angle == 0 else -magnitude, 0.0]
+            else:
+                self.components = [cos(angle) * magnitude, sin(angle) * magnitude]
 
         return
 
     def __str__(self) -> str:
-        return f"Vector → (î,ĵ) = ({self.components[0]}, {self.components[1]}), r = {self.magnitude}, θ = {self.angle}"
+        return f"Vector → (î,ĵ) = ({self.components[0]}, {self.components[1]}), r = {self.magnitude}, θ = {self.angle}"
 
     def __repr__(self) -> str:
         return self.__str__()
@@ -64,43 +58,59 @@ class Vector:
         """
         return cls(components=components)
 
-    def __update_from_components(self) -> None:
+    @property
+    def magnitude(self) -> float:
         if len(self.components) == 1:
-            self.magnitude = self.components[0]
-        else:
-            self.magnitude = sqrt((self.components[0]) ** 2 + (self.components[1]) ** 2)
-            # Divide by zero check
-            self.angle = arctan2(self.components[1], self.components[0])
-        return
+            return self.components[0]
+        return hypot(self.components[0], self.components[1])
 
-    def __update_from_polar(self) -> None:
-        if self.angle == 0 or self.angle == pi:
-            self.components[0] = self.magnitude if self.angle == 0 else -self.magnitude
-        else:
-            self.components[0] = cos(self.angle) * self.magnitude
-            self.components[1] = sin(self.angle) * self.magnitude
-        return
+    @property
+    def angle(self) -> float:
+        """
+        Direction of the vector in radians.
+        """
+        if len(self.components) == 1:
+            return 0
+        return atan2(self.components[1], self.components[0])
 
     def scale(self, factor: float) -> "Vector":
         """
-        Scale the vector by the given factor
+        Scale the vector by the given factor, returning a new vector
+        """
+        return Vector([component * factor for component in self.components])
+
+    def scale_in_place(self, factor: float) -> "Vector":
+        """
+        Scale the vector by the given factor, without allocating a new vector
+        """
+        components = self.components
+        for i in range(len(components)):
+            components[i] *= factor
+        return self
+
+    def add_scaled(self, other: "Vector", factor: float) -> "Vector":
+        """
+        In-place `self += other * factor`, without allocating an intermediate vector
         """
-        self.__update_from_components()
-        # hoping that numpy's trig can deal with -ve radians
-        angle = (self.angle + pi) if factor < 0 else self.angle
-        magnitude = abs(factor) * self.magnitude
-        return Vector.from_polar(magnitude, angle)
+        components, other_components = self.components, other.components
+        if len(components) != len(other_components):
+            raise ValueError("Cannot add vectors of different dimensions")
+        for i in range(len(components)):
+            components[i] += other_components[i] * factor
+        return self
 
     def __add__(self, other):
         if len(self.components) != len(other.components):
             raise ValueError("Cannot add vectors of different dimensions")
-        return Vector.from_rectangular(
-            [(self.components[i] + other.components[i]) for i in range(len(self.components))]
-        )
+        return Vector([a + b for a, b in zip(self.components, other.components)])
 
     def __sub__(self, other):
         if len(self.components) != len(other.components):
             raise ValueError("Cannot subtract vectors of different dimensions")
-        return Vector.from_rectangular(
-            [(self.components[i] - other.components[i]) for i in range(len(self.components))]
-        )
+        return Vector([a - b for a, b in zip(self.components, other.components)])
+
+    def __iadd__(self, other):
+        return self.add_scaled(other, 1)
+
+    def __isub__(self, other):
+        return self.add_scaled(other, -1)
@@ -1,90 +1,175 @@
+from threading import Thread
+
+import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection, PatchCollection
 from matplotlib.axes import Axes
 import matplotlib.patches as patches
 from matplotlib.animation import FuncAnimation
 from layout import Layout
+from layout_file import LayoutFile
 from shapes import Circle
 from obstacle import Obstacle
+from obstacle_set import ObstacleSet
+from occupancy import OccupancyGrid
+from events import EventStream
+from tree_snapshot import TreeSnapshot
+
+DEFAULT_SIZE = (500, 500)
 
 
 class Visualiser:
+    obstacle_set: ObstacleSet
+    """
+    The compiled obstacles of the map, read by every planner's collision checks
+    """
+
+    occupancy: OccupancyGrid | None = None
+    """
+    The occupancy grid precompiled with the layout file, if any, reused by `OccupancyGrid.from_map`
+    """
+
     def __init__(
         self,
-        layout=None,
+        layout: dict | Layout | LayoutFile | None = None,
     ):
-        if layout is not None:
-            self.size = layout.get("size", (500, 500))
+        if isinstance(layout, LayoutFile) and len(layout.dynamic):
+            layout = layout.to_layout()  # moving obstacles need `Obstacle` objects
+        if isinstance(layout, LayoutFile):
+            self.size = layout.size
+            self.start = layout.start
+            self.goal = layout.goal
+            self.obstacle_set = layout.obstacle_set
+            self.occupancy = layout.occupancy
+        elif isinstance(layout, Layout):
+            self.size = layout.size
+            self.start = layout.start
+            self.goal = layout.end
+            self.obstacle_set = ObstacleSet.from_layout(layout)
+        elif layout is not None:
+            self.obstacle_set = ObstacleSet.from_layout(layout)
             self.start = layout.get("start", (10, 10))
-            self.goal = layout.get("goal", (480, 480))
-            self.obstacles = layout.get("obstacles", [])
+            self.size = layout["size"] if "size" in layout else self._fit_size(layout)
+            self.goal = layout.get("goal", (self.size[0] - 20, self.size[1] - 20))
         else:
             # Set defaults if no layout is provided
-            self.size = (500, 500)
+            self.size = DEFAULT_SIZE
             self.start = (10, 10)
             self.goal = (480, 480)
-            self.obstacles = []
+            self.obstacle_set = ObstacleSet()
 
-    def preview_layout(self):
-        fig, ax = self._setup_plot()
+    @property
+    def obstacles(self) -> list[tuple]:
+        """
+        Rectangular obstacles in the legacy `((x, y), (width, height))` format.
+        Assigning to it recompiles `obstacle_set`.
+        """
+        return self.obstacle_set.as_tuples()
+
+    @obstacles.setter
+    def obstacles(self, obstacles: list[tuple]) -> None:
+        self.obstacle_set = ObstacleSet.from_tuples(obstacles)
+
+    def preview_layout(self, save_to: str | None = None):
+        fig, ax = self._setup_plot(interactive=save_to is None)
         self._draw_obstacles(ax)
         self._draw_points(ax, [self.start], "go", "Start")  # Start in green
         self._draw_points(ax, [self.goal], "bo", "Goal")  # Goal in blue
-        plt.show()
+        self._show(fig, ax, save_to)
 
-    def visualize_gaussian_cloud(self, path, ref, nodes):
-        fig, ax = self._setup_plot()
+    def visualize_gaussian_cloud(self, path, ref, nodes, save_to: str | None = None):
+        fig, ax = self._setup_plot(interactive=save_to is None)
         self._draw_obstacles(ax)
         self._draw_path(ax, path)
-        self._draw_points(ax, [n for n in nodes], "c.", "Gaussian Nodes")
+        self._draw_points(ax, nodes, "c.", "Gaussian Nodes")
         self._draw_points(ax, [ref], "mo", "Reference Node")
         self._draw_points(ax, [self.start], "go", "Start")
         self._draw_points(ax, [self.goal], "bo", "Goal")
-        plt.show()
+        self._show(fig, ax, save_to)
 
-    def visualize_path(self, nodes, path):
-        fig, ax = self._setup_plot()
+    def visualize_path(self, nodes, path, save_to: str | None = None):
+        """
+        Draws the planner's tree and the path found through it.
+
+        Parameters:
+        -----------
+        nodes : list[Node] | TreeSnapshot
+            The planner's nodes, each with a `.position` and a `.parent`, or a flat snapshot of them
+        path : list[tuple]
+            The path from the start to the goal
+        save_to : str | None
+            If given, the figure is written to this file (PNG, SVG, or anything else
+            `matplotlib` can infer from the extension) without opening a window
+        """
+        fig, ax = self._setup_plot(interactive=save_to is None)
         self._draw_obstacles(ax)
         self._draw_tree(ax, nodes)
         self._draw_path(ax, path)
         self._draw_points(ax, [self.start], "g.", "Start")
         self._draw_points(ax, [self.goal], "b.", "Goal")
-        plt.show()
+        self._show(fig, ax, save_to)
 
-    def _setup_plot(self):
-        fig, ax = plt.subplots()
+    def _fit_size(self, layout: dict) -> tuple:
+        # a layout without a size spans its obstacles, start and goal, and at least `DEFAULT_SIZE`
+        rectangles, circles = self.obstacle_set.rectangles, self.obstacle_set.circles
+        extent = np.max(
+            [
+                DEFAULT_SIZE,
+                self.start,
+                layout.get("goal", (0, 0)),
+                *(rectangles[:, :2] + rectangles[:, 2:]),
+                *(circles[:, :2] + circles[:, 2:]),
+            ],
+            axis=0,
+        )
+        return tuple(extent.tolist())
+
+    def _setup_plot(self, interactive=True):
+        if interactive:
+            fig, ax = plt.subplots()
+        else:
+            # a bare `Figure` never touches the GUI backend, so this also works headless
+            fig = Figure()
+            ax = fig.subplots()
         ax.set_xlim(0, self.size[0])
         ax.set_ylim(0, self.size[1])
         ax.set_aspect("equal")
         ax.set_title("Map Environment")
         return fig, ax
 
+    def _show(self, fig, ax, save_to=None):
+        ax.legend(loc="upper left", bbox_to_anchor=(1, 1))
+        if save_to is None:
+            plt.show()
+        else:
+            fig.savefig(save_to, bbox_inches="tight", dpi=200)
+
     def _draw_obstacles(self, ax):
-        for obstacle in self.obstacles:
-            ox, oy = obstacle[0]
-            width, height = obstacle[1]
-            rect = patches.Rectangle((ox, oy), width, height, linewidth=1, facecolor="black")
-            ax.add_patch(rect)
+        obstacle_patches = [
+            patches.Rectangle((ox, oy), width, height) for ox, oy, width, height in self.obstacle_set.rectangles
+        ] + [patches.Circle((cx, cy), radius) for cx, cy, radius in self.obstacle_set.circles]
+        ax.add_collection(PatchCollection(obstacle_patches, linewidth=1, facecolor="black"))
 
     def _draw_tree(self, ax, nodes):
-        for node in nodes:
-            if node.parent is not None:
-                ax.plot(
-                    [node.position[0], node.parent.position[0]],
-                    [node.position[1], node.parent.position[1]],
-                    "r-",
-                    linewidth=0.4,
-                )
+        # one `(2, 2)` segment per edge, drawn as a single collection
+        if isinstance(nodes, TreeSnapshot):
+            segments = nodes.segments()
+        else:
+            segments = np.array(
+                [(node.position, node.parent.position) for node in nodes if node.parent is not None], dtype=float
+            ).reshape(-1, 2, 2)
+        ax.add_collection(LineCollection(segments, colors="r", linewidths=0.4))
 
     def _draw_path(self, ax, path):
         if path:
-            ax.plot([p[0] for p in path], [p[1] for p in path], "-b.", linewidth=0.8, label="Path", markersize=2.5)
+            points = np.asarray(path, dtype=float)
+            ax.plot(points[:, 0], points[:, 1], "-b.", linewidth=0.8, label="Path", markersize=2.5)
 
     def _draw_points(self, ax, points, style, label=None):
-        for point in points:
-            ax.plot(point[0], point[1], style, markersize=5, label=label)
-        if label:
-            ax.legend(loc="upper left", bbox_to_anchor=(1, 1))
+        if len(points):
+            points = np.asarray(points, dtype=float).reshape(-1, 2)
+            ax.plot(points[:, 0], points[:, 1], style, markersize=5, label=label)
 
 
 class DynamicVisualiser:
@@ -106,6 +191,7 @@ class DynamicVisualiser:
     layout: Layout
     anim: FuncAnimation
     actors: list[patches.Patch]
+    dynamic_set: ObstacleSet
 
     def __init__(self, render_freq: int, layout: Layout) -> None:
         """
@@ -132,34 +218,22 @@ class DynamicVisualiser:
         self.ax.legend(loc="upper left", bbox_to_anchor=(1, 1))
 
         # initialise static obstacles
-        for obstacle in self.layout.static_obstacles:
-            try:
-                patch_type = getattr(patches, obstacle.shape.__class__.__name__)
-                shape_args = obstacle.shape.get_attrs()
-                self.ax.add_patch(
-                    patch_type(
-                        tuple(obstacle.anchor_point.components[:2]),
-                        *shape_args,
-                        linewidth=5,
-                        facecolor="black",
-                    )
-                )
-            except AttributeError:
-                raise ValueError(f"Shape unsupported by `matplotlib`: {obstacle.shape.__class__.__name__}")
+        static_set = ObstacleSet.from_obstacles(self.layout.static_obstacles)
+        for x, y, width, height in static_set.rectangles:
+            self.ax.add_patch(patches.Rectangle((x, y), width, height, linewidth=5, facecolor="black"))
+        for x, y, radius in static_set.circles:
+            self.ax.add_patch(patches.Circle((x, y), radius, linewidth=5, facecolor="black"))
 
         # initialise dynamic obstacles
-        for obstacle in self.layout.dynamic_obstacles:
-            try:
-                patch_type = getattr(patches, obstacle.shape.__class__.__name__)
-                shape_args = obstacle.shape.get_attrs()
-                actor = patch_type(
-                    tuple(obstacle.anchor_point.components[:2]), *shape_args, linewidth=1, facecolor="red"
-                )
-                actor.set_animated(True)
-                self.ax.add_patch(actor)
-                self.actors.append(actor)
-            except AttributeError:
-                raise ValueError(f"Shape unsupported by `matplotlib`: {obstacle.shape.__class__.__name__}")
+        # actors are kept in the same order as the rows of `dynamic_set`
+        self.dynamic_set = ObstacleSet.from_obstacles(self.layout.dynamic_obstacles)
+        for x, y, width, height in self.dynamic_set.rectangles:
+            self.actors.append(patches.Rectangle((x, y), width, height, linewidth=1, facecolor="red"))
+        for x, y, radius in self.dynamic_set.circles:
+            self.actors.append(patches.Circle((x, y), radius, linewidth=1, facecolor="red"))
+        for actor in self.actors:
+            actor.set_animated(True)
+            self.ax.add_patch(actor)
 
         # blit is an optimistic graphics optimisation (not available on all platforms)
         # no harm if unavailable
@@ -177,10 +251,150 @@ class DynamicVisualiser:
         obstacles: list[Obstacle] = self.layout.dynamic_obstacles + self.layout.static_obstacles
         if len(self.layout.dynamic_obstacles) != len(self.actors):
             raise IndexError("Number of obstacles seems to have changed during simulation")
-        for obstacle, actor in zip(self.layout.dynamic_obstacles, self.actors):
+        for obstacle in self.layout.dynamic_obstacles:
             obstacle.move(self.update_interval)
             for other_obstacle in obstacles:
                 if obstacle != other_obstacle and obstacle.is_new_collision(other_obstacle):
                     obstacle.ricochet(other_obstacle)
-            actor.set(center=tuple(obstacle.anchor_point.components[:2]))
+
+        self.dynamic_set.refresh(self.layout.dynamic_obstacles)
+        n_rectangles = len(self.dynamic_set.rectangles)
+        for actor, (x, y, _, _) in zip(self.actors[:n_rectangles], self.dynamic_set.rectangles):
+            actor.set(xy=(x, y))
+        for actor, (x, y, _) in zip(self.actors[n_rectangles:], self.dynamic_set.circles):
+            actor.set(center=(x, y))
         return self.actors
+
+
+class LiveVisualiser:
+    """
+    Watches a planner while it runs.
+    The planner runs in a daemon thread and emits events into an `EventStream`;
+    each frame applies the pending events as deltas to a single tree collection
+    and redraws only the animated artists (blitting), like `DynamicVisualiser`.
+    If the stream dropped events, the tree is redrawn from the planner's nodes instead.
+    """
+
+    render_freq: int
+    """
+    The frequency (in ms) at which the visualiser updates.
+    """
+    max_events_per_frame: int
+    """
+    Upper bound on the events applied per frame, so a frame never stalls on a backlog.
+    """
+
+    fig: Figure
+    ax: Axes
+    anim: FuncAnimation
+    events: EventStream
+    result: tuple | None
+    """
+    What the planner's `find_path` returned, once it has finished
+    """
+
+    def __init__(self, planner, render_freq: int = 50, max_events_per_frame: int = 20_000) -> None:
+        """
+        Parameters:
+        ----------
+        - `planner`:
+            Any planner of this project, not yet started. If it has no `events` stream, one is attached.
+        - `render_freq`: int
+            The frequency (in ms) at which the visualiser updates.
+        - `max_events_per_frame`: int
+            Upper bound on the events applied per frame.
+        """
+        self.planner = planner
+        if planner.events is None:
+            planner.events = EventStream()
+        self.events = planner.events
+        self.render_freq = render_freq
+        self.max_events_per_frame = max_events_per_frame
+        self.result = None
+
+        # tree edges, one `(2, 2)` segment per node; `_rows` maps node ids to rows
+        self._segments = np.empty((1024, 2, 2))
+        self._row_ids: list[int] = []
+        self._rows: dict[int, int] = {}
+        self._dropped = self.events.dropped  # events lost so far, accounted for by the last resync
+
+        # set up plot
+        map_env = planner.map_env
+        self.fig, self.ax = map_env._setup_plot()
+        map_env._draw_obstacles(self.ax)
+        map_env._draw_points(self.ax, [map_env.start], "g.", "Start")
+        map_env._draw_points(self.ax, [map_env.goal], "b.", "Goal")
+        self.tree = LineCollection([], colors="r", linewidths=0.4, animated=True)
+        self.ax.add_collection(self.tree)
+        (self.path,) = self.ax.plot([], [], "-b.", linewidth=0.8, label="Path", markersize=2.5, animated=True)
+        self.ax.legend(loc="upper left", bbox_to_anchor=(1, 1))
+
+        Thread(target=self._run_planner, daemon=True).start()
+        self.anim = FuncAnimation(
+            self.fig, func=self.update, interval=self.render_freq, blit=True, cache_frame_data=False
+        )
+        plt.show()
+        return
+
+    def update(self, frame) -> list:
+        """
+        Apply the pending planner events.
+        """
+        if self.events.dropped != self._dropped:
+            self._resync()
+        for event in self.events.drain(self.max_events_per_frame):
+            if event.kind == EventStream.PATH_IMPROVED:
+                points = np.asarray(event.path, dtype=float).reshape(-1, 2)
+                self.path.set_data(points[:, 0], points[:, 1])
+            elif event.kind == EventStream.NODE_REMOVED:
+                self._remove_segment(event.node_id)
+            elif event.parent_position is not None:
+                self._set_segment(event.node_id, (event.position, event.parent_position))
+
+        self.tree.set_segments(self._segments[: len(self._row_ids)])
+        return [self.tree, self.path]
+
+    def _resync(self) -> None:
+        """
+        Redraws the tree from the planner's nodes, as events were lost and the deltas no longer add up
+        """
+        self._dropped = self.events.dropped
+        # the pending events are older than the nodes read below: all but the path are superseded
+        for event in self.events.drain():
+            if event.kind == EventStream.PATH_IMPROVED:
+                points = np.asarray(event.path, dtype=float).reshape(-1, 2)
+                self.path.set_data(points[:, 0], points[:, 1])
+        self._row_ids.clear()
+        self._rows.clear()
+        for node in list(self.planner.nodes):
+            # a node without an identifier yet has not been emitted, its `NODE_ADDED` event is still to come
+            node_id, parent = getattr(node, "event_id", None), node.parent
+            if node_id is not None and parent is not None:
+                self._set_segment(node_id, (tuple(node.position), tuple(parent.position)))
+        return
+
+    def _run_planner(self) -> None:
+        self.result = self.planner.find_path()
+        return
+
+    def _set_segment(self, node_id: int, segment) -> None:
+        row = self._rows.get(node_id)
+        if row is None:
+            row = self._rows[node_id] = len(self._row_ids)
+            self._row_ids.append(node_id)
+            if row == len(self._segments):
+                self._segments = np.concatenate([self._segments, np.empty_like(self._segments)])
+        self._segments[row] = segment
+        return
+
+    def _remove_segment(self, node_id: int) -> None:
+        row = self._rows.pop(node_id, None)
+        if row is None:
+            return
+        # move the last segment into the freed row
+        last_id = self._row_ids.pop()
+        if last_id != node_id:
+            self._segments[row] = self._segments[len(self._row_ids)]
+            self._row_ids[row] = last_id
+            self._rows[last_id] = row
+        return